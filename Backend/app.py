@@ -9,9 +9,10 @@ from flask_cors import CORS
 from config import Config
 from extensions import jwt, create_plaid_client
 from routes import register_blueprints
-from utils.db import init_pool, close_pool
+from utils.db import init_pool, close_pool, register_request_scope
 from utils.encryption import init_fernet
 from utils.errors import register_error_handlers
+from utils.webhook_verification import init_webhook_verifier
 from utils.logger import get_logger
 from services import plaid_service
 
@@ -30,11 +31,13 @@ def create_app() -> Flask:
 
     # ── Infrastructure ──
     init_pool()
+    register_request_scope(app)
     init_fernet()
 
     # ── Plaid client → inject into service layer ──
     plaid_client = create_plaid_client()
     plaid_service.init_plaid_client(plaid_client)
+    init_webhook_verifier(plaid_service.get_webhook_verification_key)
 
     # ── Blueprints ──
     register_blueprints(app)
@@ -28,19 +28,107 @@ class Config:
     # Connection pool sizing
     DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 2))
     DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+    # Seconds to wait for a free connection when the pool is exhausted (0 = fail fast)
+    DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", 0))
+
+    # ── Read replica (optional) — analytics reads; falls back to primary ──
+    DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+    DB_REPLICA_PORT = int(os.getenv("DB_REPLICA_PORT", DB_PORT))
+    DB_REPLICA_NAME = os.getenv("DB_REPLICA_NAME", DB_NAME)
+    DB_REPLICA_USER = os.getenv("DB_REPLICA_USER", DB_USER)
+    DB_REPLICA_PASSWORD = os.getenv("DB_REPLICA_PASSWORD", DB_PASSWORD)
+    DB_REPLICA_POOL_MIN = int(os.getenv("DB_REPLICA_POOL_MIN", DB_POOL_MIN))
+    DB_REPLICA_POOL_MAX = int(os.getenv("DB_REPLICA_POOL_MAX", DB_POOL_MAX))
+
+    # Server-side prepared statements for hot queries.
+    # Disable when connecting through PgBouncer in transaction mode.
+    DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+
+    # Bulk upserts at or above this many rows go through COPY + merge
+    DB_COPY_THRESHOLD = int(os.getenv("DB_COPY_THRESHOLD", 5000))
 
     # ── Plaid ──
     PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
     PLAID_SECRET = os.getenv("PLAID_SECRET")
     PLAID_ENV = os.getenv("PLAID_ENV", "sandbox")
 
+    # Concurrent item sync: worker threads shared by all requests/jobs,
+    # and the most items of a single user synced at once
+    PLAID_SYNC_MAX_WORKERS = int(os.getenv("PLAID_SYNC_MAX_WORKERS", 8))
+    PLAID_SYNC_PER_USER = int(os.getenv("PLAID_SYNC_PER_USER", 3))
+
+    # Background sync jobs: runner threads per process, how often a running job
+    # heartbeats, how long a running job may go without one before a new
+    # request replaces it, and how long a job may sit queued without starting
+    SYNC_JOB_WORKERS = int(os.getenv("SYNC_JOB_WORKERS", 4))
+    SYNC_JOB_HEARTBEAT_SECONDS = int(os.getenv("SYNC_JOB_HEARTBEAT_SECONDS", 30))
+    SYNC_JOB_STALE_SECONDS = int(os.getenv("SYNC_JOB_STALE_SECONDS", 600))
+    SYNC_JOB_QUEUED_MAX_SECONDS = int(os.getenv("SYNC_JOB_QUEUED_MAX_SECONDS", 3600))
+
+    # Durable job queue (job_queue table) used by jobs/worker.py
+    JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", 4))
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 5))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 60))
+    JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", 3600))
+    JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 14))
+    # python -m jobs: wall-clock limit per user (0 = none), best-effort; also the
+    # statement_timeout and Plaid call timeout cap in its worker processes
+    JOB_USER_TIMEOUT_SECONDS = float(os.getenv("JOB_USER_TIMEOUT_SECONDS", 600))
+    # Incremental jobs also rerun users unchanged for this many days (0 = only on change)
+    JOB_REFRESH_MAX_AGE_DAYS = int(os.getenv("JOB_REFRESH_MAX_AGE_DAYS", 7))
+    # User ids fetched per keyset page when a batch job lists its users
+    USER_PAGE_SIZE = int(os.getenv("USER_PAGE_SIZE", 5000))
+
+    # Seconds a cached accounts/balances row is served before a background refresh
+    PLAID_ACCOUNTS_MAX_AGE = int(os.getenv("PLAID_ACCOUNTS_MAX_AGE", 300))
+
+    # Client-side limits: requests/minute per endpoint family, e.g.
+    # "transactions=2500,accounts=1200" (unlisted families keep the defaults)
+    PLAID_RATE_LIMITS = os.getenv("PLAID_RATE_LIMITS", "")
+    PLAID_TIMEOUT_SECONDS = float(os.getenv("PLAID_TIMEOUT_SECONDS", 30))
+    PLAID_MAX_RETRIES = int(os.getenv("PLAID_MAX_RETRIES", 3))
+    PLAID_RETRY_BASE_SECONDS = float(os.getenv("PLAID_RETRY_BASE_SECONDS", 0.5))
+    PLAID_RETRY_MAX_SECONDS = float(os.getenv("PLAID_RETRY_MAX_SECONDS", 8))
+    # Per-institution breaker: open after N consecutive transient failures
+    PLAID_BREAKER_THRESHOLD = int(os.getenv("PLAID_BREAKER_THRESHOLD", 5))
+    PLAID_BREAKER_COOLDOWN_SECONDS = float(os.getenv("PLAID_BREAKER_COOLDOWN_SECONDS", 60))
+
+    # ── Plaid webhooks ──
+    # Public URL of POST /plaid/webhook, sent with new link tokens (unset = no webhooks)
+    PLAID_WEBHOOK_URL = os.getenv("PLAID_WEBHOOK_URL")
+    # plaid (signed JWT, default) | hmac (PLAID_WEBHOOK_SECRET stand-in) | none
+    PLAID_WEBHOOK_VERIFICATION = os.getenv("PLAID_WEBHOOK_VERIFICATION", "plaid").lower()
+    PLAID_WEBHOOK_SECRET = os.getenv("PLAID_WEBHOOK_SECRET")
+    # Webhooks for a user's items within this window collapse into one queued sync
+    PLAID_WEBHOOK_DEBOUNCE_SECONDS = float(os.getenv("PLAID_WEBHOOK_DEBOUNCE_SECONDS", 30))
+
     # ── Encryption ──
+    # Comma-separated Fernet keys, newest first (older keys only decrypt)
     PLAID_ENCRYPTION_KEY = os.getenv("PLAID_ENCRYPTION_KEY")
+    # In-memory cache of decrypted access tokens
+    TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 900))
+    TOKEN_CACHE_MAX_ITEMS = int(os.getenv("TOKEN_CACHE_MAX_ITEMS", 10000))
 
     # ── Gemini AI ──
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+    # ── Internal endpoints (/internal/*) — disabled when unset ──
+    INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
     # ── Pagination defaults ──
     DEFAULT_PAGE = 1
     DEFAULT_PER_PAGE = 50
     MAX_PER_PAGE = 200
+    # GET /transactions/search refuses queries the planner estimates above this cost
+    SEARCH_MAX_PLAN_COST = float(os.getenv("SEARCH_MAX_PLAN_COST", 10000))
+    # Rows fetched per server-side cursor round trip by GET /transactions/export
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 2000))
+
+    # ── Statement import (POST /transactions/import) ──
+    # Rows validated and COPYed per batch, and the most rows one file may hold
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+    IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", 100000))
+    # Largest request body Flask accepts (413 beyond it)
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_UPLOAD_MB", 20)) * 1024 * 1024
@@ -6,6 +6,7 @@ import plaid
 from plaid.api import plaid_api
 from flask_jwt_extended import JWTManager
 from config import Config
+from utils.plaid_client import ResilientPlaidClient
 
 # ── JWT ──
 jwt = JWTManager()
@@ -17,8 +18,11 @@ _plaid_env_map = {
 }
 
 
-def create_plaid_client():
-    """Build and return a configured Plaid API client."""
+def create_plaid_client(max_timeout: float = None):
+    """
+    Build a Plaid API client wrapped with rate limiting, retries and breakers.
+    max_timeout caps every call's timeout (seconds).
+    """
     plaid_config = plaid.Configuration(
         host=_plaid_env_map.get(Config.PLAID_ENV, plaid.Environment.Sandbox),
         api_key={
@@ -27,4 +31,4 @@ def create_plaid_client():
         },
     )
     api_client = plaid.ApiClient(plaid_config)
-    return plaid_api.PlaidApi(api_client)
+    return ResilientPlaidClient(plaid_api.PlaidApi(api_client), max_timeout=max_timeout)
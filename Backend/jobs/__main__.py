@@ -0,0 +1,250 @@
+"""
+Batch job runner — runs one job type for many users across a process pool.
+
+    python -m jobs subscriptions                      # changed users, one process per core
+    python -m jobs subscriptions --full               # every user, changed or not
+    python -m jobs cashflow_forecasts --processes 4 --timeout 120
+    python -m jobs weekly_reports --users 12 57 301
+    python -m jobs plaid_sync --shard 0/4             # user_id % 4 == 0 (run 0..3 on 4 nodes)
+    python -m jobs subscriptions --enqueue            # queue for jobs.worker instead
+    python -m jobs nightly                            # sync → subscriptions → cashflow / health
+
+Each worker process builds its own DB pool after the fork. A user that
+exceeds --timeout seconds of wall-clock time is abandoned and counted as a
+timeout; the run ends with a per-user duration summary (p50 / p95 / max),
+broken down by stage for the nightly pipeline.
+Exit status is non-zero if any user failed or timed out.
+
+The timeout is best-effort. SIGALRM interrupts the handler's own Python
+code, but not a blocking libpq call or a thread the handler started
+(plaid_sync fans items out to threads, which finish in the background).
+So within a worker process every statement is also bounded by a
+statement_timeout, and every Plaid call's timeout is capped, at the
+same value; a user can overrun by at most one such call.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import Config
+from jobs import queue
+from jobs.worker import bootstrap
+from utils.db import close_pool, db_scope, init_pool, reset_pool_after_fork
+from utils.logger import get_logger
+
+log = get_logger("jobs.runner")
+
+
+class _UserTimeout(BaseException):
+    """Raised by SIGALRM. A BaseException so handlers' `except Exception` can't swallow it."""
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+
+    if args.users:
+        user_ids = args.users
+    else:
+        init_pool()
+        try:
+            user_ids = queue.find_users(args.job, full=args.full)
+        finally:
+            close_pool()
+
+    if args.shard:
+        index, count = args.shard
+        user_ids = [uid for uid in user_ids if uid % count == index]
+
+    payload = {"full": True} if args.full else {}
+
+    if args.enqueue:
+        init_pool()
+        try:
+            queued = queue.enqueue(args.job, user_ids, payload)
+        finally:
+            close_pool()
+        print(f"{args.job}: queued {queued} of {len(user_ids)} users")
+        return 0
+
+    return _run(args.job, user_ids, args.processes, args.timeout, payload)
+
+
+def _run(job_type: str, user_ids: list, processes: int, timeout: float,
+         payload: dict) -> int:
+    log.info(
+        "Batch job started",
+        extra={"context": {"job_type": job_type, "users": len(user_ids),
+                           "processes": processes, "timeout_s": timeout}},
+    )
+    start = time.monotonic()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=_fork_context(),
+                             initializer=_init_process, initargs=(timeout,)) as pool:
+        futures = [pool.submit(_run_user, job_type, uid, timeout, payload)
+                   for uid in user_ids]
+        for done, future in enumerate(as_completed(futures), 1):
+            results.append(future.result())
+            if done % 500 == 0:
+                log.info("Batch job progress",
+                         extra={"context": {"job_type": job_type, "done": done,
+                                            "total": len(user_ids)}})
+
+    summary = _summarize(results, time.monotonic() - start)
+    log.info("Batch job finished", extra={"context": {"job_type": job_type, **summary}})
+    _print_summary(job_type, summary, results)
+    return 0 if summary["errors"] == 0 and summary["timeouts"] == 0 else 1
+
+
+# ═══════════════════════════════════════════════════
+# Worker process
+# ═══════════════════════════════════════════════════
+
+def _init_process(timeout: float):
+    """Runs once in each worker process, after fork."""
+    reset_pool_after_fork()
+    # Each process runs one user at a time; plaid syncs still fan out to threads
+    Config.DB_POOL_MIN = 1
+    if timeout:
+        # Read by libpq when the pool connects: no statement outlives a user's limit
+        options = os.environ.get("PGOPTIONS", "")
+        os.environ["PGOPTIONS"] = f"{options} -c statement_timeout={int(timeout * 1000)}".strip()
+    bootstrap(plaid_max_timeout=timeout or None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # the parent handles Ctrl-C
+
+
+def _on_alarm(signum, frame):
+    raise _UserTimeout()
+
+
+def _run_user(job_type: str, user_id: int, timeout: float, payload: dict) -> tuple:
+    """
+    Run one user's handler.
+    Returns (user_id, status, elapsed_seconds, error, {stage: ms} or None).
+    """
+    start = time.monotonic()
+    status, error, stage_ms = "ok", None, None
+
+    if timeout:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with db_scope(f"job:{job_type}:{user_id}"):
+            result = queue.run(job_type, user_id, payload)
+        if isinstance(result, dict):
+            stage_ms = result.get("stage_ms")
+    except _UserTimeout:
+        status, error = "timeout", f"exceeded {timeout}s"
+        log.error("User timed out",
+                  extra={"context": {"job_type": job_type, "user_id": user_id,
+                                     "timeout_s": timeout}})
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        log.error(f"User failed: {e}",
+                  extra={"context": {"job_type": job_type, "user_id": user_id}},
+                  exc_info=True)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return user_id, status, time.monotonic() - start, error, stage_ms
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m jobs",
+                                     description="Run a batch job over many users")
+    parser.add_argument("job", choices=queue.registered_types())
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--timeout", type=float, default=Config.JOB_USER_TIMEOUT_SECONDS,
+                        help="per-user wall-clock limit in seconds (0 = none)")
+    parser.add_argument("--users", type=int, nargs="+", help="only these user ids")
+    parser.add_argument("--shard", type=_shard, metavar="I/N",
+                        help="only users with user_id %% N == I")
+    parser.add_argument("--full", action="store_true",
+                        help="include users whose transactions haven't changed since the last run")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="queue the users for jobs.worker instead of running them")
+    return parser.parse_args(argv)
+
+
+def _shard(value: str) -> tuple:
+    try:
+        index, count = (int(p) for p in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected I/N, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("need 0 <= I < N")
+    return index, count
+
+
+def _fork_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(results: list, wall_seconds: float) -> dict:
+    durations = sorted(r[2] for r in results)
+    by_stage = {}
+    for r in results:
+        for stage, ms in (r[4] or {}).items():
+            by_stage.setdefault(stage, []).append(ms / 1000)
+
+    return {
+        "users": len(results),
+        "ok": sum(1 for r in results if r[1] == "ok"),
+        "errors": sum(1 for r in results if r[1] == "error"),
+        "timeouts": sum(1 for r in results if r[1] == "timeout"),
+        "wall_s": round(wall_seconds, 2),
+        "p50_s": round(_percentile(durations, 50), 3),
+        "p95_s": round(_percentile(durations, 95), 3),
+        "max_s": round(durations[-1], 3) if durations else 0.0,
+        "stages": {
+            stage: {
+                "p50_s": round(_percentile(sorted(v), 50), 3),
+                "p95_s": round(_percentile(sorted(v), 95), 3),
+                "max_s": round(max(v), 3),
+            }
+            for stage, v in by_stage.items()
+        },
+    }
+
+
+def _print_summary(job_type: str, summary: dict, results: list):
+    print(f"\n{job_type}: {summary['users']} users in {summary['wall_s']}s — "
+          f"{summary['ok']} ok, {summary['errors']} errors, {summary['timeouts']} timeouts")
+    print(f"per-user duration: p50 {summary['p50_s']}s  p95 {summary['p95_s']}s  "
+          f"max {summary['max_s']}s")
+
+    for stage, s in summary["stages"].items():
+        print(f"  {stage:<14} p50 {s['p50_s']}s  p95 {s['p95_s']}s  max {s['max_s']}s")
+
+    slowest = sorted(results, key=lambda r: r[2], reverse=True)[:5]
+    if slowest:
+        print("slowest: " + ", ".join(f"user {r[0]} ({r[2]:.2f}s)" for r in slowest))
+    failed = [r for r in results if r[1] != "ok"]
+    for user_id, status, _, error, _ in failed[:20]:
+        print(f"  user {user_id}: {status} — {error}")
+    if len(failed) > 20:
+        print(f"  ... and {len(failed) - 20} more (see logs)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
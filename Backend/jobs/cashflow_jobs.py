@@ -5,79 +5,67 @@ Idempotent — re-running updates existing forecasts for today.
 
 Usage (cron / CLI):
     from jobs.cashflow_jobs import generate_all_users_forecasts
-    generate_all_users_forecasts()
+    generate_all_users_forecasts()       # queue one item per changed user
+    python -m jobs.worker                # process them (any number of nodes)
+    python -m jobs cashflow_forecasts    # or run them now on a process pool
 
 Recommended schedule: Daily at 04:00 UTC (after subscription detection)
+Nightly, prefer jobs/pipeline.py, which runs this stage per user after
+sync and subscription detection instead of relying on the clock.
 """
-from models import cashflow_forecast as cf_model
+from functools import partial
+
+from jobs.queue import changed_users, enqueue, find_users, handler
+from models import user_activity as activity_model
 from services import cashflow_service
 from utils.logger import get_logger
 
 log = get_logger("jobs.cashflow_forecasts")
 
+JOB_TYPE = "cashflow_forecasts"
+
 DEFAULT_HORIZONS = [7, 14]
 
 
-def generate_all_users_forecasts(horizons=None):
+def generate_all_users_forecasts(horizons=None, full: bool = False):
     """
-    Iterate all users with transactions and generate cashflow forecasts.
-    Failures for one user do not block others.
+    Queue cashflow forecasts for every user whose transactions changed
+    since their last forecast run or who has no forecast for today yet
+    (every user with transactions if full).
 
     Args:
         horizons: list of horizon_days to compute (default [7, 14])
+        full:     include unchanged users
 
     Returns:
-        { "processed": int, "errors": int, "forecasts_generated": int }
+        { "users": int, "enqueued": int }
     """
     horizons = horizons or DEFAULT_HORIZONS
     log.info("Starting cashflow forecast job",
              extra={"context": {"horizons": horizons}})
 
-    user_ids = cf_model.find_distinct_user_ids()
+    user_ids = find_users(JOB_TYPE, full=full)
     log.info(
         f"Found {len(user_ids)} users with transactions",
         extra={"context": {"user_count": len(user_ids)}},
     )
 
-    processed = 0
-    errors = 0
-    forecasts_generated = 0
+    queued = enqueue(JOB_TYPE, user_ids, {"horizons": horizons})
+    return {"users": len(user_ids), "enqueued": queued}
 
-    for uid in user_ids:
-        user_ok = True
-        for horizon in horizons:
-            try:
-                cashflow_service.get_forecast(
-                    user_id=uid,
-                    account_id="all",
-                    horizon_days=horizon,
-                    starting_balance=None,  # Will use 0; real balance comes from frontend
-                )
-                forecasts_generated += 1
-            except Exception as e:
-                log.error(
-                    f"Forecast failed for user {uid}, horizon {horizon}: {e}",
-                    extra={"context": {"user_id": uid, "horizon": horizon}},
-                    exc_info=True,
-                )
-                errors += 1
-                user_ok = False
 
-        if user_ok:
-            processed += 1
-
-    log.info(
-        "Cashflow forecast job finished",
-        extra={"context": {
-            "processed": processed,
-            "errors": errors,
-            "forecasts_generated": forecasts_generated,
-            "total_users": len(user_ids),
-        }},
+@handler(JOB_TYPE, users=activity_model.iter_user_ids,
+         changed=partial(changed_users, period="day"))
+def generate_user_forecasts(user_id: int, payload: dict) -> dict:
+    """
+    Compute every requested horizon for one user from one set of inputs,
+    persisted in one batched upsert.
+    """
+    horizons = payload.get("horizons") or DEFAULT_HORIZONS
+    forecasts = cashflow_service.get_forecasts(
+        user_id=user_id,
+        account_id="all",
+        horizons=horizons,
+        starting_balance=None,  # Falls back to the cached account balances
     )
-
-    return {
-        "processed": processed,
-        "errors": errors,
-        "forecasts_generated": forecasts_generated,
-    }
+    return {"forecasts_generated": len(forecasts)}
@@ -0,0 +1,57 @@
+"""
+Background job: Reconcile transaction_counters against transactions.
+Safe to run via cron, scheduler, or manual trigger.
+Idempotent — counters that already match are left untouched.
+
+Triggers keep the counters current on every write (migration 015); this
+catches what they can't see (TRUNCATE, writes with triggers disabled,
+restores) by recounting users chunk by chunk, one short transaction each.
+
+Usage (cron / CLI):
+    from jobs.counter_jobs import reconcile_all_users
+    reconcile_all_users()
+    python -m jobs transaction_counters --users 12 57   # specific users
+
+Recommended schedule: Weekly, off-peak
+"""
+import time
+
+from jobs.queue import handler, user_chunks
+from models import transaction_counter as counter_model
+from models import user_activity as activity_model
+from utils.db import db_scope
+from utils.logger import get_logger
+
+log = get_logger("jobs.transaction_counters")
+
+JOB_TYPE = "transaction_counters"
+
+
+def reconcile_all_users(chunk_size: int = 500) -> dict:
+    """
+    Recount every user with transactions, chunk_size users per transaction.
+
+    Returns:
+        { "users": int, "fixed": int, "elapsed_s": float }
+    """
+    log.info("Starting transaction counter reconciliation")
+    start = time.monotonic()
+
+    users = fixed = 0
+    with db_scope(f"job:{JOB_TYPE}:bulk"):
+        for chunk in user_chunks(JOB_TYPE, size=chunk_size):
+            fixed += counter_model.reconcile(chunk)
+            users += len(chunk)
+
+    summary = {"users": users, "fixed": fixed,
+               "elapsed_s": round(time.monotonic() - start, 2)}
+    if fixed:
+        log.warning("Transaction counters had drifted", extra={"context": summary})
+    log.info("Transaction counter reconciliation finished", extra={"context": summary})
+    return summary
+
+
+@handler(JOB_TYPE, users=activity_model.iter_user_ids)
+def reconcile_user(user_id: int, payload: dict) -> dict:
+    """Recount one user's counters."""
+    return {"fixed": counter_model.reconcile([user_id])}
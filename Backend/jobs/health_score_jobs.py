@@ -0,0 +1,80 @@
+"""
+Background job: Pre-compute Financial Health Scores for all users.
+Safe to run via cron, scheduler, or manual trigger.
+Idempotent — re-running updates today's scores, never duplicates.
+
+Without it the first dashboard load each day computes the score on demand;
+with it, that load is a cache hit. Every analysis window (30 / 60 / 90 days)
+is scored for the all-accounts view.
+
+Not incremental: scores are cached per day (as_of_date) and the windows
+end today, so every user needs a fresh row each day whether or not their
+transactions changed.
+
+Two modes:
+  * bulk: generate_all_users_health_scores() fetches the inputs for a chunk
+    of users × windows in a few set-based queries, scores them as NumPy
+    arrays and bulk-upserts the results, in one process
+  * per-user items on the job queue (same computation, one user per item)
+
+Usage (cron / CLI):
+    from jobs.health_score_jobs import generate_all_users_health_scores
+    generate_all_users_health_scores()   # set-based, chunk by chunk
+    python -m jobs health_scores         # or per user on a process pool
+
+Recommended schedule: Daily at 05:00 UTC (after subscription detection,
+which the recurring-burden metric reads)
+"""
+import time
+
+from jobs.queue import handler, user_chunks
+from models import user_activity as activity_model
+from services import health_score_service
+from utils.db import db_scope
+from utils.logger import get_logger
+
+log = get_logger("jobs.health_scores")
+
+JOB_TYPE = "health_scores"
+
+
+def generate_all_users_health_scores(chunk_size: int = 1000,
+                                     windows=health_score_service.VALID_WINDOWS):
+    """
+    Score every window for every user with transactions, chunk_size
+    users per set-based pass. Each chunk is committed on its own.
+
+    Returns:
+        { "users": int, "scores": int, "chunks": int, "elapsed_s": float }
+    """
+    log.info("Starting bulk health score job",
+             extra={"context": {"windows": list(windows)}})
+    start = time.monotonic()
+
+    with db_scope(f"job:{JOB_TYPE}:bulk"):
+        users = scores = chunks = 0
+        for chunk in user_chunks(JOB_TYPE, size=chunk_size):
+            result = health_score_service.generate_scores_many(chunk, windows)
+            users += len(chunk)
+            scores += result["scores"]
+            chunks += 1
+            log.info(
+                "Health score chunk done",
+                extra={"context": {"done": users, "scores": result["scores"]}},
+            )
+
+    summary = {"users": users, "scores": scores, "chunks": chunks,
+               "elapsed_s": round(time.monotonic() - start, 2)}
+    log.info("Bulk health score job finished", extra={"context": summary})
+    return summary
+
+
+@handler(JOB_TYPE, users=activity_model.iter_user_ids)
+def generate_user_health_scores(user_id: int, payload: dict) -> dict:
+    """Score every analysis window for one user."""
+    result = health_score_service.generate_scores_many([user_id])
+    log.info(
+        "Health scores generated for user",
+        extra={"context": {"user_id": user_id, "scores": result["scores"]}},
+    )
+    return {"scores": result["scores"]}
@@ -0,0 +1,254 @@
+"""
+Background job: Nightly per-user pipeline.
+
+Runs every nightly stage for one user, in dependency order:
+
+    sync ──► subscriptions ──► cashflow
+                          └──► health
+
+The stages used to be separate cron jobs, each a full pass over the user
+base, ordered only by wall-clock time (subscriptions 03:00, forecasts 04:00).
+Here they run as one per-user work item. Different users progress
+independently across worker threads and processes, so user A's forecast can
+run while user B is still syncing. After sync, the user's transactions are
+fetched once into a TransactionWindow that every analytics stage reads
+instead of issuing its own aggregate queries. Per-stage timings are returned
+and summarized by the runner.
+
+Analytics stages are skipped for a user whose transactions haven't changed
+since the stage last succeeded for them (after sync, so fresh Plaid data
+counts), unless the item was queued with full=True or the stage last ran
+more than JOB_REFRESH_MAX_AGE_DAYS ago. Stages whose output is keyed by
+the run date (forecasts and health scores, cached per as_of_date) are only
+skipped if they already succeeded today, e.g. when a failed item is retried.
+
+A failed sync (e.g. an institution outage) does not block the analytics
+stages, which then run on the last synced data. Any other failed stage skips
+the stages that depend on it and fails the item, so the queue retries it.
+
+Usage (cron / CLI):
+    from jobs.pipeline import enqueue_all_users
+    enqueue_all_users()                  # queue one item per user
+    enqueue_all_users(full=True)         # ... and recompute unchanged users too
+    python -m jobs.worker                # process them (any number of nodes)
+    python -m jobs nightly               # or run them now on a process pool
+
+Recommended schedule: Daily at 03:00 UTC
+"""
+import time
+
+from config import Config
+from jobs.cashflow_jobs import DEFAULT_HORIZONS
+from jobs.queue import changed_users, enqueue, find_users, handler
+from models import transaction as txn_model
+from models import user_activity as activity_model
+from services import cashflow_service, health_score_service, plaid_service, subscription_service
+from utils.errors import NotFoundError
+from utils.logger import get_logger
+from utils.transaction_window import TransactionWindow
+
+log = get_logger("jobs.pipeline")
+
+JOB_TYPE = "nightly"
+
+# Longest lookback any stage reads (subscription detection)
+WINDOW_DAYS = subscription_service.LOOKBACK_DAYS
+HEALTH_WINDOW_DAYS = 90
+
+
+class _Skip(Exception):
+    """A stage has nothing to do for this user."""
+
+
+# ═══════════════════════════════════════════════════
+# Stages
+# ═══════════════════════════════════════════════════
+
+def _sync(user_id: int, ctx: dict) -> dict:
+    try:
+        result = plaid_service.sync_transactions(user_id)
+    except NotFoundError:
+        raise _Skip("no linked items")
+    return {k: result[k] for k in ("added", "modified", "removed")}
+
+
+def _subscriptions(user_id: int, ctx: dict) -> dict:
+    stats = subscription_service.detect_subscriptions(
+        user_id, "all", window=_window(user_id, ctx)
+    )
+    return {"detected": stats["detected"]}
+
+
+def _cashflow(user_id: int, ctx: dict) -> dict:
+    horizons = ctx["payload"].get("horizons") or DEFAULT_HORIZONS
+    cashflow_service.get_forecasts(user_id, "all", horizons, window=_window(user_id, ctx))
+    return {"horizons": len(horizons)}
+
+
+def _health(user_id: int, ctx: dict) -> dict:
+    score = health_score_service.get_health_score(
+        user_id, "all", HEALTH_WINDOW_DAYS, window=_window(user_id, ctx)
+    )
+    return {"health_score": score.get("health_score")}
+
+
+# (name, fn, depends on, failure blocks dependents, skipped if unchanged)
+# — in dependency order. The last field is None (always runs), "data"
+# (skipped while the user's data is unchanged) or "day" (... and it
+# already succeeded today, for outputs keyed by the run date).
+STAGES = (
+    ("sync", _sync, (), False, None),
+    ("subscriptions", _subscriptions, ("sync",), True, "data"),
+    ("cashflow", _cashflow, ("subscriptions",), True, "day"),
+    ("health", _health, ("subscriptions",), True, "day"),
+)
+
+
+# ═══════════════════════════════════════════════════
+# Public API
+# ═══════════════════════════════════════════════════
+
+def enqueue_all_users(stages: list = None, full: bool = False):
+    """
+    Queue the nightly pipeline for every user with linked items, plus
+    manual-only users whose transactions changed or who weren't run
+    today (everyone if full).
+
+    Args:
+        stages: subset of stage names to run (default: all)
+        full:   also recompute users and stages whose data is unchanged
+
+    Returns:
+        { "users": int, "enqueued": int }
+    """
+    unknown = set(stages or []) - {name for name, *_ in STAGES}
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+
+    log.info("Starting nightly pipeline job")
+
+    user_ids = find_users(JOB_TYPE, full=full)
+    log.info(
+        f"Found {len(user_ids)} users",
+        extra={"context": {"user_count": len(user_ids)}},
+    )
+
+    payload = {k: v for k, v in (("stages", stages), ("full", full)) if v} or None
+    return {"users": len(user_ids), "enqueued": enqueue(JOB_TYPE, user_ids, payload)}
+
+
+def _pipeline_users():
+    return activity_model.iter_user_ids("any")
+
+
+def _pipeline_changed(job_type: str) -> list:
+    """
+    Users with linked items (sync has to ask Plaid) plus manual-only users
+    that changed or weren't run today (the date-keyed stages need a run).
+    """
+    with_items = set(activity_model.iter_user_ids("plaid_items"))
+    return sorted(with_items.union(changed_users(job_type, period="day")))
+
+
+@handler(JOB_TYPE, users=_pipeline_users, changed=_pipeline_changed)
+def run_user_pipeline(user_id: int, payload: dict) -> dict:
+    """
+    Run the selected stages for one user in dependency order.
+
+    Returns:
+        { "stages": {name: {"status", "ms", ...}}, "stage_ms": {name: ms} }
+    """
+    selected = set(payload.get("stages") or [name for name, *_ in STAGES])
+    ctx = {"payload": payload, "window": None, "version": None, "watermarks": None}
+    stages = {}
+    blocked = set()
+    failed = []
+
+    for name, fn, deps, blocking, reuse in STAGES:
+        if name not in selected:
+            continue
+        if blocked & set(deps):
+            stages[name] = {"status": "skipped", "ms": 0}
+            blocked.add(name)
+            continue
+        if reuse and not payload.get("full") and _unchanged(user_id, name, reuse, ctx):
+            stages[name] = {"status": "skipped", "ms": 0, "reason": "unchanged"}
+            continue
+
+        start = time.monotonic()
+        try:
+            detail, status = fn(user_id, ctx), "ok"
+        except _Skip as e:
+            detail, status = {"reason": str(e)}, "skipped"
+        except Exception as e:
+            detail, status = {"error": f"{type(e).__name__}: {e}"}, "failed"
+            log.error(
+                f"Pipeline stage {name} failed for user {user_id}: {e}",
+                extra={"context": {"user_id": user_id, "stage": name}},
+                exc_info=True,
+            )
+            if blocking:
+                blocked.add(name)
+                failed.append(name)
+
+        stages[name] = {"status": status,
+                        "ms": round((time.monotonic() - start) * 1000, 1), **detail}
+        if reuse and status == "ok":
+            activity_model.record_success(_stage_key(name), user_id,
+                                          _data_version(user_id, ctx))
+
+    stage_ms = {name: s["ms"] for name, s in stages.items() if s["status"] == "ok"}
+    log.info(
+        "Pipeline finished for user",
+        extra={"context": {"user_id": user_id,
+                           "statuses": {n: s["status"] for n, s in stages.items()},
+                           "stage_ms": stage_ms}},
+    )
+
+    if failed:
+        raise RuntimeError(f"Pipeline stages failed: {', '.join(failed)}")
+    return {"stages": stages, "stage_ms": stage_ms}
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _window(user_id: int, ctx: dict) -> TransactionWindow:
+    """The user's transaction window, fetched on first use after sync."""
+    if ctx["window"] is None:
+        as_of, rows = txn_model.fetch_window(user_id, WINDOW_DAYS)
+        ctx["window"] = TransactionWindow(rows, as_of, WINDOW_DAYS)
+    return ctx["window"]
+
+
+def _stage_key(name: str) -> str:
+    """Watermark key of a pipeline stage in job_watermarks."""
+    return f"{JOB_TYPE}:{name}"
+
+
+def _data_version(user_id: int, ctx: dict) -> int:
+    """The user's data version, read once after sync (before any analytics stage)."""
+    if ctx["version"] is None:
+        ctx["version"] = activity_model.get_version(user_id)
+    return ctx["version"]
+
+
+def _unchanged(user_id: int, name: str, reuse: str, ctx: dict) -> bool:
+    """
+    True if the stage already succeeded at the current data version,
+    recently enough (and today, for "day" stages).
+    """
+    version = _data_version(user_id, ctx)
+    if ctx["watermarks"] is None:
+        ctx["watermarks"] = activity_model.find_watermarks(
+            user_id, [_stage_key(n) for n, *_, r in STAGES if r]
+        )
+    mark = ctx["watermarks"].get(_stage_key(name))
+    if mark is None:
+        return False
+    mark_version, age_days, ran_today = mark
+    if reuse == "day" and not ran_today:
+        return False
+    max_age = Config.JOB_REFRESH_MAX_AGE_DAYS
+    return mark_version >= version and (not max_age or age_days < max_age)
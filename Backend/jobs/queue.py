@@ -0,0 +1,270 @@
+"""
+Job queue — registry of per-user job handlers and the worker loop.
+
+Nightly jobs are split into an enqueue step and a per-user handler:
+
+    @handler("subscriptions")
+    def detect_user_subscriptions(user_id, payload): ...
+
+    enqueue("subscriptions", user_ids)      # one job_queue row per user
+
+Workers (jobs/worker.py) lease rows with FOR UPDATE SKIP LOCKED, run the
+registered handler inside db_scope(), and record success, a retry with
+exponential backoff, or a dead letter after max_attempts. While a handler
+runs, a heartbeat thread keeps its lease alive; if the worker dies the
+lease expires and another worker picks the row up. Throughput scales with
+the number of worker threads / processes / machines.
+
+Incremental jobs register a `changed` source as well. By default they only
+visit users whose transactions changed since the job last succeeded for
+them (user_activity.data_version past the job's watermark); run() advances
+the watermark after each success. Pass full=True to visit everyone.
+"""
+import itertools
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from models import job_queue as queue_model
+from models import user_activity as activity_model
+from utils.db import db_scope
+from utils.logger import get_logger
+
+log = get_logger("jobs.queue")
+
+_HANDLERS = {}       # job_type → fn(user_id, payload) -> dict | None
+_USER_SOURCES = {}   # job_type → fn() -> iterable of every user_id the job covers
+_CHANGED_SOURCES = {}  # job_type → fn(job_type) -> [user_id, ...] needing a run
+
+
+def handler(job_type: str, users=None, changed=None):
+    """
+    Register fn(user_id, payload) as the handler for a job type.
+    `users` returns (or streams) every user id the job should run for,
+    usually a user_activity.iter_user_ids() source.
+    `changed(job_type)` returns only the users that need a run since the
+    job's last success (usually changed_users); it makes the job incremental.
+    """
+    def register(fn):
+        _HANDLERS[job_type] = fn
+        if users is not None:
+            _USER_SOURCES[job_type] = users
+        if changed is not None:
+            _CHANGED_SOURCES[job_type] = changed
+        return fn
+    return register
+
+
+def registered_types() -> list:
+    return sorted(_HANDLERS)
+
+
+def get_handler(job_type: str):
+    if job_type not in _HANDLERS:
+        raise ValueError(f"No handler registered for job type '{job_type}'")
+    return _HANDLERS[job_type]
+
+
+def find_users(job_type: str, full: bool = False) -> list:
+    """
+    User ids a job type should run for: those changed since its last
+    success for incremental jobs, or all it covers if full (or not incremental).
+    """
+    return list(iter_users(job_type, full))
+
+
+def iter_users(job_type: str, full: bool = False):
+    """find_users() as an iterator; full lists stream from their source page by page."""
+    get_handler(job_type)
+    if not full and job_type in _CHANGED_SOURCES:
+        return iter(_CHANGED_SOURCES[job_type](job_type))
+    return iter(_USER_SOURCES[job_type]())
+
+
+def user_chunks(job_type: str, full: bool = False, size: int = 1000):
+    """Yield find_users() in lists of up to `size` ids, for set-based bulk jobs."""
+    users = iter_users(job_type, full)
+    while True:
+        chunk = list(itertools.islice(users, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def changed_users(job_type: str, period: str = None) -> list:
+    """
+    Users whose transactions changed since `job_type` last succeeded for
+    them, plus those not run for JOB_REFRESH_MAX_AGE_DAYS (date-relative
+    outputs like forecast windows drift even when the data doesn't).
+
+    Jobs whose output is keyed by the run's day or week pass period='day'
+    / 'week' (register with partial(changed_users, period=...)): users
+    not yet run in the current period are included too, so every user
+    gets that period's row.
+    """
+    return activity_model.find_changed_user_ids(
+        job_type, Config.JOB_REFRESH_MAX_AGE_DAYS or None, period
+    )
+
+
+def run(job_type: str, user_id: int, payload: dict):
+    """
+    Run a job's handler for one user (call inside db_scope()).
+    For incremental jobs, the data version read before the run becomes the
+    user's watermark on success, so writes that land mid-run aren't lost.
+    """
+    fn = get_handler(job_type)
+    if job_type not in _CHANGED_SOURCES:
+        return fn(user_id, payload)
+
+    version = activity_model.get_version(user_id)
+    result = fn(user_id, payload)
+    activity_model.record_success(job_type, user_id, version)
+    return result
+
+
+def enqueue(job_type: str, user_ids: list, payload: dict = None) -> int:
+    """
+    Queue one item per user (users with an item already in flight are
+    skipped) and purge succeeded rows past the retention window.
+    Returns the number of items queued.
+    """
+    get_handler(job_type)
+    queue_model.purge_finished(Config.JOB_RETENTION_DAYS)
+    queued = queue_model.enqueue_many(
+        job_type, user_ids, payload, max_attempts=Config.JOB_MAX_ATTEMPTS
+    )
+    log.info(
+        "Jobs enqueued",
+        extra={"context": {"job_type": job_type, "users": len(user_ids),
+                           "queued": queued}},
+    )
+    return queued
+
+
+# ═══════════════════════════════════════════════════
+# Worker
+# ═══════════════════════════════════════════════════
+
+class Worker:
+    """
+    Leases and runs queued items until stopped (or, with drain=True, until
+    nothing is ready). Safe to run any number of these concurrently.
+    """
+
+    def __init__(self, job_types: list = None, threads: int = None,
+                 lease_seconds: int = None, poll_seconds: float = None):
+        self.job_types = list(job_types or registered_types())
+        unknown = set(self.job_types) - set(_HANDLERS)
+        if unknown:
+            raise ValueError(f"No handler registered for: {', '.join(sorted(unknown))}")
+
+        self.threads = threads or Config.JOB_WORKER_THREADS
+        self.lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        self.poll_seconds = poll_seconds if poll_seconds is not None else Config.JOB_POLL_SECONDS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self._stop = threading.Event()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self.stats = {"succeeded": 0, "retried": 0, "dead": 0, "lost": 0}
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, drain: bool = False) -> dict:
+        """Process items until stop() — or until the queue is empty if drain."""
+        log.info(
+            "Job worker started",
+            extra={"context": {"worker_id": self.worker_id, "job_types": self.job_types,
+                               "threads": self.threads}},
+        )
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat",
+                                     daemon=True)
+        heartbeat.start()
+
+        next_sweep = 0.0
+        with ThreadPoolExecutor(max_workers=self.threads,
+                                thread_name_prefix="job-worker") as pool:
+            while not self._stop.is_set():
+                # Expired final attempts only need sweeping about once per poll
+                if time.monotonic() >= next_sweep:
+                    queue_model.dead_letter_expired()
+                    next_sweep = time.monotonic() + max(self.poll_seconds, 1.0)
+                free = self.threads - len(self._in_flight)
+                jobs = queue_model.lease(self.worker_id, self.job_types, free,
+                                         self.lease_seconds) if free > 0 else []
+
+                for job in jobs:
+                    with self._lock:
+                        self._in_flight.add(job["id"])
+                    pool.submit(self._run_one, job)
+
+                if not jobs:
+                    if drain and not self._in_flight:
+                        break
+                    # Poll slowly when idle, quickly when waiting for a free thread
+                    idle = free > 0 and not drain
+                    self._stop.wait(self.poll_seconds if idle else 0.1)
+
+        self._stop.set()
+        log.info("Job worker stopped",
+                 extra={"context": {"worker_id": self.worker_id, **self.stats}})
+        return dict(self.stats)
+
+    # ── Private ──
+
+    def _run_one(self, job: dict):
+        job_id, job_type, user_id = job["id"], job["job_type"], job["user_id"]
+        start = time.monotonic()
+        try:
+            with db_scope(f"job:{job_type}:{user_id}"):
+                result = run(job_type, user_id, job["payload"])
+        except Exception as e:
+            delay = _retry_delay(job["attempts"])
+            status = queue_model.fail(job_id, self.worker_id, f"{type(e).__name__}: {e}", delay)
+            self._tally({"queued": "retried", "dead": "dead"}.get(status, "lost"))
+            log.error(
+                f"Job failed: {e}",
+                extra={"context": {"job_id": job_id, "job_type": job_type,
+                                   "user_id": user_id, "attempt": job["attempts"],
+                                   "status": status}},
+                exc_info=status == "dead",
+            )
+        else:
+            ok = queue_model.complete(job_id, self.worker_id, result)
+            self._tally("succeeded" if ok else "lost")
+            log.info(
+                "Job succeeded",
+                extra={"context": {"job_id": job_id, "job_type": job_type,
+                                   "user_id": user_id,
+                                   "elapsed_ms": round((time.monotonic() - start) * 1000)}},
+            )
+        finally:
+            with self._lock:
+                self._in_flight.discard(job_id)
+
+    def _tally(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _heartbeat(self):
+        """Extend in-flight leases every third of the lease period."""
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                job_ids = list(self._in_flight)
+            try:
+                queue_model.extend_leases(self.worker_id, job_ids, self.lease_seconds)
+            except Exception:
+                log.exception("Lease heartbeat failed",
+                              extra={"context": {"worker_id": self.worker_id}})
+
+
+def _retry_delay(attempt: int) -> float:
+    """Exponential backoff between attempts, capped at JOB_RETRY_MAX_SECONDS."""
+    return min(Config.JOB_RETRY_MAX_SECONDS,
+               Config.JOB_RETRY_BASE_SECONDS * (2 ** max(attempt - 1, 0)))
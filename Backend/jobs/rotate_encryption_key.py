@@ -0,0 +1,64 @@
+"""
+Background job: Re-encrypt stored Plaid access tokens under the current key.
+Run after prepending a new key to PLAID_ENCRYPTION_KEY; once it reports
+no remaining old-key tokens, the old key can be removed.
+
+Walks plaid_items in id order, one short transaction per chunk, so the
+table is never locked as a whole and syncs keep running. Each row is only
+rewritten if its ciphertext is unchanged since it was read (a concurrent
+re-link wins).
+
+Usage (cron / CLI):
+    from jobs.rotate_encryption_key import rotate_all_tokens
+    rotate_all_tokens()
+"""
+from cryptography.fernet import InvalidToken
+
+from models import plaid_item as item_model
+from utils.db import db_scope
+from utils.encryption import needs_rotation, rotate_token
+from utils.logger import get_logger
+
+log = get_logger("jobs.rotate_encryption_key")
+
+
+def rotate_all_tokens(chunk_size: int = 500) -> dict:
+    """
+    Re-encrypt every token not already under the current key.
+
+    Returns:
+        { "scanned": int, "rotated": int, "conflicts": int, "errors": int }
+    """
+    log.info("Starting token re-encryption job")
+
+    scanned = rotated = conflicts = errors = 0
+    last_id = 0
+
+    with db_scope("job:rotate_encryption_key"):
+        while True:
+            rows = item_model.find_token_chunk(last_id, chunk_size)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            updates = []
+            for item_db_id, token in rows:
+                try:
+                    if needs_rotation(token):
+                        updates.append((item_db_id, token, rotate_token(token)))
+                except InvalidToken:
+                    log.error("Token not decryptable with any configured key",
+                              extra={"context": {"plaid_item_id": item_db_id}})
+                    errors += 1
+
+            written = item_model.update_tokens_many(updates)
+            rotated += written
+            conflicts += len(updates) - written
+
+    log.info(
+        "Token re-encryption job finished",
+        extra={"context": {"scanned": scanned, "rotated": rotated,
+                           "conflicts": conflicts, "errors": errors}},
+    )
+    return {"scanned": scanned, "rotated": rotated, "conflicts": conflicts, "errors": errors}
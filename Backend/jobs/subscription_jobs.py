@@ -5,73 +5,57 @@ Idempotent — re-running updates existing records, never duplicates.
 
 Usage (cron / CLI):
     from jobs.subscription_jobs import detect_all_users_subscriptions
-    detect_all_users_subscriptions()
+    detect_all_users_subscriptions()     # queue one item per changed user
+    python -m jobs.worker                # process them (any number of nodes)
+    python -m jobs subscriptions         # or run them now on a process pool
+    python -m jobs subscriptions --full  # every user, changed or not
 
 Recommended schedule: Daily at 03:00 UTC
+Nightly, prefer jobs/pipeline.py, which runs this stage per user right
+after that user's sync instead of relying on the clock.
 """
-from models import recurring_merchant as rm_model
+from jobs.queue import changed_users, enqueue, find_users, handler
+from models import user_activity as activity_model
 from services import subscription_service
 from utils.logger import get_logger
 
 log = get_logger("jobs.subscription_detection")
 
+JOB_TYPE = "subscriptions"
 
-def detect_all_users_subscriptions():
+
+def detect_all_users_subscriptions(full: bool = False):
     """
-    Iterate all users with transactions and run subscription detection.
-    Failures for one user do not block others.
+    Queue subscription detection for every user whose transactions changed
+    since their last detection (every user with transactions if full).
 
     Returns:
-        { "processed": int, "errors": int, "total_detected": int }
+        { "users": int, "enqueued": int }
     """
     log.info("Starting subscription detection job")
 
-    user_ids = rm_model.find_distinct_user_ids()
+    user_ids = find_users(JOB_TYPE, full=full)
     log.info(
         f"Found {len(user_ids)} users with transactions",
         extra={"context": {"user_count": len(user_ids)}},
     )
 
-    processed = 0
-    errors = 0
-    total_detected = 0
+    return {"users": len(user_ids), "enqueued": enqueue(JOB_TYPE, user_ids)}
 
-    for uid in user_ids:
-        try:
-            stats = subscription_service.detect_subscriptions(
-                user_id=uid,
-                account_id="all",
-            )
-            log.info(
-                "Subscriptions detected for user",
-                extra={"context": {
-                    "user_id": uid,
-                    "detected": stats["detected"],
-                    "elapsed_ms": stats["elapsed_ms"],
-                }},
-            )
-            processed += 1
-            total_detected += stats["detected"]
-        except Exception as e:
-            log.error(
-                f"Subscription detection failed for user {uid}: {e}",
-                extra={"context": {"user_id": uid}},
-                exc_info=True,
-            )
-            errors += 1
 
+@handler(JOB_TYPE, users=activity_model.iter_user_ids, changed=changed_users)
+def detect_user_subscriptions(user_id: int, payload: dict) -> dict:
+    """Run subscription detection for one user (all accounts)."""
+    stats = subscription_service.detect_subscriptions(
+        user_id=user_id,
+        account_id="all",
+    )
     log.info(
-        "Subscription detection job finished",
+        "Subscriptions detected for user",
         extra={"context": {
-            "processed": processed,
-            "errors": errors,
-            "total_detected": total_detected,
-            "total_users": len(user_ids),
+            "user_id": user_id,
+            "detected": stats["detected"],
+            "elapsed_ms": stats["elapsed_ms"],
         }},
     )
-
-    return {
-        "processed": processed,
-        "errors": errors,
-        "total_detected": total_detected,
-    }
+    return {"detected": stats["detected"]}
@@ -1,52 +1,52 @@
 """
 Background job: Sync transactions for all users.
 Can be invoked by a cron scheduler, Celery task, or manual trigger.
-Iterates over every user's plaid_items and runs incremental sync.
+Queues one item per user with linked Plaid items; workers
+(python -m jobs.worker) run the incremental sync for each, or run it
+directly across a process pool with `python -m jobs plaid_sync`.
+
+Plaid webhooks queue plaid_webhook_sync items for just the items that
+changed (services.plaid_webhook_service); the same workers run them.
 """
-from models import plaid_item as item_model
-from services import plaid_service
-from utils.db import get_db
+from functools import partial
+
+from jobs.queue import enqueue, find_users, handler
+from models import user_activity as activity_model
+from services import plaid_service, plaid_webhook_service
 from utils.logger import get_logger
 
 log = get_logger("jobs.sync_transactions")
 
+JOB_TYPE = "plaid_sync"
+
 
 def sync_all_users():
     """
-    Fetch all distinct user IDs that have linked Plaid items
-    and run a transaction sync for each.
+    Page through the user IDs that have linked Plaid items
+    and queue a transaction sync for each.
     Designed for scheduled background execution.
     """
     log.info("Starting bulk transaction sync job")
 
-    with get_db() as (conn, cur):
-        cur.execute("SELECT DISTINCT user_id FROM plaid_items")
-        user_rows = cur.fetchall()
-
-    user_ids = [row[0] for row in user_rows]
+    user_ids = find_users(JOB_TYPE)
     log.info(f"Found {len(user_ids)} users with linked accounts")
 
-    success_count = 0
-    error_count = 0
-
-    for uid in user_ids:
-        try:
-            result = plaid_service.sync_transactions(uid)
-            log.info(
-                "User sync complete",
-                extra={"context": {"user_id": uid, **result}},
-            )
-            success_count += 1
-        except Exception as e:
-            log.error(
-                f"Sync failed for user {uid}: {e}",
-                extra={"context": {"user_id": uid}},
-            )
-            error_count += 1
+    return {"users": len(user_ids), "enqueued": enqueue(JOB_TYPE, user_ids)}
+
 
+@handler(JOB_TYPE, users=partial(activity_model.iter_user_ids, "plaid_items"))
+def sync_user(user_id: int, payload: dict) -> dict:
+    """Incremental sync of every Plaid item the user has linked."""
+    result = plaid_service.sync_transactions(user_id)
     log.info(
-        "Bulk sync job finished",
-        extra={"context": {"success": success_count, "errors": error_count}},
+        "User sync complete",
+        extra={"context": {"user_id": user_id, **result}},
     )
+    return {k: result[k] for k in ("added", "modified", "removed")}
+
 
-    return {"synced": success_count, "errors": error_count}
+@handler(plaid_webhook_service.SYNC_JOB_TYPE,
+         users=partial(activity_model.iter_user_ids, "plaid_items"))
+def sync_webhook_items(user_id: int, payload: dict) -> dict:
+    """Sync the items named by webhooks (payload["item_ids"]), or all of them."""
+    return plaid_webhook_service.sync_items(user_id, payload.get("item_ids"))
@@ -5,73 +5,112 @@ Idempotent — re-running updates existing reports, never duplicates.
 
 Now uses the generalized time-range engine (writes to time_range_reports).
 
+Two modes:
+  * per-user items on the job queue (one report per user per handler run)
+  * bulk: generate_all_users_weekly_reports_bulk() aggregates chunks of
+    users in a handful of set-based queries and bulk-upserts their
+    reports (all-accounts and per-account), in one process
+
 Usage (cron / CLI):
     from jobs.weekly_jobs import generate_all_users_weekly_reports
-    generate_all_users_weekly_reports()
+    generate_all_users_weekly_reports()  # queue one item per changed user
+    python -m jobs.worker                # process them (any number of nodes)
+    python -m jobs weekly_reports        # or run them now on a process pool
+
+    from jobs.weekly_jobs import generate_all_users_weekly_reports_bulk
+    generate_all_users_weekly_reports_bulk()   # set-based, chunk by chunk
 
 Recommended schedule: Monday 02:00 UTC (captures complete prior week)
 """
-from models import time_range_report as report_model
+import time
+from functools import partial
+
+from jobs.queue import changed_users, enqueue, find_users, handler, user_chunks
+from models import user_activity as activity_model
 from services import insights_service
+from utils.db import db_scope
 from utils.logger import get_logger
 
 log = get_logger("jobs.weekly_reports")
 
+JOB_TYPE = "weekly_reports"
+
 
-def generate_all_users_weekly_reports():
+def generate_all_users_weekly_reports(full: bool = False):
     """
-    Iterate all users who have transactions and generate
-    a weekly report for each (all-accounts aggregate).
-    Failures for one user do not block others.
+    Queue a weekly report (all-accounts aggregate) for every user whose
+    transactions changed since their last report or who has no report
+    run this week yet (every user who has transactions if full).
 
     Returns:
-        { "generated": int, "errors": int }
+        { "users": int, "enqueued": int }
     """
     log.info("Starting weekly report generation job")
 
-    # Single query — no N+1
-    user_ids = report_model.find_distinct_user_ids()
+    # Single query — no N+1; unchanged users are skipped unless full
+    user_ids = find_users(JOB_TYPE, full=full)
     log.info(
         f"Found {len(user_ids)} users with transactions",
         extra={"context": {"user_count": len(user_ids)}},
     )
 
-    success_count = 0
-    error_count = 0
+    return {"users": len(user_ids), "enqueued": enqueue(JOB_TYPE, user_ids)}
 
-    for uid in user_ids:
-        try:
-            report = insights_service.get_time_range_report(
-                user_id=uid,
-                range_type="week",
-                account_id=None,
-                offset=0,
+
+def generate_all_users_weekly_reports_bulk(full: bool = False, chunk_size: int = 1000,
+                                           per_account: bool = True):
+    """
+    Generate the current week's reports for every user whose transactions
+    changed or who wasn't run this week yet (every user with transactions
+    if full), chunk_size users per set-based pass. Each chunk is committed
+    and watermarked on its own, so an interrupted run resumes with the
+    users it hadn't reached.
+
+    Returns:
+        { "users": int, "reports": int, "chunks": int, "elapsed_s": float }
+    """
+    log.info("Starting bulk weekly report generation job")
+    start = time.monotonic()
+
+    with db_scope(f"job:{JOB_TYPE}:bulk"):
+        users = reports = chunks = 0
+        for chunk in user_chunks(JOB_TYPE, full=full, size=chunk_size):
+            versions = activity_model.get_versions(chunk)
+            result = insights_service.generate_reports_many(
+                chunk, range_type="week", offset=0, per_account=per_account
             )
+            activity_model.record_success_many(JOB_TYPE, versions)
+            users += len(chunk)
+            reports += result["reports"]
+            chunks += 1
             log.info(
-                "Weekly report generated for user",
-                extra={"context": {
-                    "user_id": uid,
-                    "total_spent": report["total_spent"],
-                    "total_income": report["total_income"],
-                    "volatility_score": report["volatility_score"],
-                }},
+                "Weekly report chunk done",
+                extra={"context": {"done": users, "reports": result["reports"]}},
             )
-            success_count += 1
-        except Exception as e:
-            log.error(
-                f"Weekly report failed for user {uid}: {e}",
-                extra={"context": {"user_id": uid}},
-                exc_info=True,
-            )
-            error_count += 1
 
+    summary = {"users": users, "reports": reports, "chunks": chunks,
+               "elapsed_s": round(time.monotonic() - start, 2)}
+    log.info("Bulk weekly report generation finished", extra={"context": summary})
+    return summary
+
+
+@handler(JOB_TYPE, users=activity_model.iter_user_ids,
+         changed=partial(changed_users, period="week"))
+def generate_user_weekly_report(user_id: int, payload: dict) -> dict:
+    """Generate the current weekly report for one user."""
+    report = insights_service.get_time_range_report(
+        user_id=user_id,
+        range_type="week",
+        account_id=None,
+        offset=0,
+    )
     log.info(
-        "Weekly report generation job finished",
+        "Weekly report generated for user",
         extra={"context": {
-            "generated": success_count,
-            "errors": error_count,
-            "total_users": len(user_ids),
+            "user_id": user_id,
+            "total_spent": report["total_spent"],
+            "total_income": report["total_income"],
+            "volatility_score": report["volatility_score"],
         }},
     )
-
-    return {"generated": success_count, "errors": error_count}
+    return {"total_spent": report["total_spent"], "total_income": report["total_income"]}
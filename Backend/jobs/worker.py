@@ -0,0 +1,53 @@
+"""
+Job worker entry point. Run any number of these, on any number of machines:
+
+    python -m jobs.worker                         # all job types, until SIGTERM
+    python -m jobs.worker --types plaid_sync --threads 8
+    python -m jobs.worker --drain                 # exit once the queue is empty
+
+Items are queued by the enqueue functions in the jobs.* modules, e.g.
+jobs.subscription_jobs.detect_all_users_subscriptions().
+"""
+import argparse
+import signal
+
+from extensions import create_plaid_client
+from jobs import queue
+from jobs import (  # noqa: F401 — register handlers
+    cashflow_jobs, counter_jobs, health_score_jobs, pipeline, subscription_jobs,
+    sync_transactions, weekly_jobs,
+)
+from services import plaid_service
+from utils.db import init_pool, close_pool
+from utils.encryption import init_fernet
+
+
+def bootstrap(plaid_max_timeout: float = None):
+    """Initialise what the handlers need outside the Flask app."""
+    init_pool()
+    init_fernet()
+    plaid_service.init_plaid_client(create_plaid_client(max_timeout=plaid_max_timeout))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--types", nargs="+", choices=queue.registered_types(),
+                        help="job types to process (default: all)")
+    parser.add_argument("--threads", type=int, help="concurrent items per process")
+    parser.add_argument("--drain", action="store_true",
+                        help="exit when no items are ready instead of polling")
+    args = parser.parse_args(argv)
+
+    bootstrap()
+    worker = queue.Worker(job_types=args.types, threads=args.threads)
+
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    try:
+        worker.run(drain=args.drain)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Account model — SQL operations for the accounts table.
+Local copy of Plaid accounts + balances, refreshed by sync, link and
+stale reads of GET /plaid/accounts.
+"""
+from utils.db import bulk_upsert, get_db
+
+
+_UPSERT_COLUMNS = [
+    "user_id", "item_id", "account_id", "name", "official_name",
+    "type", "subtype", "mask",
+    "current_balance", "available_balance", "currency",
+]
+
+_SELECT_COLS = """
+    a.item_id, p.institution_name, a.account_id, a.name, a.official_name,
+    a.type, a.subtype, a.mask, a.current_balance, a.available_balance,
+    a.currency, a.fetched_at, EXTRACT(EPOCH FROM NOW() - a.fetched_at)
+"""
+
+
+def upsert_many(user_id: int, item_id: str, accounts: list) -> int:
+    """
+    Store a fresh accounts_get result for one item and stamp fetched_at.
+    Accounts no longer returned for the item are removed. Returns rows written.
+    """
+    rows = [
+        (user_id, item_id, a["account_id"], a["name"], a["official_name"],
+         a["type"], a["subtype"], a["mask"],
+         a["current_balance"], a["available_balance"], a["currency"])
+        for a in accounts
+    ]
+    update = {col: f"EXCLUDED.{col}" for col in _UPSERT_COLUMNS[3:]}
+    update["fetched_at"] = "NOW()"
+
+    with get_db() as (conn, cur):
+        written = bulk_upsert(
+            cur, "accounts", _UPSERT_COLUMNS, rows,
+            conflict="(account_id)",
+            update=update,
+            defaults={"fetched_at": "NOW()"},
+        )
+        cur.execute(
+            "DELETE FROM accounts WHERE item_id = %s AND NOT (account_id = ANY(%s))",
+            (item_id, [a["account_id"] for a in accounts]),
+        )
+        return written
+
+
+def find_by_user(user_id: int) -> list:
+    """All cached accounts for a user, with age_seconds since the last fetch."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            SELECT {_SELECT_COLS}
+            FROM accounts a
+            JOIN plaid_items p ON p.item_id = a.item_id
+            WHERE a.user_id = %s
+            ORDER BY p.institution_name, a.name
+            """,
+            (user_id,),
+        )
+        return [_row_to_dict(r) for r in cur.fetchall()]
+
+
+def find_account_ids_by_item(item_id: str) -> list:
+    """Return the plaid account IDs cached for an item."""
+    with get_db() as (conn, cur):
+        cur.execute("SELECT account_id FROM accounts WHERE item_id = %s", (item_id,))
+        return [r[0] for r in cur.fetchall()]
+
+
+def fetch_current_balance(user_id: int, account_id: str = "all"):
+    """
+    Server-side current balance: one account's balance, or the sum of all
+    depository accounts for "all". None when no balance is cached.
+    """
+    if account_id and account_id != "all":
+        clause, params = " AND account_id = %s", [user_id, account_id]
+    else:
+        clause, params = " AND type = 'depository'", [user_id]
+
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute(
+            f"""
+            SELECT SUM(current_balance)
+            FROM accounts
+            WHERE user_id = %s AND current_balance IS NOT NULL
+            {clause}
+            """,
+            params,
+        )
+        total = cur.fetchone()[0]
+    return float(total) if total is not None else None
+
+
+def fetch_current_balances(user_ids: list) -> dict:
+    """
+    Bulk variant of fetch_current_balance(user_id, "all"):
+    {user_id: summed depository balance} (users without one are omitted).
+    """
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute(
+            """
+            SELECT user_id, SUM(current_balance)
+            FROM accounts
+            WHERE user_id = ANY(%s) AND current_balance IS NOT NULL
+              AND type = 'depository'
+            GROUP BY user_id
+            """,
+            (list(user_ids),),
+        )
+        return {row[0]: float(row[1]) for row in cur.fetchall()}
+
+
+def delete_by_item_id(item_id: str) -> int:
+    """Remove an item's cached accounts. Returns rows deleted."""
+    with get_db() as (conn, cur):
+        cur.execute("DELETE FROM accounts WHERE item_id = %s", (item_id,))
+        return cur.rowcount
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _row_to_dict(row) -> dict:
+    return {
+        "item_id": row[0],
+        "institution_name": row[1],
+        "account_id": row[2],
+        "name": row[3],
+        "official_name": row[4] or "",
+        "type": row[5],
+        "subtype": row[6] or "",
+        "mask": row[7] or "",
+        "current_balance": float(row[8]) if row[8] is not None else None,
+        "available_balance": float(row[9]) if row[9] is not None else None,
+        "currency": row[10] or "USD",
+        "fetched_at": str(row[11]),
+        "age_seconds": float(row[12]),
+    }
@@ -7,7 +7,7 @@ Handles:
   * Querying cached forecasts
 """
 import json
-from utils.db import get_db
+from utils.db import bulk_upsert, get_db
 
 
 def _row_to_dict(row) -> dict:
@@ -46,7 +46,7 @@ def fetch_daily_spending_avg(user_id: int, account_id: str,
     """Average daily spending over the lookback period (excludes transfers)."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT COALESCE(SUM(ABS(amount)), 0)
@@ -69,7 +69,7 @@ def fetch_daily_income_avg(user_id: int, account_id: str,
     """Average daily income over the lookback period."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT COALESCE(SUM(amount), 0)
@@ -91,7 +91,7 @@ def fetch_spend_volatility(user_id: int, account_id: str,
     """Coefficient of variation for daily spending (0-100 scale)."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT date, COALESCE(SUM(ABS(amount)), 0) as daily_total
@@ -143,6 +143,23 @@ def find_forecast(user_id: int, account_id: str,
     return _row_to_dict(row) if row else None
 
 
+def find_forecasts(user_id: int, account_id: str,
+                   as_of_date: str, horizons: list) -> dict:
+    """Cached forecasts for several horizons in one query. Returns {horizon_days: dict}."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            SELECT {_SELECT_COLS}
+            FROM cashflow_forecasts
+            WHERE user_id = %s AND account_id = %s
+              AND as_of_date = %s AND horizon_days = ANY(%s)
+            """,
+            (user_id, account_id, as_of_date, list(horizons)),
+        )
+        rows = cur.fetchall()
+    return {row[4]: _row_to_dict(row) for row in rows}
+
+
 def upsert_forecast(user_id: int, account_id: str, as_of_date: str,
                      horizon_days: int, starting_balance: float,
                      projected_end_balance: float, min_projected_balance: float,
@@ -178,11 +195,35 @@ def upsert_forecast(user_id: int, account_id: str, as_of_date: str,
         return cur.fetchone()[0]
 
 
-def find_distinct_user_ids() -> list:
-    """All user IDs with transactions. For batch jobs."""
+_UPSERT_COLUMNS = [
+    "user_id", "account_id", "as_of_date", "horizon_days",
+    "starting_balance", "projected_end_balance", "min_projected_balance",
+    "risk_score", "projected_daily_balances", "drivers_json", "explanation_json",
+]
+
+
+def upsert_forecast_many(forecasts: list) -> int:
+    """
+    Bulk variant of upsert_forecast().
+    `forecasts` are dicts with the same keys as upsert_forecast()'s kwargs.
+    Returns rows written.
+    """
+    rows = [
+        (f["user_id"], f["account_id"], f["as_of_date"], f["horizon_days"],
+         f["starting_balance"], f["projected_end_balance"], f["min_projected_balance"],
+         f["risk_score"], json.dumps(f["projected_daily_balances"]),
+         json.dumps(f["drivers_json"]), json.dumps(f["explanation_json"]))
+        for f in forecasts
+    ]
+    update = {col: f"EXCLUDED.{col}" for col in _UPSERT_COLUMNS[4:]}
+    update["created_at"] = "NOW()"
     with get_db() as (conn, cur):
-        cur.execute("SELECT DISTINCT user_id FROM transactions")
-        return [row[0] for row in cur.fetchall()]
+        return bulk_upsert(
+            cur, "cashflow_forecasts", _UPSERT_COLUMNS, rows,
+            conflict="ON CONSTRAINT uq_cashflow_user_date_horizon",
+            update=update,
+            defaults={"created_at": "NOW()"},
+        )
 
 
 # ──────────────────────────────────────────────
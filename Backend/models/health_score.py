@@ -2,13 +2,14 @@
 HealthScore model — SQL operations for health_scores table.
 
 Handles:
-  * Fetching raw financial metrics (income, spending, volatility)
+  * Fetching raw financial metrics (income, spending, volatility),
+    per user or for many users at once (batch jobs)
   * Querying cached health scores
   * Upserting computed scores
 """
 import json
 import math
-from utils.db import get_db
+from utils.db import bulk_upsert, get_db
 
 
 # ──────────────────────────────────────────────
@@ -52,7 +53,7 @@ def fetch_total_income(user_id: int, account_id: str,
     """Total income (positive amounts) over the analysis window."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT COALESCE(SUM(amount), 0)
@@ -73,7 +74,7 @@ def fetch_total_spending(user_id: int, account_id: str,
     Excludes transfers."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT COALESCE(SUM(ABS(amount)), 0)
@@ -95,7 +96,7 @@ def fetch_daily_spending_stddev(user_id: int, account_id: str,
     Returns the coefficient of variation (stddev/mean) as a 0-1 ratio."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT date, COALESCE(SUM(ABS(amount)), 0) AS daily_total
@@ -131,7 +132,7 @@ def fetch_daily_spending_avg(user_id: int, account_id: str,
     """Average daily spending over the lookback period."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT COALESCE(SUM(ABS(amount)), 0)
@@ -158,7 +159,7 @@ def fetch_monthly_recurring_total(user_id: int, account_id: str) -> float:
         acct_clause = " AND account_id = %s"
         acct_params = [account_id]
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT cadence, avg_amount
@@ -173,17 +174,7 @@ def fetch_monthly_recurring_total(user_id: int, account_id: str) -> float:
 
     monthly_total = 0.0
     for cadence, avg_amount in rows:
-        amt = float(avg_amount) if avg_amount else 0.0
-        if cadence == "weekly":
-            monthly_total += amt * 4.33
-        elif cadence == "biweekly":
-            monthly_total += amt * 2.17
-        elif cadence == "monthly":
-            monthly_total += amt
-        elif cadence == "quarterly":
-            monthly_total += amt / 3.0
-        else:
-            monthly_total += amt  # assume monthly
+        monthly_total += _monthly_amount(cadence, avg_amount)
 
     return round(monthly_total, 2)
 
@@ -193,7 +184,7 @@ def fetch_transaction_count(user_id: int, account_id: str,
     """Count of transactions in the analysis window."""
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT COUNT(*)
@@ -207,6 +198,94 @@ def fetch_transaction_count(user_id: int, account_id: str,
         return cur.fetchone()[0]
 
 
+# ──────────────────────────────────────────────
+# Bulk Data Queries (all accounts, many users)
+# ──────────────────────────────────────────────
+
+def fetch_metric_inputs_many(user_ids: list, windows: list) -> list:
+    """
+    The window aggregates above for many users × analysis windows at once.
+    Returns (user_id, window_days, total_income, total_spending,
+    recent_spending, transaction_count) for each pair with transactions;
+    recent_spending covers the last min(window, 30) days, the
+    fetch_daily_spending_avg lookback.
+    """
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute(
+            """
+            SELECT t.user_id, w.days,
+                   COALESCE(SUM(t.amount) FILTER (WHERE t.amount > 0), 0),
+                   COALESCE(SUM(ABS(t.amount)) FILTER (
+                       WHERE t.amount < 0
+                         AND COALESCE(t.category, '') NOT ILIKE '%%transfer%%'
+                   ), 0),
+                   COALESCE(SUM(ABS(t.amount)) FILTER (
+                       WHERE t.amount < 0
+                         AND COALESCE(t.category, '') NOT ILIKE '%%transfer%%'
+                         AND t.date >= CURRENT_DATE - make_interval(days => LEAST(w.days, 30))
+                   ), 0),
+                   COUNT(*)
+            FROM unnest(%s::integer[]) AS w(days)
+            JOIN transactions t
+              ON t.date >= CURRENT_DATE - make_interval(days => w.days)
+            WHERE t.user_id = ANY(%s)
+            GROUP BY t.user_id, w.days
+            """,
+            (list(windows), list(user_ids)),
+        )
+        return [
+            (r[0], r[1], float(r[2]), float(r[3]), float(r[4]), r[5])
+            for r in cur.fetchall()
+        ]
+
+
+def fetch_daily_spending_many(user_ids: list, window_days: int) -> list:
+    """
+    Daily spending totals for many users over the last window_days:
+    (user_id, age_days, daily_total), where age_days = CURRENT_DATE - date.
+    Narrower windows are the rows with age_days <= their length. Ordered
+    by date within each user, like fetch_daily_spending_stddev().
+    """
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute(
+            """
+            SELECT user_id, CURRENT_DATE - date, SUM(ABS(amount))
+            FROM transactions
+            WHERE user_id = ANY(%s)
+              AND amount < 0
+              AND date >= CURRENT_DATE - make_interval(days => %s)
+              AND COALESCE(category, '') NOT ILIKE '%%transfer%%'
+            GROUP BY user_id, date
+            ORDER BY user_id, date
+            """,
+            (list(user_ids), int(window_days)),
+        )
+        return [(r[0], r[1], float(r[2])) for r in cur.fetchall()]
+
+
+def fetch_monthly_recurring_totals(user_ids: list) -> dict:
+    """
+    Bulk variant of fetch_monthly_recurring_total() for all accounts:
+    {user_id: monthly_total} (users without recurring merchants are omitted).
+    """
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute(
+            """
+            SELECT user_id, cadence, avg_amount
+            FROM recurring_merchants
+            WHERE user_id = ANY(%s)
+              AND confidence_score >= 40
+            """,
+            (list(user_ids),),
+        )
+        rows = cur.fetchall()
+
+    totals = {}
+    for user_id, cadence, avg_amount in rows:
+        totals[user_id] = totals.get(user_id, 0.0) + _monthly_amount(cadence, avg_amount)
+    return {user_id: round(total, 2) for user_id, total in totals.items()}
+
+
 # ──────────────────────────────────────────────
 # CRUD
 # ──────────────────────────────────────────────
@@ -264,10 +343,56 @@ def upsert_score(user_id: int, account_id: str, as_of_date: str,
         return cur.fetchone()[0]
 
 
+_UPSERT_COLUMNS = [
+    "user_id", "account_id", "as_of_date", "analysis_window_days",
+    "health_score", "savings_ratio", "volatility_score",
+    "recurring_burden", "cash_buffer_days",
+    "component_scores", "explanation_json",
+]
+
+
+def upsert_score_many(scores: list) -> int:
+    """
+    Bulk variant of upsert_score().
+    `scores` are dicts with the same keys as upsert_score()'s kwargs.
+    Returns rows written.
+    """
+    rows = [
+        (s["user_id"], s["account_id"], s["as_of_date"], s["analysis_window_days"],
+         s["health_score"], s["savings_ratio"], s["volatility_score"],
+         s["recurring_burden"], s["cash_buffer_days"],
+         json.dumps(s["component_scores"]), json.dumps(s["explanation_json"]))
+        for s in scores
+    ]
+    update = {col: f"EXCLUDED.{col}" for col in _UPSERT_COLUMNS[4:]}
+    update["updated_at"] = "NOW()"
+    with get_db() as (conn, cur):
+        return bulk_upsert(
+            cur, "health_scores", _UPSERT_COLUMNS, rows,
+            conflict="ON CONSTRAINT uq_health_score_user_date_window",
+            update=update,
+            defaults={"created_at": "NOW()", "updated_at": "NOW()"},
+        )
+
+
 # ──────────────────────────────────────────────
 # Private Helpers
 # ──────────────────────────────────────────────
 
+def _monthly_amount(cadence: str, avg_amount) -> float:
+    """A recurring merchant's average charge, normalized to monthly."""
+    amt = float(avg_amount) if avg_amount else 0.0
+    if cadence == "weekly":
+        return amt * 4.33
+    elif cadence == "biweekly":
+        return amt * 2.17
+    elif cadence == "monthly":
+        return amt
+    elif cadence == "quarterly":
+        return amt / 3.0
+    return amt  # assume monthly
+
+
 def _account_filter(account_id: str):
     if account_id and account_id != "all":
         return " AND plaid_account_id = %s", [account_id]
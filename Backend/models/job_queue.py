@@ -0,0 +1,273 @@
+"""
+JobQueue model — SQL operations for the job_queue table.
+One row per (job_type, user_id) work item, leased by workers with
+FOR UPDATE SKIP LOCKED so any number of them can drain the queue.
+"""
+import json
+from utils.db import get_db
+
+
+_SELECT_COLS = """
+    id, job_type, user_id, payload, status, attempts, max_attempts,
+    run_after, leased_until, worker_id, result, last_error,
+    created_at, started_at, finished_at
+"""
+
+_ACTIVE = "('queued', 'running')"
+
+
+def enqueue_many(job_type: str, user_ids: list, payload: dict = None,
+                 max_attempts: int = 5) -> int:
+    """
+    Queue one item per user. Users that already have a queued or running
+    item of this type are skipped. Returns the number of rows inserted.
+    """
+    if not user_ids:
+        return 0
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            INSERT INTO job_queue (job_type, user_id, payload, max_attempts)
+            SELECT %s, uid, %s, %s FROM unnest(%s::integer[]) AS uid
+            ON CONFLICT (job_type, user_id) WHERE status IN {_ACTIVE} DO NOTHING
+            """,
+            (job_type, json.dumps(payload or {}), max_attempts, list(user_ids)),
+        )
+        return cur.rowcount
+
+
+def enqueue_debounced(job_type: str, user_id: int, key: str, value,
+                      delay_seconds: float, max_attempts: int = 5) -> bool:
+    """
+    Add `value` to the `key` list in the payload of the user's pending item
+    of this type, creating one that runs after `delay_seconds` if there is
+    none. A queued item absorbs the value; a running one records it under
+    payload["follow_up"], which complete() turns into one more run.
+    Returns True if a new item was created.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            INSERT INTO job_queue (job_type, user_id, payload, run_after, max_attempts)
+            VALUES (%s, %s, %s, NOW() + make_interval(secs => %s), %s)
+            ON CONFLICT (job_type, user_id) WHERE status IN {_ACTIVE} DO NOTHING
+            """,
+            (job_type, user_id, json.dumps({key: [value]}), delay_seconds, max_attempts),
+        )
+        if cur.rowcount:
+            return True
+
+        cur.execute(
+            f"""
+            SELECT id, status, payload FROM job_queue
+            WHERE job_type = %s AND user_id = %s AND status IN {_ACTIVE}
+            FOR UPDATE
+            """,
+            (job_type, user_id),
+        )
+        row = cur.fetchone()
+        if row:
+            job_id, status, payload = row
+            target = payload if status == "queued" else payload.setdefault("follow_up", {})
+            values = target.setdefault(key, [])
+            if value not in values:
+                values.append(value)
+            cur.execute("UPDATE job_queue SET payload = %s WHERE id = %s",
+                        (json.dumps(payload), job_id))
+            return False
+
+    # The active item finished between our INSERT and SELECT — try again
+    return enqueue_debounced(job_type, user_id, key, value, delay_seconds, max_attempts)
+
+
+def lease(worker_id: str, job_types: list, limit: int, lease_seconds: int) -> list:
+    """
+    Claim up to `limit` ready items for this worker.
+
+    Ready means queued with run_after passed, or running with an expired
+    lease (its worker died). Rows locked by another worker's lease query
+    are skipped rather than waited on. Each lease counts as an attempt.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            UPDATE job_queue q
+            SET status = 'running', attempts = q.attempts + 1,
+                leased_until = NOW() + make_interval(secs => %s),
+                worker_id = %s, started_at = NOW(), last_error = CASE
+                    WHEN q.status = 'running' THEN 'Lease expired' ELSE q.last_error END
+            WHERE q.id IN (
+                SELECT id FROM job_queue
+                WHERE job_type = ANY(%s)
+                AND ((status = 'queued' AND run_after <= NOW())
+                     OR (status = 'running' AND leased_until < NOW()
+                         AND attempts < max_attempts))
+                ORDER BY run_after, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {_prefixed("q")}
+            """,
+            (lease_seconds, worker_id, list(job_types), limit),
+        )
+        return [_row_to_dict(r) for r in cur.fetchall()]
+
+
+def extend_leases(worker_id: str, job_ids: list, lease_seconds: int) -> int:
+    """Heartbeat: push out the lease of items this worker is still running."""
+    if not job_ids:
+        return 0
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET leased_until = NOW() + make_interval(secs => %s)
+            WHERE id = ANY(%s) AND worker_id = %s AND status = 'running'
+            """,
+            (lease_seconds, list(job_ids), worker_id),
+        )
+        return cur.rowcount
+
+
+def complete(job_id: int, worker_id: str, result: dict = None) -> bool:
+    """
+    Mark an item succeeded. False if the lease was lost to another worker
+    (the other run's outcome stands).
+    An item with a payload["follow_up"] (see enqueue_debounced) is queued
+    again right away with that as its payload, and a fresh set of attempts.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET status = CASE WHEN payload ? 'follow_up' THEN 'queued' ELSE 'succeeded' END,
+                attempts = CASE WHEN payload ? 'follow_up' THEN 0 ELSE attempts END,
+                run_after = CASE WHEN payload ? 'follow_up' THEN NOW() ELSE run_after END,
+                finished_at = CASE WHEN payload ? 'follow_up' THEN NULL ELSE NOW() END,
+                payload = COALESCE(payload -> 'follow_up', payload),
+                result = %s, last_error = NULL, leased_until = NULL
+            WHERE id = %s AND worker_id = %s AND status = 'running'
+            """,
+            (json.dumps(result) if result is not None else None, job_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+
+def fail(job_id: int, worker_id: str, error: str, retry_delay_seconds: float) -> str:
+    """
+    Record a failed attempt. The item is re-queued after `retry_delay_seconds`
+    or, once attempts reach max_attempts, dead-lettered.
+    Returns the new status, or None if the lease was lost.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+                run_after = NOW() + make_interval(secs => %s),
+                last_error = %s, leased_until = NULL,
+                finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END
+            WHERE id = %s AND worker_id = %s AND status = 'running'
+            RETURNING status
+            """,
+            (retry_delay_seconds, error[:2000], job_id, worker_id),
+        )
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def dead_letter_expired() -> int:
+    """Dead-letter running items whose lease expired on their last attempt."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET status = 'dead', leased_until = NULL, finished_at = NOW(),
+                last_error = 'Lease expired on final attempt'
+            WHERE status = 'running' AND leased_until < NOW()
+            AND attempts >= max_attempts
+            """
+        )
+        return cur.rowcount
+
+
+def requeue_dead(job_type: str) -> int:
+    """Give dead-lettered items of a type a fresh set of attempts."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            UPDATE job_queue d
+            SET status = 'queued', attempts = 0, run_after = NOW(), finished_at = NULL
+            WHERE d.job_type = %s AND d.status = 'dead'
+            AND NOT EXISTS (
+                SELECT 1 FROM job_queue a
+                WHERE a.job_type = d.job_type AND a.user_id = d.user_id
+                AND a.status IN {_ACTIVE}
+            )
+            """,
+            (job_type,),
+        )
+        return cur.rowcount
+
+
+def purge_finished(older_than_days: int) -> int:
+    """Delete succeeded items older than the retention window."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            DELETE FROM job_queue
+            WHERE status = 'succeeded'
+            AND finished_at < NOW() - make_interval(days => %s)
+            """,
+            (older_than_days,),
+        )
+        return cur.rowcount
+
+
+def count_by_status(job_types: list = None) -> dict:
+    """{job_type: {status: count}} for progress reporting."""
+    with get_db(readonly=True) as (conn, cur):
+        if job_types:
+            cur.execute(
+                """
+                SELECT job_type, status, COUNT(*) FROM job_queue
+                WHERE job_type = ANY(%s) GROUP BY job_type, status
+                """,
+                (list(job_types),),
+            )
+        else:
+            cur.execute("SELECT job_type, status, COUNT(*) FROM job_queue GROUP BY job_type, status")
+        rows = cur.fetchall()
+
+    counts = {}
+    for job_type, status, n in rows:
+        counts.setdefault(job_type, {})[status] = n
+    return counts
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _prefixed(alias: str) -> str:
+    return ", ".join(f"{alias}.{c.strip()}" for c in _SELECT_COLS.split(","))
+
+
+def _row_to_dict(row) -> dict:
+    return {
+        "id": row[0],
+        "job_type": row[1],
+        "user_id": row[2],
+        "payload": row[3] if isinstance(row[3], dict) else json.loads(row[3] or "{}"),
+        "status": row[4],
+        "attempts": row[5],
+        "max_attempts": row[6],
+        "run_after": str(row[7]),
+        "leased_until": str(row[8]) if row[8] else None,
+        "worker_id": row[9],
+        "result": row[10],
+        "last_error": row[11],
+        "created_at": str(row[12]),
+        "started_at": str(row[13]) if row[13] else None,
+        "finished_at": str(row[14]) if row[14] else None,
+    }
@@ -2,6 +2,7 @@
 PlaidItem model — all SQL operations for the plaid_items table.
 Handles linked bank account records with encrypted access tokens.
 """
+from psycopg2.extras import execute_values
 from utils.db import get_db
 
 
@@ -21,10 +22,13 @@ def find_by_user(user_id: int) -> list:
 
 
 def find_by_item_id(item_id: str):
-    """Return (id, user_id, access_token) for a given plaid item_id, or None."""
+    """Return (id, user_id, access_token, cursor, institution_name) for a plaid item_id, or None."""
     with get_db() as (conn, cur):
         cur.execute(
-            "SELECT id, user_id, access_token FROM plaid_items WHERE item_id = %s",
+            """
+            SELECT id, user_id, access_token, cursor, institution_name
+            FROM plaid_items WHERE item_id = %s
+            """,
             (item_id,),
         )
         return cur.fetchone()
@@ -79,6 +83,19 @@ def update_cursor(plaid_item_db_id: int, cursor: str):
         )
 
 
+def update_status(item_id: str, status: str, error_code: str = None):
+    """Record an item's health as reported by Plaid webhooks ('ok', 'error', ...)."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE plaid_items
+            SET status = %s, error_code = %s, status_updated_at = NOW(), updated_at = NOW()
+            WHERE item_id = %s
+            """,
+            (status, error_code, item_id),
+        )
+
+
 def delete_by_item_id_and_user(item_id: str, user_id: int) -> int:
     """Delete a plaid item record. Returns rows affected."""
     with get_db() as (conn, cur):
@@ -97,3 +114,39 @@ def find_tokens_for_accounts(user_id: int) -> list:
             (user_id,),
         )
         return cur.fetchall()
+
+
+def find_token_chunk(after_id: int, limit: int) -> list:
+    """Return [(id, access_token), ...] with id > after_id, in id order (keyset)."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT id, access_token FROM plaid_items
+            WHERE id > %s ORDER BY id LIMIT %s
+            """,
+            (after_id, limit),
+        )
+        return cur.fetchall()
+
+
+def update_tokens_many(rows: list) -> int:
+    """
+    Swap ciphertexts for [(id, old_token, new_token), ...] in one statement.
+    Rows whose token changed since it was read are left alone. Returns rows updated.
+    """
+    if not rows:
+        return 0
+    with get_db() as (conn, cur):
+        execute_values(
+            cur,
+            """
+            UPDATE plaid_items AS p
+            SET access_token = v.new_token, updated_at = NOW()
+            FROM (VALUES %s) AS v(id, old_token, new_token)
+            WHERE p.id = v.id AND p.access_token = v.old_token
+            """,
+            rows,
+            template="(%s::integer, %s, %s)",
+            page_size=len(rows),
+        )
+        return cur.rowcount
@@ -7,7 +7,7 @@ Handles:
   * Querying detected subscriptions for API responses
 """
 import json
-from utils.db import get_db
+from utils.db import bulk_upsert, get_db
 
 
 # ──────────────────────────────────────────────
@@ -66,7 +66,7 @@ def fetch_expense_transactions(user_id: int, account_id: str,
     """
     acct_clause, acct_params = _account_filter(account_id)
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         cur.execute(
             f"""
             SELECT id, description, ABS(amount) as amount, date, category
@@ -141,6 +141,46 @@ def upsert(user_id: int, account_id: str, merchant_key: str,
         return cur.fetchone()[0]
 
 
+_UPSERT_COLUMNS = [
+    "user_id", "account_id", "merchant_key", "merchant_display_name",
+    "cadence", "avg_amount", "amount_stddev", "amount_tolerance",
+    "last_charge_date", "next_expected_date",
+    "confidence_score", "sample_size",
+    "last_n_transactions", "explanation_json",
+]
+_UPDATE_COLUMNS = [
+    "merchant_display_name", "avg_amount", "amount_stddev", "amount_tolerance",
+    "last_charge_date", "next_expected_date", "confidence_score",
+    "sample_size", "last_n_transactions", "explanation_json",
+]
+
+
+def upsert_many(merchants: list) -> int:
+    """
+    Bulk variant of upsert().
+    `merchants` are dicts with the same keys as upsert()'s kwargs.
+    Returns rows written.
+    """
+    rows = [
+        (m["user_id"], m["account_id"], m["merchant_key"], m["merchant_display_name"],
+         m["cadence"], m["avg_amount"], m["amount_stddev"], m["amount_tolerance"],
+         str(m["last_charge_date"]) if m["last_charge_date"] else None,
+         str(m["next_expected_date"]) if m["next_expected_date"] else None,
+         m["confidence_score"], m["sample_size"],
+         json.dumps(m["last_n_transactions"]), json.dumps(m["explanation_json"]))
+        for m in merchants
+    ]
+    update = {col: f"EXCLUDED.{col}" for col in _UPDATE_COLUMNS}
+    update["updated_at"] = "NOW()"
+    with get_db() as (conn, cur):
+        return bulk_upsert(
+            cur, "recurring_merchants", _UPSERT_COLUMNS, rows,
+            conflict="ON CONSTRAINT uq_recurring_merchants_user_merchant",
+            update=update,
+            defaults={"created_at": "NOW()", "updated_at": "NOW()"},
+        )
+
+
 def find_by_user(user_id: int, account_id: str = "all",
                  min_confidence: float = 0) -> list:
     """Find all recurring merchants for a user, optionally filtered."""
@@ -230,10 +270,3 @@ def delete_stale(user_id: int, account_id: str, active_keys: list) -> int:
             [user_id, account_id] + active_keys,
         )
         return cur.rowcount
-
-
-def find_distinct_user_ids() -> list:
-    """All user IDs that have transactions. Used by batch jobs."""
-    with get_db() as (conn, cur):
-        cur.execute("SELECT DISTINCT user_id FROM transactions")
-        return [row[0] for row in cur.fetchall()]
@@ -0,0 +1,153 @@
+"""
+SyncJob model — SQL operations for the sync_jobs table.
+Tracks background Plaid syncs and their progress for polling clients.
+"""
+import json
+import uuid
+from utils.db import get_db
+
+
+_SELECT_COLS = """
+    id, user_id, trigger, status, pages, added, modified, removed,
+    items, error, created_at, started_at, finished_at
+"""
+
+_ACTIVE = "('queued', 'running')"
+
+
+def create_or_attach(user_id: int, trigger: str, stale_after_seconds: int,
+                     queued_max_seconds: int) -> tuple:
+    """
+    Create a queued job for the user, or return the one already active.
+    Returns (job dict, created).
+
+    Dead jobs are failed first: running jobs without a heartbeat for
+    `stale_after_seconds`, and jobs still queued `queued_max_seconds`
+    after creation (lost with their process). A queued job only waits
+    for a free runner, so its heartbeat age says nothing about it.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            UPDATE sync_jobs
+            SET status = 'failed', finished_at = NOW(),
+                error = CASE status WHEN 'running' THEN 'Sync worker stopped responding'
+                                    ELSE 'Sync job was never started' END
+            WHERE user_id = %s
+            AND ((status = 'running' AND heartbeat_at < NOW() - make_interval(secs => %s))
+                 OR (status = 'queued' AND created_at < NOW() - make_interval(secs => %s)))
+            """,
+            (user_id, stale_after_seconds, queued_max_seconds),
+        )
+        cur.execute(
+            f"""
+            INSERT INTO sync_jobs (id, user_id, trigger, status, created_at, heartbeat_at)
+            VALUES (%s, %s, %s, 'queued', NOW(), NOW())
+            ON CONFLICT (user_id) WHERE status IN {_ACTIVE} DO NOTHING
+            RETURNING {_SELECT_COLS}
+            """,
+            (uuid.uuid4().hex, user_id, trigger),
+        )
+        row = cur.fetchone()
+        if row:
+            return _row_to_dict(row), True
+
+        cur.execute(
+            f"SELECT {_SELECT_COLS} FROM sync_jobs WHERE user_id = %s AND status IN {_ACTIVE}",
+            (user_id,),
+        )
+        row = cur.fetchone()
+
+    if row is None:
+        # The active job finished between our INSERT and SELECT — try again
+        return create_or_attach(user_id, trigger, stale_after_seconds, queued_max_seconds)
+    return _row_to_dict(row), False
+
+
+def mark_running(job_id: str) -> bool:
+    """Start a queued job. False if it is no longer active (failed as dead meanwhile)."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            UPDATE sync_jobs SET status = 'running', started_at = NOW(), heartbeat_at = NOW()
+            WHERE id = %s AND status IN {_ACTIVE}
+            """,
+            (job_id,),
+        )
+        return cur.rowcount == 1
+
+
+def heartbeat(job_id: str) -> bool:
+    """Mark a running job alive. False once it is no longer running."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            "UPDATE sync_jobs SET heartbeat_at = NOW() WHERE id = %s AND status = 'running'",
+            (job_id,),
+        )
+        return cur.rowcount == 1
+
+
+def add_progress(job_id: str, pages: int, added: int, modified: int, removed: int) -> bool:
+    """
+    Increment progress counters (and the heartbeat) after a committed page.
+    False if the job is no longer active; the caller should abort.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            UPDATE sync_jobs
+            SET pages = pages + %s, added = added + %s,
+                modified = modified + %s, removed = removed + %s,
+                heartbeat_at = NOW()
+            WHERE id = %s AND status IN {_ACTIVE}
+            """,
+            (pages, added, modified, removed, job_id),
+        )
+        return cur.rowcount == 1
+
+
+def finish(job_id: str, status: str, items: list = None, error: str = None):
+    """Mark an active job succeeded / failed with its per-item results."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            UPDATE sync_jobs
+            SET status = %s, items = %s, error = %s,
+                finished_at = NOW(), heartbeat_at = NOW()
+            WHERE id = %s AND status IN {_ACTIVE}
+            """,
+            (status, json.dumps(items or []), error, job_id),
+        )
+
+
+def find_by_id(job_id: str, user_id: int):
+    """Return a job if it belongs to the user, or None."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"SELECT {_SELECT_COLS} FROM sync_jobs WHERE id = %s AND user_id = %s",
+            (job_id, user_id),
+        )
+        row = cur.fetchone()
+    return _row_to_dict(row) if row else None
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _row_to_dict(row) -> dict:
+    return {
+        "job_id": row[0],
+        "user_id": row[1],
+        "trigger": row[2],
+        "status": row[3],
+        "pages": row[4],
+        "added": row[5],
+        "modified": row[6],
+        "removed": row[7],
+        "items": row[8] if isinstance(row[8], list) else json.loads(row[8] or "[]"),
+        "error": row[9],
+        "created_at": str(row[10]),
+        "started_at": str(row[11]) if row[11] else None,
+        "finished_at": str(row[12]) if row[12] else None,
+    }
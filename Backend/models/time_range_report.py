@@ -8,21 +8,26 @@ Handles:
 
 Architecture note:
   All aggregation runs inside a single get_db() context (5 queries,
-  1 connection) to avoid N+1. The composite index on
+  1 connection) to avoid N+1. Batch jobs use aggregate_range_data_many(),
+  which runs the same 5 queries for a whole chunk of users at once. The composite index on
   transactions(user_id, date) accelerates every range scan.
+  Aggregation reads go to the read replica when one is configured.
 """
 import json
-from utils.db import get_db
+from utils.db import bulk_upsert, execute_prepared, get_db, prepare_filtered
 
 
 # ──────────────────────────────────────────────
 # Private Helpers
 # ──────────────────────────────────────────────
 
+_ACCOUNT_CLAUSE = " AND plaid_account_id = %s"
+
+
 def _account_filter(account_id: str):
     """Build optional plaid_account_id clause and params."""
     if account_id and account_id != "all":
-        return " AND plaid_account_id = %s", [account_id]
+        return _ACCOUNT_CLAUSE, [account_id]
     return "", []
 
 
@@ -59,6 +64,76 @@ _SELECT_COLS = """
 # Aggregation (read-only, single connection)
 # ──────────────────────────────────────────────
 
+# Prepared once per pooled connection; the account-filtered shape of each
+# query is a separate statement.
+_TOTALS = prepare_filtered(
+    "trr_totals",
+    """
+    SELECT
+        COALESCE(SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END), 0),
+        COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+        COALESCE(SUM(amount), 0),
+        COUNT(*)
+    FROM transactions
+    WHERE user_id = %s AND date >= %s AND date <= %s
+    {filter}
+    """,
+    _ACCOUNT_CLAUSE,
+)
+
+_PREV_SPENT = prepare_filtered(
+    "trr_prev_spent",
+    """
+    SELECT COALESCE(SUM(ABS(amount)), 0)
+    FROM transactions
+    WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
+    {filter}
+    """,
+    _ACCOUNT_CLAUSE,
+)
+
+_TOP_MERCHANTS = prepare_filtered(
+    "trr_top_merchants",
+    """
+    SELECT description, ROUND(SUM(ABS(amount))::numeric, 2) AS total
+    FROM transactions
+    WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
+    {filter}
+    GROUP BY description
+    ORDER BY total DESC, description
+    LIMIT 5
+    """,
+    _ACCOUNT_CLAUSE,
+)
+
+_TOP_CATEGORIES = prepare_filtered(
+    "trr_top_categories",
+    """
+    SELECT category, ROUND(SUM(ABS(amount))::numeric, 2) AS total
+    FROM transactions
+    WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
+    {filter}
+    GROUP BY category
+    ORDER BY total DESC, category
+    LIMIT 5
+    """,
+    _ACCOUNT_CLAUSE,
+)
+
+_DAILY_SPENDING = prepare_filtered(
+    "trr_daily_spending",
+    """
+    SELECT date, COALESCE(SUM(ABS(amount)), 0) AS daily_total
+    FROM transactions
+    WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
+    {filter}
+    GROUP BY date
+    ORDER BY date
+    """,
+    _ACCOUNT_CLAUSE,
+)
+
+
 def aggregate_range_data(user_id: int, account_id: str,
                          start_date: str, end_date: str,
                          prev_start: str, prev_end: str) -> dict:
@@ -78,86 +153,37 @@ def aggregate_range_data(user_id: int, account_id: str,
             "transaction_count": int,
         }
     """
-    acct_clause, acct_params = _account_filter(account_id)
+    _, acct_params = _account_filter(account_id)
+    filtered = bool(acct_params)
+    current = [user_id, start_date, end_date] + acct_params
 
-    with get_db() as (conn, cur):
+    with get_db(readonly=True) as (conn, cur):
         # ── 1. Current period totals ──
-        cur.execute(
-            f"""
-            SELECT
-                COALESCE(SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
-                COALESCE(SUM(amount), 0),
-                COUNT(*)
-            FROM transactions
-            WHERE user_id = %s AND date >= %s AND date <= %s
-            {acct_clause}
-            """,
-            [user_id, start_date, end_date] + acct_params,
-        )
+        execute_prepared(cur, _TOTALS[filtered], current)
         row = cur.fetchone()
         total_spent, total_income, net_change, txn_count = row
 
         # ── 2. Previous period total spending (for comparison) ──
-        cur.execute(
-            f"""
-            SELECT COALESCE(SUM(ABS(amount)), 0)
-            FROM transactions
-            WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
-            {acct_clause}
-            """,
-            [user_id, prev_start, prev_end] + acct_params,
-        )
+        execute_prepared(cur, _PREV_SPENT[filtered],
+                         [user_id, prev_start, prev_end] + acct_params)
         prev_period_spent = cur.fetchone()[0]
 
         # ── 3. Top 5 merchants by spend ──
-        cur.execute(
-            f"""
-            SELECT description, ROUND(SUM(ABS(amount))::numeric, 2) AS total
-            FROM transactions
-            WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
-            {acct_clause}
-            GROUP BY description
-            ORDER BY total DESC
-            LIMIT 5
-            """,
-            [user_id, start_date, end_date] + acct_params,
-        )
+        execute_prepared(cur, _TOP_MERCHANTS[filtered], current)
         top_merchants = [
             {"name": r[0], "amount": float(r[1])}
             for r in cur.fetchall()
         ]
 
         # ── 4. Top 5 categories by spend ──
-        cur.execute(
-            f"""
-            SELECT category, ROUND(SUM(ABS(amount))::numeric, 2) AS total
-            FROM transactions
-            WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
-            {acct_clause}
-            GROUP BY category
-            ORDER BY total DESC
-            LIMIT 5
-            """,
-            [user_id, start_date, end_date] + acct_params,
-        )
+        execute_prepared(cur, _TOP_CATEGORIES[filtered], current)
         top_categories = [
             {"name": r[0], "amount": float(r[1])}
             for r in cur.fetchall()
         ]
 
         # ── 5. Daily spending totals (for volatility) ──
-        cur.execute(
-            f"""
-            SELECT date, COALESCE(SUM(ABS(amount)), 0) AS daily_total
-            FROM transactions
-            WHERE user_id = %s AND date >= %s AND date <= %s AND amount < 0
-            {acct_clause}
-            GROUP BY date
-            ORDER BY date
-            """,
-            [user_id, start_date, end_date] + acct_params,
-        )
+        execute_prepared(cur, _DAILY_SPENDING[filtered], current)
         daily_spending = {
             str(r[0]): float(r[1])
             for r in cur.fetchall()
@@ -175,6 +201,156 @@ def aggregate_range_data(user_id: int, account_id: str,
     }
 
 
+# ──────────────────────────────────────────────
+# Set-based aggregation (many users per query)
+# ──────────────────────────────────────────────
+
+# Each query groups by GROUPING SETS: the (user_id) set is the all-accounts
+# aggregate, the (user_id, plaid_account_id) set the per-account one.
+# GROUPING(plaid_account_id) = 1 marks the all-accounts rows.
+_BULK_SETS = "GROUPING SETS ((user_id{extra}), (user_id, plaid_account_id{extra}))"
+
+_BULK_WHERE = "WHERE user_id = ANY(%s) AND date >= %s AND date <= %s"
+
+
+def _bulk_ranked(column: str) -> str:
+    """Top 5 `column` values by spend per (user, account) group, via ROW_NUMBER."""
+    return f"""
+    SELECT user_id, plaid_account_id, grp, {column}, total
+    FROM (
+        SELECT user_id, plaid_account_id, grp, {column}, total,
+               ROW_NUMBER() OVER (
+                   PARTITION BY user_id, grp, plaid_account_id
+                   ORDER BY total DESC, {column}
+               ) AS rn
+        FROM (
+            SELECT user_id, plaid_account_id,
+                   GROUPING(plaid_account_id) AS grp, {column},
+                   ROUND(SUM(ABS(amount))::numeric, 2) AS total
+            FROM transactions
+            {_BULK_WHERE} AND amount < 0
+            GROUP BY {_BULK_SETS.format(extra=f", {column}")}
+        ) grouped
+    ) ranked
+    WHERE rn <= 5
+    ORDER BY user_id, grp, plaid_account_id, rn
+    """
+
+
+def aggregate_range_data_many(user_ids: list, start_date: str, end_date: str,
+                              prev_start: str, prev_end: str,
+                              per_account: bool = True) -> dict:
+    """
+    Set-based variant of aggregate_range_data() for many users at once:
+    five queries in total, whatever the number of users.
+
+    Every user in `user_ids` gets an all-accounts entry (zeros if no
+    activity). With per_account, each Plaid account with activity in the
+    current or previous period gets its own entry too.
+
+    Returns:
+        {(user_id, account_id): <aggregate_range_data() dict>}
+        where account_id is "all" or a plaid_account_id
+    """
+    if not user_ids:
+        return {}
+    user_ids = list(user_ids)
+    current = [user_ids, start_date, end_date]
+    sets = _BULK_SETS.format(extra="")
+    results = {}
+
+    def entry(user_id, account_id, grp):
+        if grp:
+            key = (user_id, "all")
+        elif account_id is None or not per_account:
+            return None  # manual rows have no account to report on
+        else:
+            key = (user_id, account_id)
+        if key not in results:
+            results[key] = _empty_aggregate()
+        return results[key]
+
+    for user_id in user_ids:
+        entry(user_id, None, 1)
+
+    with get_db(readonly=True) as (conn, cur):
+        # ── 1. Current period totals ──
+        cur.execute(
+            f"""
+            SELECT user_id, plaid_account_id, GROUPING(plaid_account_id),
+                COALESCE(SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+                COALESCE(SUM(amount), 0),
+                COUNT(*)
+            FROM transactions
+            {_BULK_WHERE}
+            GROUP BY {sets}
+            """,
+            current,
+        )
+        for user_id, account_id, grp, spent, income, net, count in cur.fetchall():
+            data = entry(user_id, account_id, grp)
+            if data is not None:
+                data.update(total_spent=float(spent), total_income=float(income),
+                            net_change=float(net), transaction_count=count)
+
+        # ── 2. Previous period total spending ──
+        cur.execute(
+            f"""
+            SELECT user_id, plaid_account_id, GROUPING(plaid_account_id),
+                   COALESCE(SUM(ABS(amount)), 0)
+            FROM transactions
+            {_BULK_WHERE} AND amount < 0
+            GROUP BY {sets}
+            """,
+            [user_ids, prev_start, prev_end],
+        )
+        for user_id, account_id, grp, spent in cur.fetchall():
+            data = entry(user_id, account_id, grp)
+            if data is not None:
+                data["prev_period_spent"] = float(spent)
+
+        # ── 3 / 4. Top 5 merchants and categories by spend ──
+        for column, field in (("description", "top_merchants"),
+                              ("category", "top_categories")):
+            cur.execute(_bulk_ranked(column), current)
+            for user_id, account_id, grp, name, total in cur.fetchall():
+                data = entry(user_id, account_id, grp)
+                if data is not None:
+                    data[field].append({"name": name, "amount": float(total)})
+
+        # ── 5. Daily spending totals ──
+        cur.execute(
+            f"""
+            SELECT user_id, plaid_account_id, GROUPING(plaid_account_id),
+                   date, COALESCE(SUM(ABS(amount)), 0)
+            FROM transactions
+            {_BULK_WHERE} AND amount < 0
+            GROUP BY {_BULK_SETS.format(extra=", date")}
+            """,
+            current,
+        )
+        for user_id, account_id, grp, day, total in cur.fetchall():
+            data = entry(user_id, account_id, grp)
+            if data is not None:
+                data["daily_spending"][str(day)] = float(total)
+
+    return results
+
+
+def _empty_aggregate() -> dict:
+    return {
+        "total_spent": 0.0,
+        "total_income": 0.0,
+        "net_change": 0.0,
+        "prev_period_spent": 0.0,
+        "top_merchants": [],
+        "top_categories": [],
+        "daily_spending": {},
+        "transaction_count": 0,
+    }
+
+
 # ──────────────────────────────────────────────
 # Report CRUD
 # ──────────────────────────────────────────────
@@ -242,8 +418,34 @@ def upsert_report(user_id: int, account_id: str,
         return cur.fetchone()[0]
 
 
-def find_distinct_user_ids() -> list:
-    """Return all user IDs that have at least one transaction. Used by batch jobs."""
+_UPSERT_COLUMNS = [
+    "user_id", "account_id", "start_date", "end_date", "granularity",
+    "total_spent", "total_income", "net_change",
+    "top_merchants", "top_categories",
+    "volatility_score", "period_change", "explanation_json",
+]
+
+
+def upsert_report_many(reports: list) -> int:
+    """
+    Bulk variant of upsert_report().
+    `reports` are dicts with the same keys as upsert_report()'s kwargs.
+    Returns rows written.
+    """
+    rows = [
+        (r["user_id"], r["account_id"], r["start_date"], r["end_date"], r["granularity"],
+         r["total_spent"], r["total_income"], r["net_change"],
+         json.dumps(r["top_merchants"]), json.dumps(r["top_categories"]),
+         r["volatility_score"], r["period_change"],
+         json.dumps(r["explanation_json"]))
+        for r in reports
+    ]
+    update = {col: f"EXCLUDED.{col}" for col in _UPSERT_COLUMNS[4:]}
+    update["created_at"] = "NOW()"
     with get_db() as (conn, cur):
-        cur.execute("SELECT DISTINCT user_id FROM transactions")
-        return [row[0] for row in cur.fetchall()]
+        return bulk_upsert(
+            cur, "time_range_reports", _UPSERT_COLUMNS, rows,
+            conflict="ON CONSTRAINT uq_time_range_reports_user_dates",
+            update=update,
+            defaults={"created_at": "NOW()"},
+        )
@@ -1,8 +1,105 @@
 """
 Transaction model — all SQL operations for the transactions table.
 Supports manual + Plaid-sourced transactions with multi-account metadata.
+
+Every write that changes rows also bumps the user's data_version in
+user_activity, in the same transaction, so nightly jobs can skip users
+whose transactions haven't changed (see models/user_activity.py).
 """
-from utils.db import get_db
+from utils.db import (
+    bulk_upsert, copy_rows, execute_prepared, get_db, prepare_filtered, prepare_statement,
+)
+
+
+# ──────────────────────────────────────────────
+# Prepared statements (hot paths)
+# ──────────────────────────────────────────────
+
+_UPSERT_PLAID = prepare_statement(
+    "txn_upsert_plaid",
+    """
+    INSERT INTO transactions
+    (user_id, amount, category, description, date,
+     plaid_transaction_id, source, plaid_account_id,
+     institution_name, account_name, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, 'plaid', %s, %s, %s, NOW())
+    ON CONFLICT (plaid_transaction_id) DO UPDATE SET
+        amount = EXCLUDED.amount,
+        category = EXCLUDED.category,
+        description = EXCLUDED.description,
+        date = EXCLUDED.date,
+        plaid_account_id = EXCLUDED.plaid_account_id,
+        institution_name = EXCLUDED.institution_name,
+        account_name = EXCLUDED.account_name
+    """,
+)
+
+_TOUCH_USER = prepare_statement(
+    "user_activity_touch",
+    """
+    INSERT INTO user_activity (user_id, data_version, last_changed_at)
+    VALUES (%s, 1, NOW())
+    ON CONFLICT (user_id) DO UPDATE SET
+        data_version = user_activity.data_version + 1,
+        last_changed_at = NOW()
+    """,
+)
+
+# Count and totals from transaction_counters (kept by triggers, migration 015)
+_SUMMARY = prepare_filtered(
+    "txn_summary",
+    """
+    SELECT COALESCE(SUM(txn_count), 0)::bigint, COALESCE(SUM(sum_income), 0),
+           COALESCE(SUM(sum_spend), 0), MIN(min_date), MAX(max_date)
+    FROM transaction_counters
+    WHERE user_id = %s {filter}
+    """,
+    "AND account_id = %s",
+)
+
+_PAGE_COLS = """
+    id, amount, category, description, date, created_at,
+    plaid_transaction_id, source, plaid_account_id,
+    institution_name, account_name
+"""
+
+_PAGE = prepare_filtered(
+    "txn_page",
+    f"""
+    SELECT {_PAGE_COLS}
+    FROM transactions
+    WHERE user_id = %s {{filter}}
+    ORDER BY date DESC, id DESC
+    LIMIT %s OFFSET %s
+    """,
+    "AND plaid_account_id = %s",
+)
+
+# Keyset pages: rows strictly past a (date, id) position, walked along the
+# (user_id[, plaid_account_id], date DESC, id DESC) indexes
+_PAGE_AFTER = prepare_filtered(
+    "txn_page_after",
+    f"""
+    SELECT {_PAGE_COLS}
+    FROM transactions
+    WHERE user_id = %s {{filter}} AND (date, id) < (%s, %s)
+    ORDER BY date DESC, id DESC
+    LIMIT %s
+    """,
+    "AND plaid_account_id = %s",
+)
+
+_PAGE_BEFORE = prepare_filtered(
+    "txn_page_before",
+    f"""
+    SELECT {_PAGE_COLS}
+    FROM transactions
+    WHERE user_id = %s {{filter}} AND (date, id) > (%s, %s)
+    ORDER BY date ASC, id ASC
+    LIMIT %s
+    """,
+    "AND plaid_account_id = %s",
+)
 
 
 def create_manual(user_id: int, amount: float, category: str,
@@ -18,7 +115,87 @@ def create_manual(user_id: int, amount: float, category: str,
             """,
             (user_id, amount, category, description, date),
         )
-        return cur.fetchone()[0]
+        txn_id = cur.fetchone()[0]
+        _touch_user(cur, user_id)
+        return txn_id
+
+
+_IMPORT_COLUMNS = ["line", "date", "amount", "description", "category"]
+
+
+def import_manual(user_id: int, batches) -> dict:
+    """
+    Bulk-insert manual transactions from an iterable of row batches, each
+    a list of (line, date, amount, description, category) tuples.
+
+    Batches are COPYed into a temp staging table as they arrive, then
+    merged into transactions with one INSERT ... SELECT. A staged row is
+    a duplicate when the user already has as many transactions with the
+    same (date, amount, description) as the file has up to and including
+    it — so re-importing a file adds nothing, while two identical
+    purchases on one day in the same file are both kept.
+
+    All or nothing: an exception from `batches` rolls the import back.
+    Concurrent imports for the same user are serialized.
+
+    Returns:
+        { "staged": int, "inserted": int, "duplicate_lines": [int, ...] }
+    """
+    with get_db() as (conn, cur):
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('transactions_import'), %s)", (user_id,))
+        cur.execute(
+            """
+            CREATE TEMP TABLE _import_transactions (
+                line INTEGER, date DATE, amount NUMERIC, description TEXT, category TEXT
+            ) ON COMMIT DROP
+            """
+        )
+        staged = 0
+        for batch in batches:
+            copy_rows(cur, "_import_transactions", _IMPORT_COLUMNS, batch)
+            staged += len(batch)
+
+        cur.execute(
+            """
+            WITH numbered AS (
+                SELECT s.*, ROW_NUMBER() OVER (
+                           PARTITION BY date, amount, description ORDER BY line) AS nth
+                FROM _import_transactions s
+            ),
+            existing AS (
+                SELECT date, amount, description, COUNT(*) AS n
+                FROM transactions
+                WHERE user_id = %(user_id)s
+                  AND (date, amount, description) IN (
+                      SELECT date, amount, description FROM _import_transactions)
+                GROUP BY 1, 2, 3
+            ),
+            marked AS (
+                SELECT n.*, n.nth <= COALESCE(e.n, 0) AS duplicate
+                FROM numbered n
+                LEFT JOIN existing e USING (date, amount, description)
+            ),
+            inserted AS (
+                INSERT INTO transactions
+                (user_id, amount, category, description, date, source, created_at)
+                SELECT %(user_id)s, amount, category, description, date, 'manual', NOW()
+                FROM marked
+                WHERE NOT duplicate
+                ORDER BY line
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM inserted),
+                   COALESCE((SELECT array_agg(line ORDER BY line)
+                             FROM marked WHERE duplicate), '{}')
+            """,
+            {"user_id": user_id},
+        )
+        inserted, duplicate_lines = cur.fetchone()
+        cur.execute("DROP TABLE _import_transactions")
+        if inserted:
+            _touch_user(cur, user_id)
+
+    return {"staged": staged, "inserted": inserted, "duplicate_lines": duplicate_lines}
 
 
 def upsert_plaid_transaction(
@@ -34,26 +211,57 @@ def upsert_plaid_transaction(
 ):
     """Insert or update a Plaid-sourced transaction (idempotent via plaid_transaction_id)."""
     with get_db() as (conn, cur):
-        cur.execute(
-            """
-            INSERT INTO transactions
-            (user_id, amount, category, description, date,
-             plaid_transaction_id, source, plaid_account_id,
-             institution_name, account_name, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, 'plaid', %s, %s, %s, NOW())
-            ON CONFLICT (plaid_transaction_id) DO UPDATE SET
-                amount = EXCLUDED.amount,
-                category = EXCLUDED.category,
-                description = EXCLUDED.description,
-                date = EXCLUDED.date,
-                plaid_account_id = EXCLUDED.plaid_account_id,
-                institution_name = EXCLUDED.institution_name,
-                account_name = EXCLUDED.account_name
-            """,
+        execute_prepared(
+            cur,
+            _UPSERT_PLAID,
             (user_id, amount, category, description, date,
              plaid_transaction_id, plaid_account_id,
              institution_name, account_name),
         )
+        _touch_user(cur, user_id)
+
+
+_PLAID_COLUMNS = [
+    "user_id", "amount", "category", "description", "date",
+    "plaid_transaction_id", "plaid_account_id", "institution_name", "account_name",
+]
+_PLAID_UPDATE_COLUMNS = [
+    "amount", "category", "description", "date",
+    "plaid_account_id", "institution_name", "account_name",
+]
+
+_CHANGED = "({}) IS DISTINCT FROM ({})".format(
+    ", ".join(f"transactions.{col}" for col in _PLAID_UPDATE_COLUMNS),
+    ", ".join(f"EXCLUDED.{col}" for col in _PLAID_UPDATE_COLUMNS),
+)
+
+
+def upsert_plaid_transaction_many(user_id: int, transactions: list) -> int:
+    """
+    Bulk variant of upsert_plaid_transaction.
+    `transactions` are dicts with the same keys as the single-row kwargs.
+    Rows whose stored values are unchanged are skipped (no dead tuples).
+    Returns rows written.
+    """
+    # Last write wins if a page repeats an ID (ON CONFLICT can't touch a row twice)
+    unique = {t["plaid_transaction_id"]: t for t in transactions}
+    rows = [
+        (user_id, t["amount"], t["category"], t["description"], t["date"],
+         t["plaid_transaction_id"], t["plaid_account_id"],
+         t["institution_name"], t["account_name"])
+        for t in unique.values()
+    ]
+    with get_db() as (conn, cur):
+        written = bulk_upsert(
+            cur, "transactions", _PLAID_COLUMNS, rows,
+            conflict="(plaid_transaction_id)",
+            update={col: f"EXCLUDED.{col}" for col in _PLAID_UPDATE_COLUMNS},
+            where=_CHANGED,
+            defaults={"source": "'plaid'", "created_at": "NOW()"},
+        )
+        if written:
+            _touch_user(cur, user_id)
+        return written
 
 
 def update_plaid_transaction(
@@ -80,6 +288,8 @@ def update_plaid_transaction(
              plaid_account_id, institution_name, account_name,
              plaid_transaction_id, user_id),
         )
+        if cur.rowcount:
+            _touch_user(cur, user_id)
 
 
 def delete_by_plaid_id(user_id: int, plaid_transaction_id: str):
@@ -89,6 +299,26 @@ def delete_by_plaid_id(user_id: int, plaid_transaction_id: str):
             "DELETE FROM transactions WHERE plaid_transaction_id = %s AND user_id = %s",
             (plaid_transaction_id, user_id),
         )
+        if cur.rowcount:
+            _touch_user(cur, user_id)
+
+
+def delete_by_plaid_ids(user_id: int, plaid_transaction_ids: list) -> int:
+    """Delete many transactions by Plaid ID in one statement. Returns rows deleted."""
+    if not plaid_transaction_ids:
+        return 0
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            DELETE FROM transactions
+            WHERE user_id = %s AND plaid_transaction_id = ANY(%s)
+            """,
+            (user_id, list(plaid_transaction_ids)),
+        )
+        deleted = cur.rowcount
+        if deleted:
+            _touch_user(cur, user_id)
+        return deleted
 
 
 def delete_by_id(user_id: int, transaction_id: int) -> int:
@@ -98,7 +328,10 @@ def delete_by_id(user_id: int, transaction_id: int) -> int:
             "DELETE FROM transactions WHERE id = %s AND user_id = %s",
             (transaction_id, user_id),
         )
-        return cur.rowcount
+        deleted = cur.rowcount
+        if deleted:
+            _touch_user(cur, user_id)
+        return deleted
 
 
 def delete_by_account_ids(user_id: int, account_ids: list) -> int:
@@ -115,91 +348,257 @@ def delete_by_account_ids(user_id: int, account_ids: list) -> int:
             """,
             [user_id] + account_ids,
         )
-        return cur.rowcount
+        deleted = cur.rowcount
+        if deleted:
+            _touch_user(cur, user_id)
+        return deleted
+
+
+def fetch_window(user_id: int, days: int) -> tuple:
+    """
+    All of a user's transactions dated within the last `days` days, for
+    the in-memory TransactionWindow. Ordered by description, date like
+    the subscription-detection fetch.
+
+    Returns:
+        (as_of date, [(id, description, amount, date, category, plaid_account_id), ...])
+    """
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute(
+            f"""
+            SELECT CURRENT_DATE, id, description, amount, date, category, plaid_account_id
+            FROM transactions
+            WHERE user_id = %s
+              AND date >= CURRENT_DATE - INTERVAL '{int(days)} days'
+            ORDER BY description, date
+            """,
+            (user_id,),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            cur.execute("SELECT CURRENT_DATE")
+            return cur.fetchone()[0], []
+
+    return rows[0][0], [(r[1], r[2], float(r[3]), r[4], r[5], r[6]) for r in rows]
+
+
+def fetch_summary(user_id: int, account_id: str = None) -> dict:
+    """
+    Count, income, spending and date range of a user's transactions
+    (or one account's), from the maintained counters.
+    """
+    filtered = bool(account_id)
+    with get_db() as (conn, cur):
+        return _summary(cur, filtered, [user_id, account_id] if filtered else [user_id])
 
 
 def find_paginated(user_id: int, account_id: str = None,
-                   page: int = 1, per_page: int = 50) -> dict:
+                   page: int = 1, per_page: int = 50,
+                   include_total: bool = True) -> dict:
     """
-    Return paginated transactions with metadata.
+    Return one page of transactions (newest first) by page number.
     Optionally filter by plaid_account_id.
 
     Returns:
         {
             "transactions": [...],
-            "pagination": { "page", "per_page", "total", "total_pages" }
+            "has_more": bool,       # rows exist past this page
+            "summary": dict | None  # fetch_summary(), None unless include_total
         }
     """
     offset = (page - 1) * per_page
+    filtered = bool(account_id)
+    where_params = [user_id, account_id] if filtered else [user_id]
 
     with get_db() as (conn, cur):
-        # ── Count total matching rows ──
-        if account_id:
-            cur.execute(
-                "SELECT COUNT(*) FROM transactions WHERE user_id = %s AND plaid_account_id = %s",
-                (user_id, account_id),
-            )
-        else:
-            cur.execute(
-                "SELECT COUNT(*) FROM transactions WHERE user_id = %s",
-                (user_id,),
-            )
-        total = cur.fetchone()[0]
-
-        # ── Fetch the page ──
-        if account_id:
-            cur.execute(
-                """
-                SELECT id, amount, category, description, date, created_at,
-                       plaid_transaction_id, source, plaid_account_id,
-                       institution_name, account_name
-                FROM transactions
-                WHERE user_id = %s AND plaid_account_id = %s
-                ORDER BY date DESC, id DESC
-                LIMIT %s OFFSET %s
-                """,
-                (user_id, account_id, per_page, offset),
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, amount, category, description, date, created_at,
-                       plaid_transaction_id, source, plaid_account_id,
-                       institution_name, account_name
+        summary = _summary(cur, filtered, where_params) if include_total else None
+
+        # ── Fetch the page, plus one row to tell whether another follows ──
+        execute_prepared(cur, _PAGE[filtered], where_params + [per_page + 1, offset])
+        rows = cur.fetchall()
+
+    return {
+        "transactions": [_row_to_dict(row) for row in rows[:per_page]],
+        "has_more": len(rows) > per_page,
+        "summary": summary,
+    }
+
+
+def find_page_by_cursor(user_id: int, account_id: str, per_page: int,
+                        after: bool, row_date, row_id: int,
+                        include_total: bool = True) -> dict:
+    """
+    Keyset variant of find_paginated(): the per_page rows just past the
+    (row_date, row_id) position — older rows if `after`, newer rows
+    otherwise. Cost doesn't grow with how deep the position is.
+
+    Returns the same shape as find_paginated(), rows newest first;
+    has_more tells whether rows exist further in the paging direction.
+    """
+    filtered = bool(account_id)
+    where_params = [user_id, account_id] if filtered else [user_id]
+    stmt = (_PAGE_AFTER if after else _PAGE_BEFORE)[filtered]
+
+    with get_db() as (conn, cur):
+        summary = _summary(cur, filtered, where_params) if include_total else None
+        execute_prepared(cur, stmt, where_params + [row_date, row_id, per_page + 1])
+        rows = cur.fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not after:
+        rows.reverse()
+
+    return {
+        "transactions": [_row_to_dict(row) for row in rows],
+        "has_more": has_more,
+        "summary": summary,
+    }
+
+
+# Search filter → condition; "text" repeats the migration 016 index expression
+_SEARCH_FILTERS = {
+    "account_id": "plaid_account_id = %s",
+    "category": "category = %s",
+    "source": "source = %s",
+    "min_amount": "amount >= %s",
+    "max_amount": "amount <= %s",
+    "start": "date >= %s",
+    "end": "date <= %s",
+    "text": "to_tsvector('simple', COALESCE(description, '')) @@ to_tsquery('simple', %s)",
+}
+
+
+def search(user_id: int, filters: dict, per_page: int, after: bool = True,
+           row_date=None, row_id: int = None, max_cost: float = None) -> dict:
+    """
+    One page of a user's transactions matching `filters` (keys of
+    _SEARCH_FILTERS; "text" is a to_tsquery string), newest first, past
+    the (row_date, row_id) position when given — older rows if `after`,
+    newer otherwise, as in find_page_by_cursor().
+
+    The query is EXPLAINed first; if the planner's cost estimate exceeds
+    max_cost it isn't run and "rejected" is True.
+
+    Returns:
+        { "transactions": [...], "has_more": bool,
+          "plan_cost": float, "rejected": bool }
+    """
+    clauses, params = ["user_id = %s"], [user_id]
+    for name, condition in _SEARCH_FILTERS.items():
+        if filters.get(name) is not None:
+            clauses.append(condition)
+            params.append(filters[name])
+    if row_id is not None:
+        clauses.append("(date, id) < (%s, %s)" if after else "(date, id) > (%s, %s)")
+        params += [row_date, row_id]
+    order = "DESC" if after else "ASC"
+    sql = f"""
+        SELECT {_PAGE_COLS}
+        FROM transactions
+        WHERE {" AND ".join(clauses)}
+        ORDER BY date {order}, id {order}
+        LIMIT %s
+    """
+    params.append(per_page + 1)
+
+    with get_db(readonly=True) as (conn, cur):
+        cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan_cost = cur.fetchone()[0][0]["Plan"]["Total Cost"]
+        if max_cost is not None and plan_cost > max_cost:
+            return {"transactions": [], "has_more": False,
+                    "plan_cost": plan_cost, "rejected": True}
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not after:
+        rows.reverse()
+
+    return {
+        "transactions": [_row_to_dict(row) for row in rows],
+        "has_more": has_more,
+        "plan_cost": plan_cost,
+        "rejected": False,
+    }
+
+
+def iter_export(user_id: int, account_id: str = None, start=None, end=None,
+                batch_size: int = 2000):
+    """
+    Stream a user's transactions (newest first), optionally limited to one
+    account and an inclusive date range, in batches of batch_size dicts.
+
+    Rows come through a server-side (named) cursor, so only one batch is
+    held in memory however long the history. The connection stays checked
+    out until the generator is exhausted or closed.
+    """
+    clauses, params = ["user_id = %s"], [user_id]
+    if account_id:
+        clauses.append("plaid_account_id = %s")
+        params.append(account_id)
+    if start:
+        clauses.append("date >= %s")
+        params.append(start)
+    if end:
+        clauses.append("date <= %s")
+        params.append(end)
+
+    with get_db(readonly=True) as (conn, cur):
+        export = conn.cursor(name="txn_export")
+        try:
+            export.execute(
+                f"""
+                SELECT {_PAGE_COLS}
                 FROM transactions
-                WHERE user_id = %s
+                WHERE {" AND ".join(clauses)}
                 ORDER BY date DESC, id DESC
-                LIMIT %s OFFSET %s
                 """,
-                (user_id, per_page, offset),
+                params,
             )
+            while True:
+                rows = export.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [_row_to_dict(row) for row in rows]
+        finally:
+            export.close()
 
-        rows = cur.fetchall()
 
-    transactions = []
-    for row in rows:
-        transactions.append({
-            "id": row[0],
-            "amount": float(row[1]),
-            "category": row[2],
-            "description": row[3],
-            "date": str(row[4]),
-            "created_at": str(row[5]),
-            "plaid_transaction_id": row[6],
-            "source": row[7] or "manual",
-            "plaid_account_id": row[8],
-            "institution_name": row[9],
-            "account_name": row[10],
-        })
-
-    total_pages = max(1, -(-total // per_page))  # Ceiling division
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _touch_user(cur, user_id: int):
+    """Bump the user's data_version inside the caller's transaction."""
+    execute_prepared(cur, _TOUCH_USER, (user_id,))
+
+
+def _summary(cur, filtered: bool, where_params: list) -> dict:
+    execute_prepared(cur, _SUMMARY[filtered], where_params)
+    count, income, spend, first, last = cur.fetchone()
+    return {
+        "count": count,
+        "total_income": float(income),
+        "total_spending": float(spend),
+        "first_date": str(first) if first else None,
+        "last_date": str(last) if last else None,
+    }
+
 
+def _row_to_dict(row) -> dict:
+    """Convert a _PAGE_COLS row to the API shape."""
     return {
-        "transactions": transactions,
-        "pagination": {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "total_pages": total_pages,
-        },
+        "id": row[0],
+        "amount": float(row[1]),
+        "category": row[2],
+        "description": row[3],
+        "date": str(row[4]),
+        "created_at": str(row[5]),
+        "plaid_transaction_id": row[6],
+        "source": row[7] or "manual",
+        "plaid_account_id": row[8],
+        "institution_name": row[9],
+        "account_name": row[10],
     }
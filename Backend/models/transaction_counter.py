@@ -0,0 +1,65 @@
+"""
+TransactionCounter model — SQL operations for the transaction_counters table.
+Per (user, account) count / income / spending / date range of transactions,
+kept current by triggers on transactions (migration 015). Reads go through
+models/transaction.py; this module only repairs drift.
+"""
+from utils.db import get_db
+
+
+def reconcile(user_ids: list) -> int:
+    """
+    Rewrite the counters of the given users from their transactions where
+    they differ, and drop counters for accounts with none left.
+    Returns the number of counter rows fixed.
+    """
+    with get_db() as (conn, cur):
+        # Writers' triggers wait on these rows, so none lands between the
+        # recount below and its upsert
+        cur.execute(
+            "SELECT 1 FROM transaction_counters WHERE user_id = ANY(%s) FOR UPDATE",
+            (list(user_ids),),
+        )
+        cur.execute(
+            """
+            WITH actual AS (
+                SELECT user_id, COALESCE(plaid_account_id, '') AS account_id,
+                       COUNT(*) AS txn_count,
+                       COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0) AS sum_income,
+                       COALESCE(SUM(-amount) FILTER (WHERE amount < 0), 0) AS sum_spend,
+                       MIN(date) AS min_date, MAX(date) AS max_date
+                FROM transactions
+                WHERE user_id = ANY(%(users)s)
+                GROUP BY 1, 2
+            ),
+            fixed AS (
+                INSERT INTO transaction_counters AS c
+                    (user_id, account_id, txn_count, sum_income, sum_spend,
+                     min_date, max_date, updated_at)
+                SELECT *, NOW() FROM actual
+                ON CONFLICT (user_id, account_id) DO UPDATE SET
+                    txn_count  = EXCLUDED.txn_count,
+                    sum_income = EXCLUDED.sum_income,
+                    sum_spend  = EXCLUDED.sum_spend,
+                    min_date   = EXCLUDED.min_date,
+                    max_date   = EXCLUDED.max_date,
+                    updated_at = NOW()
+                WHERE (c.txn_count, c.sum_income, c.sum_spend, c.min_date, c.max_date)
+                      IS DISTINCT FROM
+                      (EXCLUDED.txn_count, EXCLUDED.sum_income, EXCLUDED.sum_spend,
+                       EXCLUDED.min_date, EXCLUDED.max_date)
+                RETURNING 1
+            ),
+            removed AS (
+                DELETE FROM transaction_counters c
+                WHERE c.user_id = ANY(%(users)s)
+                  AND NOT EXISTS (SELECT 1 FROM actual a
+                                  WHERE a.user_id = c.user_id
+                                    AND a.account_id = c.account_id)
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM fixed) + (SELECT COUNT(*) FROM removed)
+            """,
+            {"users": list(user_ids)},
+        )
+        return cur.fetchone()[0]
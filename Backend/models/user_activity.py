@@ -0,0 +1,173 @@
+"""
+UserActivity model — SQL operations for the user_activity and
+job_watermarks tables.
+user_activity.data_version is bumped by every transactions write (see
+models/transaction.py); a job's watermark is the version it last
+succeeded at, so users whose version moved since then are "dirty".
+Batch jobs page through their users with iter_user_ids().
+"""
+from config import Config
+from utils.db import get_db
+
+# Tables whose user_id index backs each iter_user_ids() source
+_USER_SOURCES = {
+    "transactions": ("user_activity",),
+    "plaid_items": ("plaid_items",),
+    "any": ("user_activity", "plaid_items"),
+}
+
+
+def get_version(user_id: int) -> int:
+    """Current data version of a user (0 if their transactions never changed)."""
+    with get_db() as (conn, cur):
+        cur.execute("SELECT data_version FROM user_activity WHERE user_id = %s", (user_id,))
+        row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def get_versions(user_ids: list) -> dict:
+    """{user_id: data_version} for many users (0 for users never changed)."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT u.user_id, COALESCE(a.data_version, 0)
+            FROM unnest(%s::integer[]) AS u(user_id)
+            LEFT JOIN user_activity a ON a.user_id = u.user_id
+            """,
+            (list(user_ids),),
+        )
+        return dict(cur.fetchall())
+
+
+def iter_user_ids(source: str = "transactions", active_days: int = None,
+                  page_size: int = None):
+    """
+    Stream user ids in ascending order, fetched page_size at a time with
+    keyset queries (no connection is held between pages).
+
+    source:
+        "transactions"  users whose transactions were ever written
+        "plaid_items"   users with a linked Plaid item
+        "any"           either
+    active_days: only users whose transactions changed in the last N days.
+    """
+    if source not in _USER_SOURCES:
+        raise ValueError(f"source must be one of {sorted(_USER_SOURCES)}")
+    page_size = page_size or Config.USER_PAGE_SIZE
+
+    after = 0
+    while True:
+        page = find_user_ids_page(after, page_size, source, active_days)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1]
+
+
+def find_user_ids_page(after_id: int, limit: int, source: str = "transactions",
+                       active_days: int = None) -> list:
+    """One page of iter_user_ids(): up to `limit` user ids greater than after_id."""
+    active = ""
+    if active_days is not None:
+        active = """
+              AND EXISTS (SELECT 1 FROM user_activity a
+                          WHERE a.user_id = t.user_id
+                            AND a.last_changed_at >= NOW() - make_interval(days => %(days)s))
+        """
+    # Each branch is its own index range scan, limited before the union
+    branches = " UNION ".join(
+        f"""
+        (SELECT DISTINCT t.user_id FROM {table} t
+         WHERE t.user_id > %(after)s {active}
+         ORDER BY t.user_id LIMIT %(limit)s)
+        """
+        for table in _USER_SOURCES[source]
+    )
+
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"SELECT user_id FROM ({branches}) u ORDER BY user_id LIMIT %(limit)s",
+            {"after": after_id, "limit": limit, "days": active_days},
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def find_changed_user_ids(job_type: str, max_age_days: int = None,
+                          period: str = None) -> list:
+    """
+    Users whose data changed since `job_type` last succeeded for them
+    (or that it never ran for). With max_age_days, users whose last
+    success is older than that are included even if unchanged; with
+    period ('day' or 'week'), so are users whose last success predates
+    the current day / week (Monday start).
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT a.user_id
+            FROM user_activity a
+            LEFT JOIN job_watermarks w
+              ON w.job_type = %s AND w.user_id = a.user_id
+            WHERE w.user_id IS NULL
+               OR w.data_version < a.data_version
+               OR (%s::integer IS NOT NULL
+                   AND w.succeeded_at < NOW() - make_interval(days => %s::integer))
+               OR (%s::text IS NOT NULL
+                   AND w.succeeded_at < date_trunc(%s::text, CURRENT_DATE::timestamp))
+            ORDER BY a.user_id
+            """,
+            (job_type, max_age_days, max_age_days, period, period),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def find_watermarks(user_id: int, job_types: list) -> dict:
+    """
+    {job_type: (data_version, age_days, ran_today)} for the given jobs
+    that have succeeded for the user.
+    """
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            SELECT job_type, data_version,
+                   EXTRACT(EPOCH FROM NOW() - succeeded_at) / 86400,
+                   succeeded_at >= CURRENT_DATE
+            FROM job_watermarks
+            WHERE user_id = %s AND job_type = ANY(%s)
+            """,
+            (user_id, list(job_types)),
+        )
+        return {row[0]: (row[1], float(row[2]), row[3]) for row in cur.fetchall()}
+
+
+def record_success(job_type: str, user_id: int, data_version: int):
+    """Advance a job's watermark for the user (never moves it backwards)."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO job_watermarks (job_type, user_id, data_version, succeeded_at)
+            VALUES (%s, %s, %s, NOW())
+            ON CONFLICT (job_type, user_id) DO UPDATE SET
+                data_version = GREATEST(job_watermarks.data_version, EXCLUDED.data_version),
+                succeeded_at = NOW()
+            """,
+            (job_type, user_id, data_version),
+        )
+
+
+def record_success_many(job_type: str, versions: dict):
+    """Bulk variant of record_success(): `versions` is {user_id: data_version}."""
+    if not versions:
+        return
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO job_watermarks (job_type, user_id, data_version, succeeded_at)
+            SELECT %s, v.user_id, v.data_version, NOW()
+            FROM unnest(%s::integer[], %s::bigint[]) AS v(user_id, data_version)
+            ON CONFLICT (job_type, user_id) DO UPDATE SET
+                data_version = GREATEST(job_watermarks.data_version, EXCLUDED.data_version),
+                succeeded_at = NOW()
+            """,
+            (job_type, list(versions), list(versions.values())),
+        )
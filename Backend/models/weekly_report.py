@@ -255,10 +255,3 @@ def upsert_report(user_id: int, account_id: str, week_start: str,
              json.dumps(explanation_json)),
         )
         return cur.fetchone()[0]
-
-
-def find_distinct_user_ids() -> list:
-    """Return all user IDs that have at least one transaction. Used by batch jobs."""
-    with get_db() as (conn, cur):
-        cur.execute("SELECT DISTINCT user_id FROM transactions")
-        return [row[0] for row in cur.fetchall()]
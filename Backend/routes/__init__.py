@@ -10,6 +10,7 @@ from routes.subscriptions import subscriptions_bp
 from routes.cashflow import cashflow_bp
 from routes.health_score import health_score_bp
 from routes.chatbot import chatbot_bp
+from routes.internal import internal_bp
 
 
 def register_blueprints(app):
@@ -22,3 +23,4 @@ def register_blueprints(app):
     app.register_blueprint(cashflow_bp)  # /v1/cashflow
     app.register_blueprint(health_score_bp)  # /v1/health-score
     app.register_blueprint(chatbot_bp)  # /v1/chatbot
+    app.register_blueprint(internal_bp)  # /internal (token-protected ops endpoints)
@@ -24,6 +24,8 @@ def get_forecast():
     Query params:
         account_id       (optional): plaid_account_id filter (default "all")
         horizon_days     (optional): 7 | 14 | 30 (default 7)
+        horizons         (optional): several horizons, e.g. "7,14,30" or repeated;
+                                     returns {"forecasts": [...]} in horizon order
         starting_balance (optional): current balance in dollars
     """
     try:
@@ -33,23 +35,32 @@ def get_forecast():
 
     account_id = request.args.get("account_id", "all")
     horizon_days = request.args.get("horizon_days", 7, type=int)
+    horizons = _parse_horizons(request.args.getlist("horizons"))
     starting_balance = request.args.get("starting_balance", None, type=float)
 
     log.debug("Forecast request",
               extra={"context": {
                   "user_id": user_id,
                   "account_id": account_id,
-                  "horizon_days": horizon_days,
+                  "horizon_days": horizons or horizon_days,
                   "starting_balance": starting_balance,
               }})
 
     try:
-        result = cashflow_service.get_forecast(
-            user_id=user_id,
-            account_id=account_id,
-            horizon_days=horizon_days,
-            starting_balance=starting_balance,
-        )
+        if horizons:
+            result = {"forecasts": cashflow_service.get_forecasts(
+                user_id=user_id,
+                account_id=account_id,
+                horizons=horizons,
+                starting_balance=starting_balance,
+            )}
+        else:
+            result = cashflow_service.get_forecast(
+                user_id=user_id,
+                account_id=account_id,
+                horizon_days=horizon_days,
+                starting_balance=starting_balance,
+            )
     except ValidationError:
         raise
     except Exception as e:
@@ -58,3 +69,11 @@ def get_forecast():
         raise
 
     return jsonify(result)
+
+
+def _parse_horizons(values: list) -> list:
+    """'7,14' and/or repeated ?horizons= values → [7, 14]."""
+    try:
+        return [int(v) for value in values for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise ValidationError("horizons must be a comma-separated list of integers")
@@ -0,0 +1,46 @@
+"""
+Internal routes — /internal/*
+Operational endpoints (pool saturation, Plaid client metrics) for operators,
+not end users.
+
+Protected by a shared token in the X-Internal-Token header. When
+INTERNAL_API_TOKEN is not configured the endpoints are disabled (404).
+"""
+import hmac
+from functools import wraps
+from flask import Blueprint, request, jsonify
+
+from config import Config
+from services import plaid_service
+from utils.db import pool_metrics
+from utils.errors import AuthenticationError, NotFoundError
+
+internal_bp = Blueprint("internal", __name__, url_prefix="/internal")
+
+
+def internal_token_required(fn):
+    """Reject requests that don't carry the configured internal token."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = Config.INTERNAL_API_TOKEN
+        if not expected:
+            raise NotFoundError("Endpoint not found")
+        supplied = request.headers.get("X-Internal-Token", "")
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            raise AuthenticationError("Invalid internal token")
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@internal_bp.route("/pool", methods=["GET"])
+@internal_token_required
+def get_pool_metrics():
+    """Connection pool checkout latency, hold times, and saturation counters."""
+    return jsonify({"pools": pool_metrics()})
+
+
+@internal_bp.route("/plaid", methods=["GET"])
+@internal_token_required
+def get_plaid_metrics():
+    """Plaid call counters, retries, latency histograms and circuit breakers."""
+    return jsonify({"plaid": plaid_service.client_metrics()})
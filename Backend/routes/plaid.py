@@ -1,11 +1,13 @@
 """
 Plaid routes — /plaid/*
-Thin handlers for bank linking, account listing, sync, and disconnect.
+Thin handlers for bank linking, account listing, background sync jobs,
+disconnect, and the Plaid webhook receiver.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from services import plaid_service
+from services import plaid_service, plaid_webhook_service, sync_job_service
+from utils.webhook_verification import verify_webhook
 
 plaid_bp = Blueprint("plaid", __name__)
 
@@ -29,15 +31,27 @@ def exchange_token():
         institution_id=data.get("institution_id", ""),
         institution_name=data.get("institution_name", ""),
     )
+    # ── Initial historical backfill runs as a background sync job ──
+    job = sync_job_service.start_sync(user_id, trigger="link")
+    result["sync_job_id"] = job["job_id"]
     return jsonify(result)
 
 
 @plaid_bp.route("/sync_transactions", methods=["POST"])
 @jwt_required()
 def sync_transactions():
+    """Start (or attach to) a background sync. Poll /plaid/sync_jobs/<job_id>."""
     user_id = int(get_jwt_identity())
-    result = plaid_service.sync_transactions(user_id)
-    return jsonify(result)
+    job = sync_job_service.start_sync(user_id)
+    return jsonify(job), 202
+
+
+@plaid_bp.route("/sync_jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def get_sync_job(job_id):
+    user_id = int(get_jwt_identity())
+    job = sync_job_service.get_job(user_id, job_id)
+    return jsonify(job)
 
 
 @plaid_bp.route("/accounts", methods=["GET"])
@@ -54,3 +68,11 @@ def disconnect(item_id):
     user_id = int(get_jwt_identity())
     result = plaid_service.disconnect_item(user_id, item_id)
     return jsonify(result)
+
+
+@plaid_bp.route("/webhook", methods=["POST"])
+def webhook():
+    """Plaid webhook receiver (authenticated by signature, not JWT)."""
+    verify_webhook(request.get_data(), request.headers)
+    result = plaid_webhook_service.handle_webhook(request.get_json(silent=True) or {})
+    return jsonify(result)
@@ -1,11 +1,14 @@
 """
 Transaction routes — /transactions
-Thin handlers with pagination support.
+Thin handlers with page-number and cursor pagination, search, a streamed
+export and bulk statement import.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from services import transaction_service
+from services import transaction_import_service, transaction_service
+from utils.errors import ValidationError
+from utils.streaming import gzip_chunks
 
 transactions_bp = Blueprint("transactions", __name__)
 
@@ -27,16 +30,97 @@ def get_transactions():
     account_id = request.args.get("account_id")
     page = request.args.get("page", type=int)
     per_page = request.args.get("per_page", type=int)
+    cursor = request.args.get("cursor")          # next_cursor / prev_cursor from a previous page
+    include_total = request.args.get("include_total", "true").lower() not in ("false", "0")
 
     result = transaction_service.get_transactions(
         user_id=user_id,
         account_id=account_id,
         page=page,
         per_page=per_page,
+        cursor=cursor,
+        include_total=include_total,
     )
     return jsonify(result)
 
 
+@transactions_bp.route("/transactions/search", methods=["GET"])
+@jwt_required()
+def search_transactions():
+    user_id = int(get_jwt_identity())
+    args = request.args
+
+    result = transaction_service.search_transactions(
+        user_id=user_id,
+        q=args.get("q"),
+        category=args.get("category"),
+        min_amount=args.get("min_amount"),
+        max_amount=args.get("max_amount"),
+        start=args.get("start"),
+        end=args.get("end"),
+        source=args.get("source"),
+        account_id=args.get("account_id"),
+        per_page=args.get("per_page", type=int),
+        cursor=args.get("cursor"),          # next_cursor / prev_cursor from a previous page
+    )
+    return jsonify(result)
+
+
+@transactions_bp.route("/transactions/import", methods=["POST"])
+@jwt_required()
+def import_transactions():
+    user_id = int(get_jwt_identity())
+    upload = request.files.get("file")
+    if upload is None:
+        raise ValidationError("Upload a statement file in the 'file' field")
+
+    result = transaction_import_service.import_transactions(
+        user_id=user_id,
+        stream=upload.stream,
+        filename=upload.filename,
+        fmt=request.form.get("format") or request.args.get("format"),
+    )
+    return jsonify(result)
+
+
+@transactions_bp.route("/transactions/summary", methods=["GET"])
+@jwt_required()
+def get_transaction_summary():
+    user_id = int(get_jwt_identity())
+    account_id = request.args.get("account_id")
+    return jsonify(transaction_service.get_summary(user_id, account_id))
+
+
+@transactions_bp.route("/transactions/export", methods=["GET"])
+@jwt_required()
+def export_transactions():
+    user_id = int(get_jwt_identity())
+    fmt = request.args.get("format", "csv").lower()
+
+    chunks = transaction_service.export_transactions(
+        user_id=user_id,
+        fmt=fmt,
+        account_id=request.args.get("account_id"),
+        start=request.args.get("start"),
+        end=request.args.get("end"),
+    )
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="transactions.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if request.accept_encodings["gzip"]:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    # stream_with_context keeps the request (and its DB scope) open while streaming
+    return Response(
+        stream_with_context(chunks),
+        mimetype=transaction_service.EXPORT_FORMATS[fmt],
+        headers=headers,
+    )
+
+
 @transactions_bp.route("/transactions/<int:transaction_id>", methods=["DELETE"])
 @jwt_required()
 def delete_transaction(transaction_id):
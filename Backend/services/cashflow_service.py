@@ -16,11 +16,15 @@ Risk score (0–100):
   - Low risk (0–39): healthy projected balance
   - Volatility factor adds up to 15 points
 
+Multiple horizons (get_forecasts) share one set of inputs and one
+projection over the widest horizon; each horizon is a prefix of it.
+
 Design: deterministic, explainable, idempotent. No ML.
 """
 import time
 from datetime import date, timedelta
 
+from models import account as acct_model
 from models import cashflow_forecast as cf_model
 from models import recurring_merchant as rm_model
 from utils.errors import ValidationError
@@ -45,7 +49,7 @@ MIN_CONFIDENCE_FOR_SUBS = 50   # Min subscription confidence for projection
 
 def get_forecast(user_id: int, account_id: str = "all",
                  horizon_days: int = 7,
-                 starting_balance: float = None) -> dict:
+                 starting_balance: float = None, window=None) -> dict:
     """
     Generate (or return cached) a cash flow forecast.
 
@@ -53,59 +57,96 @@ def get_forecast(user_id: int, account_id: str = "all",
         user_id: Authenticated user
         account_id: plaid_account_id or "all"
         horizon_days: 7, 14, or 30
-        starting_balance: Current balance (from Plaid); None = use 0
+        starting_balance: Current balance; None = cached Plaid balance (0 if none)
+        window: TransactionWindow to read spend/income from instead of querying
 
     Returns:
         Full forecast dict matching the cashflow_forecasts schema.
     """
-    if horizon_days not in VALID_HORIZONS:
+    return get_forecasts(user_id, account_id, [horizon_days],
+                         starting_balance=starting_balance, window=window)[0]
+
+
+def get_forecasts(user_id: int, account_id: str = "all",
+                  horizons=VALID_HORIZONS,
+                  starting_balance: float = None, window=None) -> list:
+    """
+    Generate (or return cached) forecasts for several horizons at once.
+
+    Inputs (balance, spend / income averages, volatility, upcoming
+    subscriptions for the widest horizon) are fetched once; every horizon
+    is a prefix of one daily projection. Fresh forecasts are persisted in
+    a single batched upsert.
+
+    Args:
+        horizons: iterable of horizon_days, each 7, 14, or 30
+        (others as in get_forecast)
+
+    Returns:
+        Forecast dicts in ascending horizon order.
+    """
+    horizons = sorted(set(horizons or ()))
+    if not horizons or any(h not in VALID_HORIZONS for h in horizons):
         raise ValidationError(f"horizon_days must be one of {VALID_HORIZONS}")
 
     account_id = account_id if account_id and account_id != "all" else "all"
     today_str = str(date.today())
 
     # ── Try cache first ──
+    forecasts = {}
     try:
-        cached = cf_model.find_forecast(user_id, account_id, today_str, horizon_days)
-        if cached:
-            log.info("Returning cached forecast",
-                     extra={"context": {"user_id": user_id, "horizon": horizon_days}})
-            return cached
+        forecasts = cf_model.find_forecasts(user_id, account_id, today_str, horizons)
+        if forecasts:
+            log.info("Returning cached forecasts",
+                     extra={"context": {"user_id": user_id,
+                                        "horizons": sorted(forecasts)}})
     except Exception:
         log.warning("Cache lookup failed, regenerating",
                     extra={"context": {"user_id": user_id}})
 
-    # ── Compute fresh forecast ──
+    missing = [h for h in horizons if h not in forecasts]
+    if not missing:
+        return [forecasts[h] for h in horizons]
+
+    # ── Compute fresh forecasts ──
     t0 = time.monotonic()
 
+    if starting_balance is None:
+        starting_balance = _server_balance(user_id, account_id)
     balance = starting_balance if starting_balance is not None else 0.0
-    daily_spend = cf_model.fetch_daily_spending_avg(
-        user_id, account_id, LOOKBACK_SPEND_DAYS
-    )
-    daily_income = cf_model.fetch_daily_income_avg(
-        user_id, account_id, LOOKBACK_INCOME_DAYS
-    )
-    volatility = cf_model.fetch_spend_volatility(
-        user_id, account_id, LOOKBACK_SPEND_DAYS
-    )
+    if window is not None:
+        daily_spend = window.daily_spending_avg(account_id, LOOKBACK_SPEND_DAYS)
+        daily_income = window.daily_income_avg(account_id, LOOKBACK_INCOME_DAYS)
+        volatility = window.spend_volatility(account_id, LOOKBACK_SPEND_DAYS)
+    else:
+        daily_spend = cf_model.fetch_daily_spending_avg(
+            user_id, account_id, LOOKBACK_SPEND_DAYS
+        )
+        daily_income = cf_model.fetch_daily_income_avg(
+            user_id, account_id, LOOKBACK_INCOME_DAYS
+        )
+        volatility = cf_model.fetch_spend_volatility(
+            user_id, account_id, LOOKBACK_SPEND_DAYS
+        )
 
-    # ── Fetch upcoming subscriptions ──
-    upcoming_subs = _get_subscription_schedule(
-        user_id, account_id, horizon_days
-    )
+    # ── Fetch upcoming subscriptions once, for the widest horizon ──
+    widest = missing[-1]
+    upcoming_subs = _get_subscription_schedule(user_id, account_id, widest)
     # Build a day→total_subs map
     sub_by_day = {}
     for sub in upcoming_subs:
         sub_by_day.setdefault(sub["expected_date"], 0)
         sub_by_day[sub["expected_date"]] += sub["amount"]
 
-    # ── Project day by day ──
+    # ── Project day by day over the widest horizon ──
+    # Each horizon is a prefix: snapshot (end, min, min date) after h days.
     projected = []
     running_balance = balance
     min_balance = balance
     min_balance_date = today_str
+    snapshots = {}
 
-    for day_offset in range(horizon_days):
+    for day_offset in range(widest):
         d = date.today() + timedelta(days=day_offset)
         d_str = str(d)
 
@@ -130,8 +171,46 @@ def get_forecast(user_id: int, account_id: str = "all",
             min_balance = running_balance
             min_balance_date = d_str
 
-    end_balance = running_balance
+        if day_offset + 1 in missing:
+            snapshots[day_offset + 1] = (running_balance, min_balance, min_balance_date)
+
+    fresh = []
+    for horizon in missing:
+        end_balance, h_min_balance, h_min_date = snapshots[horizon]
+        horizon_end = str(date.today() + timedelta(days=horizon))
+        fresh.append(_build_forecast(
+            user_id, account_id, today_str, horizon, balance,
+            end_balance, h_min_balance, h_min_date, projected[:horizon],
+            daily_spend, daily_income, volatility,
+            [s for s in upcoming_subs if s["expected_date"] <= horizon_end],
+        ))
+
+    # ── Persist ──
+    try:
+        cf_model.upsert_forecast_many(fresh)
+    except Exception:
+        log.warning("Failed to persist forecasts, returning computed result",
+                    extra={"context": {"user_id": user_id}})
+
+    elapsed = round((time.monotonic() - t0) * 1000, 1)
+
+    log.info("Forecasts computed",
+             extra={"context": {
+                 "user_id": user_id,
+                 "horizons": missing,
+                 "risk_scores": [f["risk_score"] for f in fresh],
+                 "elapsed_ms": elapsed,
+             }})
+
+    forecasts.update((f["horizon_days"], f) for f in fresh)
+    return [forecasts[h] for h in horizons]
 
+
+def _build_forecast(user_id: int, account_id: str, today_str: str, horizon_days: int,
+                    balance: float, end_balance: float, min_balance: float,
+                    min_balance_date: str, projected: list, daily_spend: float,
+                    daily_income: float, volatility: float, upcoming_subs: list) -> dict:
+    """Score and explain one horizon's projection."""
     # ── Compute risk score ──
     risk_score = _compute_risk_score(min_balance, volatility)
 
@@ -160,35 +239,6 @@ def get_forecast(user_id: int, account_id: str = "all",
         "risk_rationale": _risk_rationale(risk_score, min_balance, volatility),
     }
 
-    # ── Persist ──
-    try:
-        cf_model.upsert_forecast(
-            user_id=user_id,
-            account_id=account_id,
-            as_of_date=today_str,
-            horizon_days=horizon_days,
-            starting_balance=round(balance, 2),
-            projected_end_balance=round(end_balance, 2),
-            min_projected_balance=round(min_balance, 2),
-            risk_score=round(risk_score, 2),
-            projected_daily_balances=projected,
-            drivers_json=drivers,
-            explanation_json=explanation,
-        )
-    except Exception:
-        log.warning("Failed to persist forecast, returning computed result",
-                    extra={"context": {"user_id": user_id}})
-
-    elapsed = round((time.monotonic() - t0) * 1000, 1)
-
-    log.info("Forecast computed",
-             extra={"context": {
-                 "user_id": user_id,
-                 "horizon": horizon_days,
-                 "risk_score": round(risk_score, 2),
-                 "elapsed_ms": elapsed,
-             }})
-
     return {
         "user_id": user_id,
         "account_id": account_id,
@@ -261,6 +311,20 @@ def _get_subscription_schedule(user_id: int, account_id: str,
         return []
 
 
+# ═══════════════════════════════════════════════════
+# Balance
+# ═══════════════════════════════════════════════════
+
+def _server_balance(user_id: int, account_id: str):
+    """Current balance from the local accounts table, or None."""
+    try:
+        return acct_model.fetch_current_balance(user_id, account_id)
+    except Exception:
+        log.warning("Could not fetch cached balance for forecast",
+                    extra={"context": {"user_id": user_id}})
+        return None
+
+
 # ═══════════════════════════════════════════════════
 # Explanation Builders
 # ═══════════════════════════════════════════════════
@@ -10,12 +10,18 @@ Computes a composite Financial Health Score (0-100) from four metrics:
 Algorithm: deterministic, explainable, idempotent. No ML.
 Caching: returns same-day cached result if available.
 Edge cases: safe defaults for zero income, new accounts, missing data.
+Batch: generate_scores_many() precomputes the cache for a chunk of users ×
+windows from set-based queries, scoring them as NumPy arrays with
+vectorized twins of the component scorers (same formulas, same results).
 """
 import time
 from datetime import date
 
+import numpy as np
+
+from models import account as acct_model
 from models import health_score as hs_model
-from utils.errors import ValidationError
+from utils.errors import DatabaseError, ValidationError
 from utils.logger import get_logger
 
 log = get_logger("health_score_service")
@@ -43,7 +49,8 @@ def get_health_score(user_id: int, account_id: str = "all",
                      window_days: int = 90,
                      current_balance: float = None,
                      total_income_override: float = None,
-                     total_spending_override: float = None) -> dict:
+                     total_spending_override: float = None,
+                     window=None) -> dict:
     """
     Compute (or return cached) the Financial Health Score.
 
@@ -51,12 +58,14 @@ def get_health_score(user_id: int, account_id: str = "all",
         user_id: Authenticated user
         account_id: plaid_account_id or "all"
         window_days: Analysis window (30, 60, or 90 days)
-        current_balance: Real-time balance from frontend (optional)
+        current_balance: Real-time balance from frontend (optional);
+            defaults to the cached Plaid balance
         total_income_override: Income from loaded transactions (optional).
             When provided, used for the savings ratio so the score matches
             what the summary cards display. Cache is skipped.
         total_spending_override: Spending from loaded transactions (optional).
             Paired with total_income_override.
+        window: TransactionWindow to compute metrics from instead of querying
 
     Returns:
         Full health score dict matching the API response spec.
@@ -88,16 +97,28 @@ def get_health_score(user_id: int, account_id: str = "all",
     # 1. Fetch raw metrics
     # Use frontend overrides for income/spending when provided so the savings
     # rate matches the summary cards exactly; fall back to DB aggregates.
-    total_income = (total_income_override
-                    if total_income_override is not None
-                    else hs_model.fetch_total_income(user_id, account_id, window_days))
-    total_spending = (total_spending_override
-                      if total_spending_override is not None
-                      else hs_model.fetch_total_spending(user_id, account_id, window_days))
-    volatility_cv = hs_model.fetch_daily_spending_stddev(user_id, account_id, window_days)
+    if window is not None:
+        total_income = (total_income_override
+                        if total_income_override is not None
+                        else window.total_income(account_id, window_days))
+        total_spending = (total_spending_override
+                          if total_spending_override is not None
+                          else window.total_spending(account_id, window_days))
+        volatility_cv = window.daily_spending_stddev(account_id, window_days)
+        daily_spend_avg = window.daily_spending_avg(account_id, min(window_days, 30))
+        txn_count = window.transaction_count(account_id, window_days)
+    else:
+        total_income = (total_income_override
+                        if total_income_override is not None
+                        else hs_model.fetch_total_income(user_id, account_id, window_days))
+        total_spending = (total_spending_override
+                          if total_spending_override is not None
+                          else hs_model.fetch_total_spending(user_id, account_id, window_days))
+        volatility_cv = hs_model.fetch_daily_spending_stddev(user_id, account_id, window_days)
+        daily_spend_avg = hs_model.fetch_daily_spending_avg(user_id, account_id,
+                                                            min(window_days, 30))
+        txn_count = hs_model.fetch_transaction_count(user_id, account_id, window_days)
     monthly_recurring = hs_model.fetch_monthly_recurring_total(user_id, account_id)
-    daily_spend_avg = hs_model.fetch_daily_spending_avg(user_id, account_id, min(window_days, 30))
-    txn_count = hs_model.fetch_transaction_count(user_id, account_id, window_days)
 
     # No transactions at all — return early with no_data flag, no scores computed
     if txn_count == 0:
@@ -105,6 +126,8 @@ def get_health_score(user_id: int, account_id: str = "all",
                  extra={"context": {"user_id": user_id}})
         return {"no_data": True}
 
+    if current_balance is None:
+        current_balance = _server_balance(user_id, account_id)
     balance = current_balance if current_balance is not None else 0.0
 
     # 2. Compute derived metrics
@@ -131,44 +154,19 @@ def get_health_score(user_id: int, account_id: str = "all",
     # 5. Insufficient data check
     has_enough_data = txn_count >= MIN_TRANSACTIONS
 
-    # 6. Build component scores dict
-    component_scores = {
-        "savings": round(savings_score),
-        "volatility": round(volatility_score),
-        "subscriptions": round(subscription_score),
-        "cash_buffer": round(buffer_score),
-    }
-
-    # 7. Build explanation
-    explanation = _build_explanation(
-        health_score=health_score,
-        savings_ratio=savings_ratio,
-        savings_score=savings_score,
-        volatility_cv=volatility_cv,
-        volatility_score=volatility_score,
-        recurring_burden=recurring_burden,
-        subscription_score=subscription_score,
-        cash_buffer_days=cash_buffer_days,
-        buffer_score=buffer_score,
-        has_enough_data=has_enough_data,
-        window_days=window_days,
+    # 6. Build component scores and explanation
+    score = _build_score(
+        user_id, account_id, today_str, window_days, health_score,
+        savings_ratio, volatility_cv, recurring_burden, cash_buffer_days,
+        savings_score, volatility_score, subscription_score, buffer_score,
+        has_enough_data,
     )
+    component_scores = score["component_scores"]
+    explanation = score["explanation_json"]
 
-    # 8. Persist
+    # 7. Persist
     try:
-        hs_model.upsert_score(
-            user_id=user_id,
-            account_id=account_id,
-            as_of_date=today_str,
-            analysis_window_days=window_days,
-            health_score=health_score,
-            savings_ratio=round(savings_ratio, 4),
-            volatility_score=round(volatility_cv, 4),
-            recurring_burden=round(recurring_burden, 4),
-            cash_buffer_days=round(cash_buffer_days, 2),
-            component_scores=component_scores,
-            explanation_json=explanation,
-        )
+        hs_model.upsert_score(**score)
     except Exception:
         log.warning("Failed to persist health score, returning computed result",
                     extra={"context": {"user_id": user_id}})
@@ -199,6 +197,134 @@ def get_health_score(user_id: int, account_id: str = "all",
     }
 
 
+def generate_scores_many(user_ids: list, windows=VALID_WINDOWS) -> dict:
+    """
+    Compute and cache today's all-accounts score for many users × windows
+    (batch jobs; feed it chunks of users). Inputs come from a few
+    set-based queries and are scored as arrays; results are identical to
+    get_health_score() with no overrides. User/window pairs without
+    transactions are skipped, as get_health_score() returns no_data for them.
+
+    Returns:
+        { "scores": int, "as_of_date": str }
+    """
+    windows = sorted(set(int(w) for w in windows))
+    invalid = [w for w in windows if w not in VALID_WINDOWS]
+    if invalid:
+        raise ValidationError(f"window_days must be one of {VALID_WINDOWS}")
+
+    today_str = str(date.today())
+    user_ids = sorted(set(user_ids))
+    if not user_ids or not windows:
+        return {"scores": 0, "as_of_date": today_str}
+
+    # ── Inputs: one row per (user, window) with transactions ──
+    inputs = hs_model.fetch_metric_inputs_many(user_ids, windows)
+    if not inputs:
+        return {"scores": 0, "as_of_date": today_str}
+
+    uids = np.array(user_ids)
+    row_user, row_window, income, spending, recent_spending, txn_count = (
+        np.array(col) for col in zip(*inputs)
+    )
+    row_user = np.searchsorted(uids, row_user)   # → index into user_ids
+
+    volatility_cv = _daily_spending_cv_many(
+        hs_model.fetch_daily_spending_many(user_ids, max(windows)),
+        uids, row_user, row_window,
+    )
+    recurring = hs_model.fetch_monthly_recurring_totals(user_ids)
+    balances = acct_model.fetch_current_balances(user_ids)
+    monthly_recurring = np.array([recurring.get(u, 0.0) for u in user_ids])[row_user]
+    balance = np.array([balances.get(u, 0.0) for u in user_ids])[row_user]
+
+    # ── Derived metrics and component scores, as arrays ──
+    daily_spend_avg = _round_many(recent_spending / np.minimum(row_window, 30), 2)
+    savings_ratio = _compute_savings_ratio_many(income, spending)
+    monthly_income = income / np.maximum(row_window / 30, 1)
+    recurring_burden = _compute_recurring_burden_many(monthly_recurring, monthly_income)
+    cash_buffer_days = _compute_cash_buffer_days_many(balance, daily_spend_avg)
+
+    savings_score = _score_savings_ratio_many(savings_ratio)
+    volatility_score = _score_volatility_many(volatility_cv)
+    subscription_score = _score_recurring_burden_many(recurring_burden)
+    buffer_score = _score_cash_buffer_many(cash_buffer_days)
+
+    raw_score = (
+        WEIGHTS["savings"] * savings_score
+        + WEIGHTS["volatility"] * volatility_score
+        + WEIGHTS["subscriptions"] * subscription_score
+        + WEIGHTS["cash_buffer"] * buffer_score
+    )
+    health_score = np.rint(np.clip(raw_score, 0, 100)).astype(int)
+
+    # ── Explanations are templated per row ──
+    columns = zip(
+        uids[row_user].tolist(), row_window.tolist(), health_score.tolist(),
+        savings_ratio.tolist(), volatility_cv.tolist(),
+        recurring_burden.tolist(), cash_buffer_days.tolist(),
+        savings_score.tolist(), volatility_score.tolist(),
+        subscription_score.tolist(), buffer_score.tolist(),
+        (txn_count >= MIN_TRANSACTIONS).tolist(),
+    )
+    scores = [
+        _build_score(user_id, "all", today_str, window_days, *rest)
+        for user_id, window_days, *rest in columns
+    ]
+
+    try:
+        hs_model.upsert_score_many(scores)
+    except Exception as e:
+        log.error(f"Bulk health score upsert failed: {e}", exc_info=True,
+                  extra={"context": {"users": len(user_ids)}})
+        raise DatabaseError("Failed to save health scores")
+
+    return {"scores": len(scores), "as_of_date": today_str}
+
+
+def _build_score(user_id: int, account_id: str, as_of_date: str,
+                 window_days: int, health_score: int, savings_ratio: float,
+                 volatility_cv: float, recurring_burden: float,
+                 cash_buffer_days: float, savings_score: float,
+                 volatility_score: float, subscription_score: float,
+                 buffer_score: float, has_enough_data: bool) -> dict:
+    """Component scores and explanation for computed metrics. Returns upsert_score() kwargs."""
+    component_scores = {
+        "savings": round(savings_score),
+        "volatility": round(volatility_score),
+        "subscriptions": round(subscription_score),
+        "cash_buffer": round(buffer_score),
+    }
+
+    explanation = _build_explanation(
+        health_score=health_score,
+        savings_ratio=savings_ratio,
+        savings_score=savings_score,
+        volatility_cv=volatility_cv,
+        volatility_score=volatility_score,
+        recurring_burden=recurring_burden,
+        subscription_score=subscription_score,
+        cash_buffer_days=cash_buffer_days,
+        buffer_score=buffer_score,
+        has_enough_data=has_enough_data,
+        window_days=window_days,
+    )
+
+    return {
+        "user_id": user_id,
+        "account_id": account_id,
+        "as_of_date": as_of_date,
+        "analysis_window_days": window_days,
+        "health_score": health_score,
+        "savings_ratio": round(savings_ratio, 4),
+        "volatility_score": round(volatility_cv, 4),
+        "recurring_burden": round(recurring_burden, 4),
+        "cash_buffer_days": round(cash_buffer_days, 2),
+        "component_scores": component_scores,
+        "explanation_json": explanation,
+    }
+
+
 # ═══════════════════════════════════════════════════
 # Metric Computation
 # ═══════════════════════════════════════════════════
@@ -218,6 +344,16 @@ def _compute_recurring_burden(monthly_recurring: float,
     return monthly_recurring / monthly_income
 
 
+def _server_balance(user_id: int, account_id: str):
+    """Current balance from the local accounts table, or None."""
+    try:
+        return acct_model.fetch_current_balance(user_id, account_id)
+    except Exception:
+        log.warning("Could not fetch cached balance for health score",
+                    extra={"context": {"user_id": user_id}})
+        return None
+
+
 def _compute_cash_buffer_days(balance: float,
                                 daily_spend_avg: float) -> float:
     """Cash Buffer Days = current balance / avg daily spend."""
@@ -324,6 +460,120 @@ def _score_cash_buffer(buffer_days: float) -> float:
         return 5
 
 
+# ═══════════════════════════════════════════════════
+# Batch Computation (NumPy twins of the functions above)
+# ═══════════════════════════════════════════════════
+# Each branch repeats its scalar counterpart's arithmetic in the same order,
+# so a row scores exactly as it would one user at a time.
+
+def _daily_spending_cv_many(daily_rows: list, uids, row_user, row_window):
+    """
+    fetch_daily_spending_stddev() for each (user, window) row: population
+    CV of the window's daily spending totals, 0 below two days, capped at 2.
+    """
+    cv = np.zeros(len(row_user))
+    if not daily_rows:
+        return cv
+
+    day_user, day_age, day_total = (np.array(col) for col in zip(*daily_rows))
+    day_user = np.searchsorted(uids, day_user)
+
+    for window_days in np.unique(row_window):
+        in_window = day_age <= window_days
+        users, totals = day_user[in_window], day_total[in_window]
+
+        days = np.bincount(users, minlength=len(uids))
+        sums = np.bincount(users, weights=totals, minlength=len(uids))
+        mean = np.divide(sums, days, out=np.zeros(len(uids)), where=days > 0)
+        variance = np.bincount(users, weights=(totals - mean[users]) ** 2,
+                               minlength=len(uids))
+        variance = np.divide(variance, days, out=np.zeros(len(uids)), where=days > 0)
+        ok = (days >= 2) & (mean != 0)
+        window_cv = np.divide(np.sqrt(variance), mean,
+                              out=np.zeros(len(uids)), where=ok)
+
+        rows = row_window == window_days
+        cv[rows] = window_cv[row_user[rows]]
+
+    return _round_many(np.minimum(cv, 2.0), 4)
+
+
+def _compute_savings_ratio_many(total_income, total_spending):
+    safe_income = np.where(total_income > 0, total_income, 1)
+    return np.where(total_income <= 0,
+                    np.where(total_spending > 0, -1.0, 0.0),
+                    (total_income - total_spending) / safe_income)
+
+
+def _compute_recurring_burden_many(monthly_recurring, monthly_income):
+    safe_income = np.where(monthly_income > 0, monthly_income, 1)
+    return np.where(monthly_income <= 0,
+                    np.where(monthly_recurring > 0, 1.0, 0.0),
+                    monthly_recurring / safe_income)
+
+
+def _compute_cash_buffer_days_many(balance, daily_spend_avg):
+    safe_avg = np.where(daily_spend_avg > 0, daily_spend_avg, 1)
+    return np.where(daily_spend_avg <= 0,
+                    np.where(balance > 0, 999.0, 0.0),
+                    balance / safe_avg)
+
+
+def _score_savings_ratio_many(ratio):
+    return np.select(
+        [ratio >= 0.30, ratio >= 0.20, ratio >= 0.10, ratio >= 0],
+        [100.0,
+         80 + (ratio - 0.20) / 0.10 * 20,
+         60 + (ratio - 0.10) / 0.10 * 20,
+         40 + ratio / 0.10 * 20],
+        np.maximum(0, 10 + ratio * 20),
+    )
+
+
+def _score_volatility_many(cv):
+    return np.select(
+        [cv <= 0, cv <= 0.3, cv <= 0.6, cv <= 1.0, cv <= 1.5],
+        [100.0,
+         100 - (cv / 0.3) * 25,
+         75 - ((cv - 0.3) / 0.3) * 25,
+         50 - ((cv - 0.6) / 0.4) * 25,
+         25 - ((cv - 1.0) / 0.5) * 20],
+        5.0,
+    )
+
+
+def _score_recurring_burden_many(burden):
+    return np.select(
+        [burden < 0.05, burden < 0.10, burden < 0.20, burden < 0.30],
+        [100.0,
+         80 + (0.10 - burden) / 0.05 * 20,
+         60 + (0.20 - burden) / 0.10 * 20,
+         40 + (0.30 - burden) / 0.10 * 20],
+        np.maximum(10, 20 - (burden - 0.30) / 0.20 * 10),
+    )
+
+
+def _score_cash_buffer_many(buffer_days):
+    return np.select(
+        [buffer_days >= 90, buffer_days >= 60, buffer_days >= 30,
+         buffer_days >= 15, buffer_days > 0],
+        [100.0,
+         80 + (buffer_days - 60) / 30 * 20,
+         60 + (buffer_days - 30) / 30 * 20,
+         40 + (buffer_days - 15) / 15 * 20,
+         20 + buffer_days / 15 * 20],
+        5.0,
+    )
+
+
+def _round_many(values, ndigits: int):
+    """
+    Python's round() per element. np.round scales by 10**ndigits first and
+    can land one unit off; these values feed the scorers, so they must match.
+    """
+    return np.array([round(v, ndigits) for v in values.tolist()])
+
+
 # ═══════════════════════════════════════════════════
 # Explanation Generator
 # ═══════════════════════════════════════════════════
@@ -12,6 +12,9 @@ Architecture decisions:
   • Date math lives exclusively here (not in routes, not in frontend).
   • Cache key = (user_id, account_id, start_date, end_date).
     Same range requested twice → cache hit, regardless of granularity label.
+  • Batch generation (generate_reports_many) aggregates a whole chunk of
+    users in the same 5 queries, set-based, and reuses the per-report
+    derivation below, so bulk and on-demand reports are identical.
   • Old weekly_reports table is untouched; the /v1/insights/weekly/latest
     endpoint still works for backwards compatibility. New code writes to
     time_range_reports exclusively.
@@ -118,8 +121,7 @@ def generate_time_range_report(user_id: int, account_id: str,
 
     # ── Previous period of same length ──
     range_days = (end_date - start_date).days + 1
-    prev_end = start_date - timedelta(days=1)
-    prev_start = prev_end - timedelta(days=range_days - 1)
+    prev_start, prev_end = _previous_period(start_date, end_date)
 
     log.info(
         "Generating report",
@@ -151,47 +153,12 @@ def generate_time_range_report(user_id: int, account_id: str,
         )
         raise DatabaseError("Failed to aggregate transaction data")
 
-    # ── Step 2: Period-over-period change ──
-    period_change = _compute_period_change(
-        data["total_spent"], data["prev_period_spent"]
-    )
-
-    # ── Step 3: Volatility ──
-    volatility = _compute_volatility(
-        data["daily_spending"], start_date, end_date
-    )
-
-    # ── Step 4: Explanation ──
-    period_label = _period_label(granularity, range_days)
-    explanation = _build_explanation(
-        total_spent=data["total_spent"],
-        total_income=data["total_income"],
-        net_change=data["net_change"],
-        top_merchants=data["top_merchants"],
-        top_categories=data["top_categories"],
-        period_change=period_change,
-        volatility=volatility,
-        txn_count=data["transaction_count"],
-        period_label=period_label,
-    )
+    # ── Steps 2–4: Period change, volatility, explanation ──
+    report = _build_report(user_id, account_id, data, start_date, end_date, granularity)
 
     # ── Step 5: Upsert ──
     try:
-        report_id = report_model.upsert_report(
-            user_id=user_id,
-            account_id=account_id,
-            start_date=start_str,
-            end_date=end_str,
-            granularity=granularity,
-            total_spent=data["total_spent"],
-            total_income=data["total_income"],
-            net_change=data["net_change"],
-            top_merchants=data["top_merchants"],
-            top_categories=data["top_categories"],
-            volatility_score=volatility,
-            period_change=period_change,
-            explanation_json=explanation,
-        )
+        report_id = report_model.upsert_report(**report)
     except Exception as e:
         log.error(
             f"Upsert failed: {e}",
@@ -207,7 +174,7 @@ def generate_time_range_report(user_id: int, account_id: str,
             "user_id": user_id,
             "report_id": report_id,
             "total_spent": data["total_spent"],
-            "volatility": volatility,
+            "volatility": report["volatility_score"],
             "elapsed_ms": elapsed_ms,
         }},
     )
@@ -222,9 +189,98 @@ def generate_time_range_report(user_id: int, account_id: str,
         "net_change": round(data["net_change"], 2),
         "top_merchants": data["top_merchants"],
         "top_categories": data["top_categories"],
-        "period_change": period_change,
+        "period_change": report["period_change"],
+        "volatility_score": report["volatility_score"],
+        "explanation": report["explanation_json"],
+    }
+
+
+def generate_reports_many(user_ids: list, range_type: str = "week",
+                          offset: int = 0, per_account: bool = True) -> dict:
+    """
+    Generate one range's reports for many users in a handful of
+    set-based queries (batch jobs). Feed it chunks of users.
+
+    Every user gets an all-accounts report; with per_account, each Plaid
+    account with activity gets its own. All are written with one bulk upsert.
+
+    Returns:
+        { "reports": int, "start_date": str, "end_date": str }
+    """
+    start_date, end_date, granularity = _resolve_range(range_type, offset=offset)
+    prev_start, prev_end = _previous_period(start_date, end_date)
+
+    try:
+        aggregates = report_model.aggregate_range_data_many(
+            user_ids, str(start_date), str(end_date),
+            str(prev_start), str(prev_end), per_account=per_account,
+        )
+    except Exception as e:
+        log.error(f"Bulk aggregation failed: {e}", exc_info=True,
+                  extra={"context": {"users": len(user_ids)}})
+        raise DatabaseError("Failed to aggregate transaction data")
+
+    reports = [
+        _build_report(user_id, account_id, data, start_date, end_date, granularity)
+        for (user_id, account_id), data in aggregates.items()
+    ]
+
+    try:
+        report_model.upsert_report_many(reports)
+    except Exception as e:
+        log.error(f"Bulk upsert failed: {e}", exc_info=True,
+                  extra={"context": {"users": len(user_ids)}})
+        raise DatabaseError("Failed to save reports")
+
+    return {"reports": len(reports), "start_date": str(start_date),
+            "end_date": str(end_date)}
+
+
+def _build_report(user_id: int, account_id: str, data: dict,
+                  start_date, end_date, granularity: str) -> dict:
+    """
+    Derive period change, volatility and explanation from aggregates.
+    Returns upsert_report() kwargs.
+    """
+    range_days = (end_date - start_date).days + 1
+
+    # ── Period-over-period change ──
+    period_change = _compute_period_change(
+        data["total_spent"], data["prev_period_spent"]
+    )
+
+    # ── Volatility ──
+    volatility = _compute_volatility(
+        data["daily_spending"], start_date, end_date
+    )
+
+    # ── Explanation ──
+    explanation = _build_explanation(
+        total_spent=data["total_spent"],
+        total_income=data["total_income"],
+        net_change=data["net_change"],
+        top_merchants=data["top_merchants"],
+        top_categories=data["top_categories"],
+        period_change=period_change,
+        volatility=volatility,
+        txn_count=data["transaction_count"],
+        period_label=_period_label(granularity, range_days),
+    )
+
+    return {
+        "user_id": user_id,
+        "account_id": account_id,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "granularity": granularity,
+        "total_spent": data["total_spent"],
+        "total_income": data["total_income"],
+        "net_change": data["net_change"],
+        "top_merchants": data["top_merchants"],
+        "top_categories": data["top_categories"],
         "volatility_score": volatility,
-        "explanation": explanation,
+        "period_change": period_change,
+        "explanation_json": explanation,
     }
 
 
@@ -371,6 +427,13 @@ def _normalize_account_id(account_id):
     return account_id if account_id and account_id != "all" else "all"
 
 
+def _previous_period(start_date, end_date) -> tuple:
+    """The same-length window immediately before [start_date, end_date]."""
+    range_days = (end_date - start_date).days + 1
+    prev_end = start_date - timedelta(days=1)
+    return prev_end - timedelta(days=range_days - 1), prev_end
+
+
 def _compute_period_change(current_spent: float, prev_spent: float) -> float:
     """
     Period-over-period spending change as a percentage.
@@ -4,6 +4,10 @@ Handles link tokens, token exchange, account fetching, and transaction sync.
 No HTTP concepts. Pure business orchestration.
 """
 import json
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
 import plaid
 from plaid.model.link_token_create_request import LinkTokenCreateRequest
 from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
@@ -11,12 +15,16 @@ from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchan
 from plaid.model.transactions_sync_request import TransactionsSyncRequest
 from plaid.model.accounts_get_request import AccountsGetRequest
 from plaid.model.item_remove_request import ItemRemoveRequest
+from plaid.model.webhook_verification_key_get_request import WebhookVerificationKeyGetRequest
 from plaid.model.products import Products
 from plaid.model.country_code import CountryCode
 
+from config import Config
+from models import account as acct_model
 from models import plaid_item as item_model
 from models import transaction as txn_model
-from utils.encryption import encrypt_token, decrypt_token
+from utils.db import atomic, db_scope
+from utils.encryption import encrypt_token, decrypt_token, evict_token
 from utils.errors import NotFoundError, PlaidError, ValidationError
 from utils.logger import get_logger
 
@@ -25,6 +33,19 @@ log = get_logger("plaid_service")
 # ── Plaid client (initialized by extensions.py) ──
 _plaid_client = None
 
+# ── Item sync concurrency ──
+# One executor for the whole process caps concurrent item syncs globally;
+# a semaphore per user caps how many of one user's items run at once.
+_sync_executor = ThreadPoolExecutor(
+    max_workers=Config.PLAID_SYNC_MAX_WORKERS, thread_name_prefix="plaid-sync"
+)
+_user_slots = weakref.WeakValueDictionary()   # user_id → BoundedSemaphore
+_user_slots_lock = threading.Lock()
+
+# Items with a background accounts refresh in flight
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
 
 def init_plaid_client(client):
     """Set the Plaid API client. Called once at startup."""
@@ -32,6 +53,12 @@ def init_plaid_client(client):
     _plaid_client = client
 
 
+def client_metrics() -> dict:
+    """Call counters, latency histograms and breaker states of the Plaid client."""
+    snapshot = getattr(_plaid_client, "snapshot", None)
+    return snapshot() if snapshot else {}
+
+
 # ═══════════════════════════════════════════════════
 # Link Token
 # ═══════════════════════════════════════════════════
@@ -39,12 +66,14 @@ def init_plaid_client(client):
 def create_link_token(user_id: int) -> str:
     """Generate a Plaid Link token for the frontend widget."""
     try:
+        options = {"webhook": Config.PLAID_WEBHOOK_URL} if Config.PLAID_WEBHOOK_URL else {}
         req = LinkTokenCreateRequest(
             products=[Products("transactions")],
             client_name="GuideSpend AI",
             country_codes=[CountryCode("US")],
             language="en",
             user=LinkTokenCreateRequestUser(client_user_id=str(user_id)),
+            **options,
         )
         resp = _plaid_client.link_token_create(req)
         log.info("Link token created", extra={"context": {"user_id": user_id}})
@@ -82,6 +111,14 @@ def exchange_public_token(user_id: int, public_token: str,
         institution_id=institution_id,
         institution_name=institution_name,
     )
+    evict_token(item_id)   # re-link replaces the token
+
+    # ── Seed the local accounts table so the first dashboard load is cached ──
+    try:
+        _refresh_accounts(user_id, item_id, institution_name, access_token)
+    except plaid.ApiException:
+        log.warning("Could not fetch accounts after link",
+                    extra={"context": {"item_id": item_id}})
 
     log.info(
         "Token exchanged and stored",
@@ -100,36 +137,39 @@ def exchange_public_token(user_id: int, public_token: str,
 # ═══════════════════════════════════════════════════
 
 def get_accounts(user_id: int) -> list:
-    """Fetch all linked bank accounts with real-time balances from Plaid."""
+    """
+    Linked bank accounts with balances, served from the local accounts table.
+
+    Items with no cached accounts are fetched from Plaid inline. Items older
+    than PLAID_ACCOUNTS_MAX_AGE are returned as cached and refreshed in the
+    background (stale-while-revalidate).
+    """
     items = item_model.find_tokens_for_accounts(user_id)
 
     if not items:
         return []
 
+    cached = {}
+    for acct in acct_model.find_by_user(user_id):
+        cached.setdefault(acct["item_id"], []).append(acct)
+
     all_accounts = []
+    stale_items = 0
 
     for encrypted_token, item_id, institution_name in items:
-        access_token = decrypt_token(encrypted_token)
+        rows = cached.get(item_id)
 
-        try:
-            req = AccountsGetRequest(access_token=access_token)
-            resp = _plaid_client.accounts_get(req)
-
-            for acct in resp["accounts"]:
-                all_accounts.append({
-                    "item_id": item_id,
-                    "institution_name": institution_name,
-                    "account_id": acct["account_id"],
-                    "name": acct["name"],
-                    "official_name": acct.get("official_name", ""),
-                    "type": str(acct["type"]),
-                    "subtype": str(acct.get("subtype", "")),
-                    "mask": acct.get("mask", ""),
-                    "current_balance": acct["balances"]["current"],
-                    "available_balance": acct["balances"].get("available"),
-                    "currency": acct["balances"].get("iso_currency_code", "USD"),
-                })
+        if rows:
+            if max(a.pop("age_seconds") for a in rows) > Config.PLAID_ACCOUNTS_MAX_AGE:
+                stale_items += 1
+                _schedule_accounts_refresh(user_id, item_id, institution_name, encrypted_token)
+            all_accounts.extend(rows)
+            continue
 
+        try:
+            all_accounts.extend(_refresh_accounts(
+                user_id, item_id, institution_name, decrypt_token(encrypted_token, item_id)
+            ))
         except plaid.ApiException as e:
             error_body = json.loads(e.body)
             all_accounts.append({
@@ -140,74 +180,117 @@ def get_accounts(user_id: int) -> list:
 
     log.info(
         "Accounts fetched",
-        extra={"context": {"user_id": user_id, "count": len(all_accounts)}},
+        extra={"context": {"user_id": user_id, "count": len(all_accounts),
+                           "stale_items": stale_items}},
     )
     return all_accounts
 
 
+def refresh_item_accounts(item_id: str):
+    """Queue a background accounts/balances refresh for one item."""
+    row = item_model.find_by_item_id(item_id)
+    if row:
+        _, user_id, encrypted_token, _, inst_name = row
+        _schedule_accounts_refresh(user_id, item_id, inst_name, encrypted_token)
+
+
+def _refresh_accounts(user_id: int, item_id: str, institution_name: str,
+                      access_token: str) -> list:
+    """Fetch an item's accounts from Plaid and store them. Raises plaid.ApiException."""
+    resp = _plaid_client.accounts_get(
+        AccountsGetRequest(access_token=access_token), institution=institution_name
+    )
+
+    accounts = [
+        {
+            "item_id": item_id,
+            "institution_name": institution_name,
+            "account_id": acct["account_id"],
+            "name": acct["name"],
+            "official_name": acct.get("official_name", ""),
+            "type": str(acct["type"]),
+            "subtype": str(acct.get("subtype", "")),
+            "mask": acct.get("mask", ""),
+            "current_balance": acct["balances"]["current"],
+            "available_balance": acct["balances"].get("available"),
+            "currency": acct["balances"].get("iso_currency_code", "USD"),
+        }
+        for acct in resp["accounts"]
+    ]
+    acct_model.upsert_many(user_id, item_id, accounts)
+    return accounts
+
+
+def _schedule_accounts_refresh(user_id: int, item_id: str, institution_name: str,
+                               encrypted_token: str):
+    """Refresh an item's accounts on the sync executor unless already in flight."""
+    with _refreshing_lock:
+        if item_id in _refreshing:
+            return
+        _refreshing.add(item_id)
+
+    def _run():
+        try:
+            _refresh_accounts(user_id, item_id, institution_name,
+                              decrypt_token(encrypted_token, item_id))
+        except Exception as e:
+            log.warning(f"Background accounts refresh failed: {e}",
+                        extra={"context": {"item_id": item_id}})
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(item_id)
+
+    _sync_executor.submit(_run)
+
+
 # ═══════════════════════════════════════════════════
 # Transaction Sync
 # ═══════════════════════════════════════════════════
 
-def sync_transactions(user_id: int) -> dict:
+def sync_transactions(user_id: int, on_page=None) -> dict:
     """
     Cursor-based incremental sync from Plaid.
     Fetches account names, tags every transaction with
     plaid_account_id + institution_name + account_name.
+
+    A user's items sync concurrently (bounded per user and globally).
+    Each item keeps its own cursor and errors: one failing institution
+    is reported in "items" without aborting the others.
+
+    on_page(added, modified, removed), if given, runs inside each page's
+    transaction (from the item's worker thread) for progress reporting.
     """
     items = item_model.find_by_user(user_id)
 
     if not items:
         raise NotFoundError("No linked bank accounts found. Connect a bank first.")
 
-    total_added = 0
-    total_modified = 0
-    total_removed = 0
-
-    for plaid_item_db_id, encrypted_token, saved_cursor, inst_name, item_id_str in items:
-        access_token = decrypt_token(encrypted_token)
-
-        # ── Build account_id → account_name map ──
-        account_name_map = _fetch_account_name_map(access_token)
+    slots = _user_slot(user_id)
+    futures = []
+    for item in items:
+        slots.acquire()
+        future = _sync_executor.submit(_sync_item_isolated, user_id, item, on_page)
+        future.add_done_callback(lambda _f: slots.release())
+        futures.append(future)
 
-        cursor = saved_cursor or ""
-        has_more = True
+    outcomes = [f.result() for f in futures]
+    results = [result for result, _ in outcomes]
+    errors = [exc for _, exc in outcomes if exc is not None]
 
-        while has_more:
-            try:
-                resp = _plaid_client.transactions_sync(
-                    TransactionsSyncRequest(access_token=access_token, cursor=cursor)
-                )
-            except plaid.ApiException as e:
-                _raise_plaid_error(e, "sync_transactions")
+    # Nothing synced at all → surface the error like a single-item sync would
+    if len(errors) == len(outcomes):
+        raise errors[0]
 
-            # ── ADDED ──
-            for txn in resp["added"]:
-                parsed = _parse_plaid_txn(txn, inst_name, account_name_map)
-                txn_model.upsert_plaid_transaction(user_id=user_id, **parsed)
-                total_added += 1
-
-            # ── MODIFIED ──
-            for txn in resp["modified"]:
-                parsed = _parse_plaid_txn(txn, inst_name, account_name_map)
-                txn_model.update_plaid_transaction(user_id=user_id, **parsed)
-                total_modified += 1
-
-            # ── REMOVED ──
-            for txn in resp["removed"]:
-                txn_model.delete_by_plaid_id(user_id, txn["transaction_id"])
-                total_removed += 1
-
-            cursor = resp["next_cursor"]
-            has_more = resp["has_more"]
-
-        # ── Persist cursor for next incremental sync ──
-        item_model.update_cursor(plaid_item_db_id, cursor)
+    total_added = sum(r.get("added", 0) for r in results)
+    total_modified = sum(r.get("modified", 0) for r in results)
+    total_removed = sum(r.get("removed", 0) for r in results)
 
     log.info(
         "Transaction sync complete",
         extra={"context": {
             "user_id": user_id,
+            "items": len(results),
+            "failed_items": len(errors),
             "added": total_added,
             "modified": total_modified,
             "removed": total_removed,
@@ -219,9 +302,129 @@ def sync_transactions(user_id: int) -> dict:
         "added": total_added,
         "modified": total_modified,
         "removed": total_removed,
+        "items": results,
+    }
+
+
+def sync_item(item_id: str) -> dict:
+    """
+    Sync a single plaid_item (webhook-driven). Runs on the shared sync
+    executor under the owner's per-user limit, like sync_transactions.
+    """
+    row = item_model.find_by_item_id(item_id)
+    if not row:
+        raise NotFoundError("Linked account not found")
+
+    plaid_item_db_id, user_id, encrypted_token, saved_cursor, inst_name = row
+    item = (plaid_item_db_id, encrypted_token, saved_cursor, inst_name, item_id)
+
+    with _user_slot(user_id):
+        result, exc = _sync_executor.submit(_sync_item_isolated, user_id, item).result()
+    if exc is not None:
+        raise exc
+
+    log.info("Item sync complete", extra={"context": {"user_id": user_id, **result}})
+    return result
+
+
+def _sync_item_isolated(user_id: int, item, on_page=None) -> tuple:
+    """
+    Run _sync_item in its own connection scope.
+    Returns (result, None), or (error entry, exception) if the item failed.
+    """
+    _, _, _, inst_name, item_id = item
+    try:
+        # Most of an item sync is Plaid HTTP; hold a connection only per page write
+        with db_scope(f"plaid_sync:{item_id}", hold=False):
+            return _sync_item(user_id, item, on_page), None
+    except Exception as e:
+        log.error(
+            f"Item sync failed: {e}",
+            extra={"context": {"user_id": user_id, "item_id": item_id}},
+        )
+        message = e.message if isinstance(e, PlaidError) else "Sync failed"
+        return {"item_id": item_id, "institution_name": inst_name, "error": message}, e
+
+
+def _sync_item(user_id: int, item, on_page=None) -> dict:
+    """
+    Sync one plaid_item. Each transactions_sync page is written in one
+    transaction together with the item's cursor, so an interrupted sync
+    resumes from the last committed page instead of replaying the history.
+    """
+    plaid_item_db_id, encrypted_token, saved_cursor, inst_name, item_id = item
+    access_token = decrypt_token(encrypted_token, item_id)
+
+    # ── Build account_id → account_name map (refreshes cached balances too) ──
+    account_name_map = _fetch_account_name_map(user_id, item_id, inst_name, access_token)
+
+    added_count = modified_count = removed_count = 0
+    cursor = saved_cursor or ""
+    has_more = True
+
+    while has_more:
+        try:
+            resp = _plaid_client.transactions_sync(
+                TransactionsSyncRequest(access_token=access_token, cursor=cursor),
+                institution=inst_name,
+            )
+        except plaid.ApiException as e:
+            _raise_plaid_error(e, "sync_transactions")
+
+        added = [_parse_plaid_txn(t, inst_name, account_name_map) for t in resp["added"]]
+        modified = [_parse_plaid_txn(t, inst_name, account_name_map) for t in resp["modified"]]
+        removed = [t["transaction_id"] for t in resp["removed"]]
+        cursor = resp["next_cursor"]
+        has_more = resp["has_more"]
+
+        # ── Apply the page + advance the cursor atomically ──
+        with atomic():
+            txn_model.upsert_plaid_transaction_many(user_id, added + modified)
+            txn_model.delete_by_plaid_ids(user_id, removed)
+            item_model.update_cursor(plaid_item_db_id, cursor)
+            if on_page:
+                on_page(len(added), len(modified), len(removed))
+
+        added_count += len(added)
+        modified_count += len(modified)
+        removed_count += len(removed)
+
+    return {
+        "item_id": item_id,
+        "institution_name": inst_name,
+        "added": added_count,
+        "modified": modified_count,
+        "removed": removed_count,
     }
 
 
+def _user_slot(user_id: int) -> threading.BoundedSemaphore:
+    """Per-user concurrency limiter, shared by concurrent requests for that user."""
+    with _user_slots_lock:
+        slot = _user_slots.get(user_id)
+        if slot is None:
+            slot = threading.BoundedSemaphore(Config.PLAID_SYNC_PER_USER)
+            _user_slots[user_id] = slot
+        return slot
+
+
+# ═══════════════════════════════════════════════════
+# Webhook verification keys
+# ═══════════════════════════════════════════════════
+
+def get_webhook_verification_key(key_id: str) -> dict:
+    """Fetch the JWK Plaid signs webhooks with. Returns None on API errors."""
+    try:
+        resp = _plaid_client.webhook_verification_key_get(
+            WebhookVerificationKeyGetRequest(key_id=key_id)
+        )
+        return resp["key"].to_dict()
+    except plaid.ApiException as e:
+        log.warning(f"Could not fetch webhook verification key: {e.status}",
+                    extra={"context": {"key_id": key_id}})
+        return None
+
+
 # ═══════════════════════════════════════════════════
 # Disconnect
 # ═══════════════════════════════════════════════════
@@ -240,17 +443,18 @@ def disconnect_item(user_id: int, item_id: str) -> dict:
         raise NotFoundError("Linked account not found")
 
     _, encrypted_token = row
-    access_token = decrypt_token(encrypted_token)
+    access_token = decrypt_token(encrypted_token, item_id)
 
-    # ── Step 1: Get account IDs for targeted deletion ──
-    account_ids = []
-    try:
-        req = AccountsGetRequest(access_token=access_token)
-        resp = _plaid_client.accounts_get(req)
-        account_ids = [a["account_id"] for a in resp["accounts"]]
-    except plaid.ApiException:
-        log.warning("Could not fetch accounts for disconnect — will skip transaction cleanup",
-                     extra={"context": {"item_id": item_id}})
+    # ── Step 1: Get account IDs for targeted deletion (cached, else Plaid) ──
+    account_ids = acct_model.find_account_ids_by_item(item_id)
+    if not account_ids:
+        try:
+            req = AccountsGetRequest(access_token=access_token)
+            resp = _plaid_client.accounts_get(req)
+            account_ids = [a["account_id"] for a in resp["accounts"]]
+        except plaid.ApiException:
+            log.warning("Could not fetch accounts for disconnect — will skip transaction cleanup",
+                         extra={"context": {"item_id": item_id}})
 
     # ── Step 2: Revoke with Plaid ──
     try:
@@ -261,8 +465,10 @@ def disconnect_item(user_id: int, item_id: str) -> dict:
     # ── Step 3: Delete only this item's transactions ──
     removed_txns = txn_model.delete_by_account_ids(user_id, account_ids)
 
-    # ── Step 4: Delete the plaid_item record ──
+    # ── Step 4: Delete cached accounts and the plaid_item record ──
+    acct_model.delete_by_item_id(item_id)
     item_model.delete_by_item_id_and_user(item_id, user_id)
+    evict_token(item_id)
 
     log.info(
         "Account disconnected",
@@ -279,12 +485,12 @@ def disconnect_item(user_id: int, item_id: str) -> dict:
 # Private Helpers
 # ═══════════════════════════════════════════════════
 
-def _fetch_account_name_map(access_token: str) -> dict:
-    """Fetch {account_id: account_name} from Plaid for a given access token."""
+def _fetch_account_name_map(user_id: int, item_id: str, institution_name: str,
+                            access_token: str) -> dict:
+    """Refresh an item's accounts and return {account_id: account_name}."""
     try:
-        req = AccountsGetRequest(access_token=access_token)
-        resp = _plaid_client.accounts_get(req)
-        return {a["account_id"]: a["name"] for a in resp["accounts"]}
+        accounts = _refresh_accounts(user_id, item_id, institution_name, access_token)
+        return {a["account_id"]: a["name"] for a in accounts}
     except plaid.ApiException:
         return {}
 
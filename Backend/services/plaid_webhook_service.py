@@ -0,0 +1,131 @@
+"""
+Plaid webhook service — turns Plaid webhooks into targeted item syncs.
+
+  TRANSACTIONS / SYNC_UPDATES_AVAILABLE (and legacy update codes)
+      → debounced sync of just that item
+  ITEM / ERROR, PENDING_EXPIRATION, USER_PERMISSION_REVOKED, ...
+      → item status recorded on plaid_items
+  ITEM / LOGIN_REPAIRED → status cleared + sync
+  ITEM / NEW_ACCOUNTS_AVAILABLE → accounts refresh
+
+Debouncing: syncs are queued in job_queue (job type plaid_webhook_sync,
+one item per user, run by jobs.worker), so pending syncs are shared by
+every web process and survive restarts. The first webhook for a user's
+items queues a sync PLAID_WEBHOOK_DEBOUNCE_SECONDS out; webhooks arriving
+before it runs only add their item to it. Webhooks arriving while it
+runs queue exactly one follow-up sync.
+"""
+from config import Config
+from models import job_queue as queue_model
+from models import plaid_item as item_model
+from services import plaid_service
+from utils.errors import NotFoundError, ValidationError
+from utils.logger import get_logger
+
+log = get_logger("plaid_webhook_service")
+
+_SYNC_CODES = {
+    "SYNC_UPDATES_AVAILABLE",
+    "INITIAL_UPDATE",
+    "HISTORICAL_UPDATE",
+    "DEFAULT_UPDATE",
+    "TRANSACTIONS_REMOVED",
+}
+
+_ITEM_STATUS = {
+    "ERROR": "error",
+    "PENDING_EXPIRATION": "pending_expiration",
+    "PENDING_DISCONNECT": "pending_expiration",
+    "USER_PERMISSION_REVOKED": "revoked",
+    "USER_ACCOUNT_REVOKED": "revoked",
+}
+
+SYNC_JOB_TYPE = "plaid_webhook_sync"
+
+
+# ═══════════════════════════════════════════════════
+# Public API
+# ═══════════════════════════════════════════════════
+
+def handle_webhook(payload: dict) -> dict:
+    """
+    Dispatch a verified Plaid webhook.
+    Returns { "status": "queued" | "debounced" | "updated" | "ignored" }.
+    """
+    webhook_type = payload.get("webhook_type")
+    code = payload.get("webhook_code")
+    item_id = payload.get("item_id")
+
+    if not webhook_type or not code:
+        raise ValidationError("webhook_type and webhook_code are required")
+
+    context = {"webhook_type": webhook_type, "webhook_code": code, "item_id": item_id}
+
+    item = item_model.find_by_item_id(item_id) if item_id else None
+    if not item:
+        log.info("Webhook for unknown item ignored", extra={"context": context})
+        return {"status": "ignored"}
+    user_id = item[1]
+
+    if webhook_type == "TRANSACTIONS" and code in _SYNC_CODES:
+        status = "queued" if schedule_item_sync(user_id, item_id) else "debounced"
+
+    elif webhook_type == "ITEM" and code in _ITEM_STATUS:
+        error_code = (payload.get("error") or {}).get("error_code") or code
+        item_model.update_status(item_id, _ITEM_STATUS[code], error_code)
+        status = "updated"
+
+    elif webhook_type == "ITEM" and code == "LOGIN_REPAIRED":
+        item_model.update_status(item_id, "ok")
+        schedule_item_sync(user_id, item_id)
+        status = "queued"
+
+    elif webhook_type == "ITEM" and code == "NEW_ACCOUNTS_AVAILABLE":
+        plaid_service.refresh_item_accounts(item_id)
+        status = "queued"
+
+    else:
+        status = "ignored"
+
+    log.info("Webhook handled", extra={"context": {**context, "status": status}})
+    return {"status": status}
+
+
+def schedule_item_sync(user_id: int, item_id: str) -> bool:
+    """
+    Schedule a debounced sync for one of the user's items.
+    Returns True if a new sync was queued, False if absorbed by one
+    already pending or running.
+    """
+    return queue_model.enqueue_debounced(
+        SYNC_JOB_TYPE, user_id, "item_ids", item_id,
+        Config.PLAID_WEBHOOK_DEBOUNCE_SECONDS, max_attempts=Config.JOB_MAX_ATTEMPTS,
+    )
+
+
+def sync_items(user_id: int, item_ids: list = None) -> dict:
+    """
+    Run a queued webhook sync: each listed item in turn (every linked item
+    when none are listed). A failing item is logged and reported without
+    failing the others; Plaid calls already retry transient errors.
+
+    Returns { "synced": int, "failed": [item_id, ...] }.
+    """
+    if not item_ids:
+        result = plaid_service.sync_transactions(user_id)
+        failed = [i["item_id"] for i in result.get("items", []) if i.get("error")]
+        return {"synced": len(result.get("items", [])) - len(failed), "failed": failed}
+
+    synced, failed = 0, []
+    for item_id in item_ids:
+        try:
+            plaid_service.sync_item(item_id)
+            synced += 1
+        except NotFoundError:
+            log.info("Webhook sync skipped — item removed",
+                     extra={"context": {"user_id": user_id, "item_id": item_id}})
+        except Exception as e:
+            failed.append(item_id)
+            log.error(f"Webhook-triggered sync failed: {e}",
+                      extra={"context": {"user_id": user_id, "item_id": item_id}})
+    return {"synced": synced, "failed": failed}
@@ -14,6 +14,7 @@ Algorithm:
 
 Design: deterministic, explainable, idempotent. No ML.
 """
+import json
 import math
 import time
 from datetime import date, timedelta
@@ -47,9 +48,10 @@ CADENCE_TEMPLATES = [
 # Public API
 # ═══════════════════════════════════════════════════
 
-def detect_subscriptions(user_id: int, account_id: str = "all") -> dict:
+def detect_subscriptions(user_id: int, account_id: str = "all", window=None) -> dict:
     """
     Run the full subscription detection pipeline for a user.
+    `window` (a TransactionWindow) replaces the transaction query when given.
 
     Returns:
         { "detected": int, "updated": int, "skipped": int, "elapsed_ms": float }
@@ -61,7 +63,10 @@ def detect_subscriptions(user_id: int, account_id: str = "all") -> dict:
              extra={"context": {"user_id": user_id, "account_id": account_id}})
 
     # ── Step 1: Fetch candidate transactions ──
-    txns = rm_model.fetch_expense_transactions(user_id, account_id, LOOKBACK_DAYS)
+    if window is not None:
+        txns = window.expense_transactions(account_id, LOOKBACK_DAYS)
+    else:
+        txns = rm_model.fetch_expense_transactions(user_id, account_id, LOOKBACK_DAYS)
 
     if not txns:
         log.info("No expense transactions found",
@@ -76,6 +81,7 @@ def detect_subscriptions(user_id: int, account_id: str = "all") -> dict:
     updated = 0
     skipped = 0
     active_keys = []
+    batch = []
 
     for merchant_key, group_data in merchant_groups.items():
         result = _analyze_merchant_group(
@@ -88,32 +94,28 @@ def detect_subscriptions(user_id: int, account_id: str = "all") -> dict:
             skipped += 1
             continue
 
+        row = _normalize_row({"user_id": user_id, "account_id": account_id, **result})
+        if row is None:
+            log.warning("Skipping invalid detection result",
+                        extra={"context": {"user_id": user_id, "merchant_key": merchant_key}})
+            skipped += 1
+            continue
+
         active_keys.append(merchant_key)
+        batch.append(row)
 
-        # ── Step 4: Upsert ──
+    # ── Step 4: Upsert (one statement for all merchants) ──
+    if batch:
         try:
-            rm_model.upsert(
-                user_id=user_id,
-                account_id=account_id,
-                merchant_key=result["merchant_key"],
-                merchant_display_name=result["merchant_display_name"],
-                cadence=result["cadence"],
-                avg_amount=result["avg_amount"],
-                amount_stddev=result["amount_stddev"],
-                amount_tolerance=result["amount_tolerance"],
-                last_charge_date=result["last_charge_date"],
-                next_expected_date=result["next_expected_date"],
-                confidence_score=result["confidence_score"],
-                sample_size=result["sample_size"],
-                last_n_transactions=result["last_n_transactions"],
-                explanation_json=result["explanation_json"],
-            )
-            detected += 1
-            updated += 1
+            rm_model.upsert_many(batch)
+            written = len(batch)
         except Exception as e:
-            log.error(f"Upsert failed for {merchant_key}: {e}",
-                      extra={"context": {"user_id": user_id}})
-            skipped += 1
+            log.warning(f"Bulk upsert failed, retrying row by row: {e}",
+                        extra={"context": {"user_id": user_id, "merchants": len(batch)}})
+            written = _upsert_each(user_id, batch)
+        detected += written
+        updated += written
+        skipped += len(batch) - written
 
     # ── Cleanup stale entries ──
     if active_keys:
@@ -157,6 +159,48 @@ def get_subscription_detail(recurring_id: int, user_id: int) -> dict:
     return result
 
 
+# ═══════════════════════════════════════════════════
+# Persistence
+# ═══════════════════════════════════════════════════
+
+_NUMERIC_FIELDS = ("avg_amount", "amount_stddev", "amount_tolerance", "confidence_score")
+
+
+def _normalize_row(row: dict) -> dict | None:
+    """
+    Coerce a detection result to what recurring_merchants accepts, or
+    None if it can't be stored (non-finite numbers, unserializable JSON).
+    """
+    try:
+        for field in _NUMERIC_FIELDS:
+            row[field] = float(row[field])
+            if not math.isfinite(row[field]):
+                return None
+        row["sample_size"] = int(row["sample_size"])
+        json.dumps(row["last_n_transactions"], allow_nan=False)
+        json.dumps(row["explanation_json"], allow_nan=False)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return row
+
+
+def _upsert_each(user_id: int, batch: list) -> int:
+    """
+    Fallback when the batch upsert fails: write rows one at a time so a
+    single bad row is logged and skipped instead of losing the rest.
+    Returns rows written.
+    """
+    written = 0
+    for row in batch:
+        try:
+            rm_model.upsert(**row)
+            written += 1
+        except Exception as e:
+            log.error(f"Upsert failed: {e}",
+                      extra={"context": {"user_id": user_id, "merchant_key": row["merchant_key"]}})
+    return written
+
+
 # ═══════════════════════════════════════════════════
 # Grouping
 # ═══════════════════════════════════════════════════
@@ -0,0 +1,132 @@
+"""
+Sync job service — runs Plaid syncs in the background with pollable progress.
+
+start_sync() records a job in sync_jobs and runs plaid_service.sync_transactions
+on a background thread, returning immediately. While a user's job is queued or
+running, further start_sync() calls attach to it instead of starting another.
+Progress (pages, added / modified / removed) is committed with each sync page,
+so any gunicorn worker can answer get_job().
+
+A running job also heartbeats from a timer thread, so a slow Plaid page
+doesn't make it look dead. If a job is failed as dead anyway, its runner
+stops at the next page instead of syncing alongside the replacement.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from models import plaid_item as item_model
+from models import sync_job as job_model
+from services import plaid_service
+from utils.errors import AppError, NotFoundError
+from utils.logger import get_logger
+
+log = get_logger("sync_job_service")
+
+# Job runners; item syncs inside a job still go through plaid_service's executor
+_job_executor = ThreadPoolExecutor(
+    max_workers=Config.SYNC_JOB_WORKERS, thread_name_prefix="sync-job"
+)
+
+
+# ═══════════════════════════════════════════════════
+# Public API
+# ═══════════════════════════════════════════════════
+
+def start_sync(user_id: int, trigger: str = "manual") -> dict:
+    """
+    Queue a sync for the user, or attach to the one already in progress.
+    Returns the job dict plus "attached": True when an existing job was reused.
+    """
+    if not item_model.find_by_user(user_id):
+        raise NotFoundError("No linked bank accounts found. Connect a bank first.")
+
+    job, created = job_model.create_or_attach(
+        user_id, trigger, Config.SYNC_JOB_STALE_SECONDS, Config.SYNC_JOB_QUEUED_MAX_SECONDS
+    )
+
+    if created:
+        _job_executor.submit(_run_job, job["job_id"], user_id)
+        log.info("Sync job queued",
+                 extra={"context": {"user_id": user_id, "job_id": job["job_id"],
+                                    "trigger": trigger}})
+    else:
+        log.info("Attached to running sync job",
+                 extra={"context": {"user_id": user_id, "job_id": job["job_id"]}})
+
+    return {**job, "attached": not created}
+
+
+def get_job(user_id: int, job_id: str) -> dict:
+    """Current status and progress of one of the user's sync jobs."""
+    job = job_model.find_by_id(job_id, user_id)
+    if not job:
+        raise NotFoundError("Sync job not found")
+    return job
+
+
+# ═══════════════════════════════════════════════════
+# Private Helpers
+# ═══════════════════════════════════════════════════
+
+class _JobAbandoned(Exception):
+    """The job was failed as dead while its runner was still going."""
+
+
+def _run_job(job_id: str, user_id: int):
+    """Execute a queued job and record the outcome. Never raises."""
+    try:
+        if not job_model.mark_running(job_id):
+            log.warning("Sync job no longer active, not starting",
+                        extra={"context": {"user_id": user_id, "job_id": job_id}})
+            return
+
+        def on_page(added, modified, removed):
+            # Raising rolls back the page being written
+            if not job_model.add_progress(job_id, 1, added, modified, removed):
+                raise _JobAbandoned(job_id)
+
+        with _Heartbeat(job_id, Config.SYNC_JOB_HEARTBEAT_SECONDS):
+            result = plaid_service.sync_transactions(user_id, on_page=on_page)
+        job_model.finish(job_id, "succeeded", items=result.get("items"))
+
+    except _JobAbandoned:
+        log.warning("Sync job abandoned after it was failed as dead",
+                    extra={"context": {"user_id": user_id, "job_id": job_id}})
+    except Exception as e:
+        message = e.message if isinstance(e, AppError) else "Sync failed"
+        log.error(f"Sync job failed: {e}",
+                  extra={"context": {"user_id": user_id, "job_id": job_id}})
+        try:
+            job_model.finish(job_id, "failed", error=message)
+        except Exception:
+            log.exception("Could not record sync job failure",
+                          extra={"context": {"job_id": job_id}})
+
+
+class _Heartbeat:
+    """Keeps a running job's heartbeat_at fresh every `interval` seconds until exit."""
+
+    def __init__(self, job_id: str, interval: float):
+        self._job_id = job_id
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True,
+                                        name=f"sync-job-heartbeat-{job_id[:8]}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+    def _beat(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                if not job_model.heartbeat(self._job_id):
+                    return   # no longer running; on_page aborts the sync
+            except Exception:
+                log.warning("Sync job heartbeat failed",
+                            extra={"context": {"job_id": self._job_id}})
@@ -0,0 +1,138 @@
+"""
+Transaction import service — bulk manual transactions from CSV / OFX files.
+
+The upload is parsed as a stream and validated in batches of
+IMPORT_BATCH_SIZE rows; each valid batch is COPYed into a staging table
+and everything is merged into transactions in one statement at the end
+(models.transaction.import_manual). Invalid rows are skipped and reported
+by line; rows already present (same date, amount and description) are
+skipped as duplicates, so importing the same file twice is harmless.
+"""
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from config import Config
+from models import transaction as txn_model
+from utils.errors import ValidationError
+from utils.logger import get_logger
+from utils.statement_parsers import parse_csv, parse_ofx
+
+log = get_logger("transaction_import_service")
+
+IMPORT_FORMATS = {"csv": parse_csv, "ofx": parse_ofx, "qfx": parse_ofx}
+
+# Error / duplicate lines listed in the response; the rest are only counted
+MAX_REPORTED_LINES = 500
+
+_MAX_AMOUNT = Decimal("1e12")
+
+
+def import_transactions(user_id: int, stream, filename: str = None, fmt: str = None) -> dict:
+    """
+    Import a CSV or OFX statement from a binary stream.
+    The format comes from `fmt`, else from the filename extension.
+
+    Returns:
+        {
+            "rows": int,            # transaction rows read from the file
+            "imported": int,
+            "duplicates": int,
+            "failed": int,
+            "duplicate_lines": [int, ...],                 # first MAX_REPORTED_LINES
+            "errors": [{"line": int, "error": str}, ...]   # first MAX_REPORTED_LINES
+        }
+    """
+    fmt = (fmt or _extension(filename) or "").lower()
+    if fmt not in IMPORT_FORMATS:
+        raise ValidationError(f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    report = {"rows": 0, "failed": 0, "errors": []}
+    batches = _valid_batches(IMPORT_FORMATS[fmt](text), report)
+    result = txn_model.import_manual(user_id, batches)
+
+    response = {
+        "rows": report["rows"],
+        "imported": result["inserted"],
+        "duplicates": len(result["duplicate_lines"]),
+        "failed": report["failed"],
+        "duplicate_lines": result["duplicate_lines"][:MAX_REPORTED_LINES],
+        "errors": report["errors"],
+    }
+    log.info(
+        "Transactions imported",
+        extra={"context": {"user_id": user_id, "format": fmt,
+                           **{k: v for k, v in response.items() if isinstance(v, int)}}},
+    )
+    return response
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _extension(filename: str):
+    if filename and "." in filename:
+        return filename.rsplit(".", 1)[1]
+    return None
+
+
+def _valid_batches(records, report: dict):
+    """
+    Validate parsed records, yielding batches of staging tuples and
+    recording rejected rows in report. Stops the import (ValidationError,
+    rolling back what was staged) past IMPORT_MAX_ROWS rows.
+    """
+    batch = []
+    for line, raw in records:
+        report["rows"] += 1
+        if report["rows"] > Config.IMPORT_MAX_ROWS:
+            raise ValidationError(f"Imports are limited to {Config.IMPORT_MAX_ROWS} rows per file")
+        try:
+            batch.append(_validate(line, raw))
+        except ValueError as e:
+            report["failed"] += 1
+            if len(report["errors"]) < MAX_REPORTED_LINES:
+                report["errors"].append({"line": line, "error": str(e)})
+            continue
+        if len(batch) >= Config.IMPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validate(line: int, raw: dict) -> tuple:
+    """One parsed record → (line, date, amount, description, category); ValueError if invalid."""
+    txn_date = _parse_date(raw.get("date", ""))
+    amount = _parse_amount(raw.get("amount", ""))
+    description = raw.get("description") or ""
+    category = raw.get("category") or "Uncategorized"
+    return line, txn_date, amount, description, category
+
+
+def _parse_date(value: str) -> date:
+    if not value:
+        raise ValueError("date is required")
+    for fmt in ("%Y-%m-%d", "%Y%m%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{value}'. Use YYYY-MM-DD")
+
+
+def _parse_amount(value: str) -> Decimal:
+    if not value:
+        raise ValueError("amount is required")
+    cleaned = value.replace(",", "").replace("$", "").strip()
+    if cleaned.startswith("(") and cleaned.endswith(")"):   # accounting negative
+        cleaned = "-" + cleaned[1:-1]
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{value}'")
+    if not amount.is_finite() or abs(amount) >= _MAX_AMOUNT:
+        raise ValueError(f"Invalid amount '{value}'")
+    return amount.quantize(Decimal("0.01"))
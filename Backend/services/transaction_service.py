@@ -1,14 +1,37 @@
 """
-Transaction service — CRUD operations and pagination.
+Transaction service — CRUD operations, pagination, search and export.
 Orchestrates model calls with validation.
 """
+import csv
+import io
+import json
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
 from models import transaction as txn_model
 from config import Config
 from utils.errors import ValidationError, NotFoundError
 from utils.logger import get_logger
+from utils.pagination import AFTER, BEFORE, decode_cursor, encode_cursor
 
 log = get_logger("transaction_service")
 
+# format → Content-Type of GET /transactions/export
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+SEARCH_SOURCES = ("manual", "plaid")
+
+# Search words shorter than this are ignored; at most this many are used
+_MIN_SEARCH_WORD = 2
+_MAX_SEARCH_WORDS = 8
+
+_EXPORT_COLUMNS = [
+    "id", "date", "amount", "category", "description",
+    "account_name", "institution_name", "plaid_account_id",
+    "source", "plaid_transaction_id", "created_at",
+]
+
 
 def add_manual_transaction(user_id: int, data: dict) -> dict:
     """
@@ -36,21 +59,57 @@ def add_manual_transaction(user_id: int, data: dict) -> dict:
 
 
 def get_transactions(user_id: int, account_id: str = None,
-                     page: int = None, per_page: int = None) -> dict:
+                     page: int = None, per_page: int = None,
+                     cursor: str = None, include_total: bool = True) -> dict:
     """
-    Retrieve paginated transactions, optionally filtered by account.
-    Returns { transactions: [...], pagination: {...} }.
+    Retrieve paginated transactions (newest first), optionally filtered by account.
+
+    Pages are addressed by `page` number, or by a `cursor` taken from a
+    previous response's next_cursor / prev_cursor. Cursor pages cost the
+    same at any depth; page numbers get slower the deeper they go.
+    Totals come from the maintained per-account counters; with
+    include_total=False they (total, total_pages, summary) are left out.
+
+    Returns { transactions: [...], pagination: {...}, summary: {...} }.
     """
-    page = page or Config.DEFAULT_PAGE
     per_page = per_page or Config.DEFAULT_PER_PAGE
     per_page = min(per_page, Config.MAX_PER_PAGE)
 
-    result = txn_model.find_paginated(
-        user_id=user_id,
-        account_id=account_id,
-        page=page,
-        per_page=per_page,
-    )
+    if cursor:
+        direction, row_date, row_id = decode_cursor(cursor)
+        after = direction == AFTER
+        result = txn_model.find_page_by_cursor(
+            user_id=user_id,
+            account_id=account_id,
+            per_page=per_page,
+            after=after,
+            row_date=row_date,
+            row_id=row_id,
+            include_total=include_total,
+        )
+        # Arriving from either side means rows exist on that side
+        has_next = result["has_more"] if after else True
+        has_prev = True if after else result["has_more"]
+        pagination = {"per_page": per_page}
+        if include_total:
+            pagination["total"] = result["summary"]["count"]
+    else:
+        page = page or Config.DEFAULT_PAGE
+        result = txn_model.find_paginated(
+            user_id=user_id,
+            account_id=account_id,
+            page=page,
+            per_page=per_page,
+            include_total=include_total,
+        )
+        has_next, has_prev = result["has_more"], page > 1
+        pagination = {"page": page, "per_page": per_page}
+        if include_total:
+            total = result["summary"]["count"]
+            pagination["total"] = total
+            pagination["total_pages"] = max(1, -(-total // per_page))  # Ceiling division
+
+    pagination.update(_cursors(result["transactions"], has_next, has_prev))
 
     log.info(
         "Transactions fetched",
@@ -58,10 +117,129 @@ def get_transactions(user_id: int, account_id: str = None,
             "user_id": user_id,
             "account_id": account_id,
             "page": page,
-            "total": result["pagination"]["total"],
+            "cursor": bool(cursor),
+            "total": pagination.get("total"),
+        }},
+    )
+    response = {"transactions": result["transactions"], "pagination": pagination}
+    if include_total:
+        response["summary"] = result["summary"]
+    return response
+
+
+def search_transactions(user_id: int, q: str = None, category: str = None,
+                        min_amount: str = None, max_amount: str = None,
+                        start: str = None, end: str = None, source: str = None,
+                        account_id: str = None, per_page: int = None,
+                        cursor: str = None) -> dict:
+    """
+    Search a user's transactions (newest first) by description / merchant
+    words and structured filters, paged with next_cursor / prev_cursor.
+
+    `q` matches words of the description (which carries the merchant
+    name), each word as a prefix: "star coff" finds "Starbucks Coffee".
+    Amounts are signed (spending is negative). Every filter is optional
+    and they combine with AND.
+
+    Searches the planner estimates above SEARCH_MAX_PLAN_COST are
+    rejected with a ValidationError rather than run; narrowing by date,
+    category or more specific text brings them under it.
+
+    Returns { transactions: [...], pagination: {per_page, next_cursor, prev_cursor} }.
+    """
+    per_page = min(per_page or Config.DEFAULT_PER_PAGE, Config.MAX_PER_PAGE)
+    start_date, end_date = _date_range(start, end)
+    filters = {
+        "text": _tsquery(q) if q else None,
+        "category": category or None,
+        "source": source or None,
+        "account_id": account_id or None,
+        "min_amount": _amount(min_amount, "min_amount"),
+        "max_amount": _amount(max_amount, "max_amount"),
+        "start": start_date,
+        "end": end_date,
+    }
+    if filters["source"] and filters["source"] not in SEARCH_SOURCES:
+        raise ValidationError(f"source must be one of: {', '.join(SEARCH_SOURCES)}")
+    if (filters["min_amount"] is not None and filters["max_amount"] is not None
+            and filters["min_amount"] > filters["max_amount"]):
+        raise ValidationError("'min_amount' must be less than or equal to 'max_amount'")
+
+    after, row_date, row_id = True, None, None
+    if cursor:
+        direction, row_date, row_id = decode_cursor(cursor)
+        after = direction == AFTER
+
+    result = txn_model.search(
+        user_id=user_id,
+        filters=filters,
+        per_page=per_page,
+        after=after,
+        row_date=row_date,
+        row_id=row_id,
+        max_cost=Config.SEARCH_MAX_PLAN_COST,
+    )
+    used = sorted(k for k, v in filters.items() if v is not None)
+    if result["rejected"]:
+        raise ValidationError(
+            "Search is too broad to run efficiently. Add a date range, a category "
+            "or more specific search text",
+            context={"user_id": user_id, "filters": used, "plan_cost": result["plan_cost"]},
+        )
+
+    if cursor:
+        has_next = result["has_more"] if after else True
+        has_prev = True if after else result["has_more"]
+    else:
+        has_next, has_prev = result["has_more"], False
+    pagination = {"per_page": per_page}
+    pagination.update(_cursors(result["transactions"], has_next, has_prev))
+
+    log.info(
+        "Transactions searched",
+        extra={"context": {
+            "user_id": user_id,
+            "filters": used,
+            "cursor": bool(cursor),
+            "plan_cost": result["plan_cost"],
+            "returned": len(result["transactions"]),
         }},
     )
-    return result
+    return {"transactions": result["transactions"], "pagination": pagination}
+
+
+def get_summary(user_id: int, account_id: str = None) -> dict:
+    """
+    Transaction count, income, spending and date range for the user (or
+    one account) — the dashboard summary cards, without reading any rows.
+    """
+    return txn_model.fetch_summary(user_id, account_id)
+
+
+def export_transactions(user_id: int, fmt: str = "csv", account_id: str = None,
+                        start: str = None, end: str = None):
+    """
+    Stream a user's transactions (newest first) as CSV or NDJSON text.
+    Optional account filter and inclusive YYYY-MM-DD start / end dates.
+
+    Arguments are validated before returning, so errors still become JSON
+    responses; the returned generator yields one text chunk per batch of
+    rows and reads from the database only as it is consumed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValidationError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    start_date, end_date = _date_range(start, end)
+
+    batches = txn_model.iter_export(
+        user_id=user_id,
+        account_id=account_id,
+        start=start_date,
+        end=end_date,
+        batch_size=Config.EXPORT_BATCH_SIZE,
+    )
+    encode = _csv_chunks if fmt == "csv" else _ndjson_chunks
+    return _logged_export(encode(batches), user_id, fmt)
 
 
 def delete_transaction(user_id: int, transaction_id: int) -> dict:
@@ -73,3 +251,95 @@ def delete_transaction(user_id: int, transaction_id: int) -> dict:
 
     log.info("Transaction deleted", extra={"context": {"user_id": user_id, "txn_id": transaction_id}})
     return {"message": "Transaction deleted successfully"}
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _cursors(transactions: list, has_next: bool, has_prev: bool) -> dict:
+    """next_cursor / prev_cursor for a page, None where there's nothing to go to."""
+    if not transactions:
+        return {"next_cursor": None, "prev_cursor": None}
+    first, last = transactions[0], transactions[-1]
+    return {
+        "next_cursor": encode_cursor(AFTER, last["date"], last["id"]) if has_next else None,
+        "prev_cursor": encode_cursor(BEFORE, first["date"], first["id"]) if has_prev else None,
+    }
+
+
+def _date_range(start: str, end: str) -> tuple:
+    """Optional YYYY-MM-DD start / end strings → (date | None, date | None)."""
+    try:
+        start_date = date.fromisoformat(start) if start else None
+        end_date = date.fromisoformat(end) if end else None
+    except ValueError:
+        raise ValidationError("Invalid date format. Use YYYY-MM-DD")
+    if start_date and end_date and start_date > end_date:
+        raise ValidationError("'start' must be before or equal to 'end'")
+    return start_date, end_date
+
+
+def _amount(value: str, name: str):
+    """Optional amount filter as a Decimal, compared as numeric so the amount index applies."""
+    if value is None or value == "":
+        return None
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError(f"'{name}' must be a number")
+    if not amount.is_finite():
+        raise ValidationError(f"'{name}' must be a number")
+    return amount
+
+
+def _tsquery(q: str) -> str:
+    """
+    Free text → to_tsquery('simple') string: every word a prefix match,
+    all required. Only letters and digits pass through, so user input
+    can't inject tsquery operators.
+    """
+    words = [w for w in re.findall(r"[^\W_]+", q.lower()) if len(w) >= _MIN_SEARCH_WORD]
+    if not words:
+        raise ValidationError(f"Search text needs a word of at least {_MIN_SEARCH_WORD} characters")
+    return " & ".join(f"{w}:*" for w in words[:_MAX_SEARCH_WORDS])
+
+
+def _csv_chunks(batches):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=_EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _ndjson_chunks(batches):
+    for batch in batches:
+        yield "".join(json.dumps(row) + "\n" for row in batch)
+
+
+def _logged_export(chunks, user_id: int, fmt: str):
+    """
+    Pass chunks through, logging how the export ended. Closing this
+    generator (client gone) closes the database cursor right away.
+    """
+    context = {"user_id": user_id, "format": fmt, "chunks": 0}
+    try:
+        for chunk in chunks:
+            context["chunks"] += 1
+            yield chunk
+    except GeneratorExit:
+        log.info("Transaction export aborted by client", extra={"context": context})
+        raise
+    except Exception:
+        # Headers are already sent; the client sees a truncated body
+        log.exception("Transaction export failed mid-stream", extra={"context": context})
+        raise
+    finally:
+        chunks.close()
+    log.info("Transaction export finished", extra={"context": context})
@@ -1,15 +1,106 @@
 """
 Database connection pool using psycopg2.pool.
 Provides a context manager for safe acquire/release of connections.
+
+Connection reuse:
+  Inside a unit of work (a job wrapped in db_scope()), the first get_db()
+  checks a connection out of the pool and every later get_db() in the
+  same unit reuses it. Outside a scope, each outermost get_db() checks
+  out and returns its own connection as before.
+
+  Flask requests (and other scopes opened with hold=False) give the
+  connection back whenever the outermost get_db() / atomic() block
+  ends, so a request doesn't keep one checked out while it waits on
+  Plaid or fans work out to other threads.
+
+  An outermost get_db() block is its own transaction (commit on success,
+  rollback on exception). A get_db() opened while another one is still
+  active on the same connection runs inside a SAVEPOINT, so a failing
+  inner block rolls back only its own statements.
+
+  atomic() groups several model calls into one all-or-nothing transaction:
+  get_db() blocks inside it join the transaction directly, without
+  savepoints, so a multi-statement write costs no extra round trips.
+
+Read replica:
+  get_db(readonly=True) runs on a separate pool configured by DB_REPLICA_*
+  settings. Without a replica, or while a primary transaction is open in
+  the same context (so the caller sees its own writes), it uses the primary.
+
+Prepared statements:
+  Hot queries are declared once with prepare_statement() and run with
+  execute_prepared(). Each pooled connection PREPAREs a statement the
+  first time it runs it and uses EXECUTE afterwards. Set
+  DB_PREPARED_STATEMENTS=false behind PgBouncer in transaction mode,
+  where server-side statements don't survive between transactions.
+
+Bulk writes:
+  bulk_upsert() writes many rows in one statement per page with
+  execute_values. Batches of DB_COPY_THRESHOLD rows or more are COPYed
+  into a temp table and merged with one INSERT ... SELECT; copy_rows()
+  exposes the COPY step for callers that stage rows themselves.
 """
+import contextvars
+import io
+import re
+import sys
+import threading
+import weakref
 from contextlib import contextmanager
-from psycopg2 import pool
+from psycopg2 import errors, extensions
+from psycopg2.extras import execute_values
 from config import Config
+from utils.db_pool import InstrumentedConnectionPool
 from utils.logger import get_logger
 
 log = get_logger("db")
 
 _pool = None
+_replica_pool = None
+
+# Connections bound to the current unit of work (request / job / thread)
+_binding = contextvars.ContextVar("db_binding", default=None)
+_replica_binding = contextvars.ContextVar("db_replica_binding", default=None)
+
+
+class _Binding:
+    """A pooled connection bound to the current context."""
+
+    __slots__ = ("conn", "pool", "readonly", "depth", "savepoints", "scoped", "hold",
+                 "site", "atomic")
+
+    def __init__(self, scoped: bool, site: str = None, readonly: bool = False,
+                 hold: bool = True):
+        self.conn = None
+        self.pool = None
+        self.readonly = readonly
+        self.depth = 0
+        self.savepoints = 0
+        self.scoped = scoped
+        self.hold = hold
+        self.site = site
+        self.atomic = False
+
+    def acquire(self, site: str):
+        if self.conn is None:
+            self.pool = _replica_pool if self.readonly else _pool
+            self.conn = self.pool.getconn(site=self.site or site)
+            if self.readonly:
+                self.conn.readonly = True
+        return self.conn
+
+    def release(self):
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        if not conn.closed and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                log.warning("Rollback on release failed; discarding connection")
+                self.pool.putconn(conn, close=True)
+                return
+        self.pool.putconn(conn)
 
 
 def init_pool():
@@ -22,9 +113,11 @@ def init_pool():
         "Initializing DB connection pool",
         extra={"context": {"host": Config.DB_HOST, "min": Config.DB_POOL_MIN, "max": Config.DB_POOL_MAX}},
     )
-    _pool = pool.ThreadedConnectionPool(
+    _pool = InstrumentedConnectionPool(
         minconn=Config.DB_POOL_MIN,
         maxconn=Config.DB_POOL_MAX,
+        name="primary",
+        acquire_timeout=Config.DB_POOL_ACQUIRE_TIMEOUT,
         host=Config.DB_HOST,
         port=Config.DB_PORT,
         database=Config.DB_NAME,
@@ -32,37 +125,416 @@ def init_pool():
         password=Config.DB_PASSWORD,
         sslmode=Config.DB_SSLMODE,
     )
+    _init_replica_pool()
+
+
+def _init_replica_pool():
+    """Initialize the read-only replica pool if DB_REPLICA_HOST is set."""
+    global _replica_pool
+    if not Config.DB_REPLICA_HOST:
+        log.info("No read replica configured — readonly queries use the primary")
+        return
+
+    log.info(
+        "Initializing DB replica pool",
+        extra={"context": {"host": Config.DB_REPLICA_HOST,
+                           "min": Config.DB_REPLICA_POOL_MIN, "max": Config.DB_REPLICA_POOL_MAX}},
+    )
+    _replica_pool = InstrumentedConnectionPool(
+        minconn=Config.DB_REPLICA_POOL_MIN,
+        maxconn=Config.DB_REPLICA_POOL_MAX,
+        name="replica",
+        acquire_timeout=Config.DB_POOL_ACQUIRE_TIMEOUT,
+        host=Config.DB_REPLICA_HOST,
+        port=Config.DB_REPLICA_PORT,
+        database=Config.DB_REPLICA_NAME,
+        user=Config.DB_REPLICA_USER,
+        password=Config.DB_REPLICA_PASSWORD,
+        sslmode=Config.DB_SSLMODE,
+    )
 
 
 def close_pool():
-    """Close all connections in the pool. Called at app shutdown."""
-    global _pool
+    """Close all connections in the pool(s). Called at app shutdown."""
+    global _pool, _replica_pool
+    if _replica_pool:
+        _replica_pool.closeall()
+        _replica_pool = None
+        log.info("DB replica pool closed")
     if _pool:
         _pool.closeall()
         _pool = None
         log.info("DB connection pool closed")
 
 
+def reset_pool_after_fork():
+    """
+    Forget pools inherited from a parent process so init_pool() builds fresh
+    ones. Inherited connections are dropped, not closed — closing them from
+    the child would end the parent's sessions on the shared sockets.
+    """
+    global _pool, _replica_pool
+    _pool = None
+    _replica_pool = None
+    _prepared_on.clear()
+
+
+def pool_metrics() -> dict:
+    """Snapshot of connection pool saturation metrics, keyed by pool name."""
+    return {p.name: p.snapshot() for p in (_pool, _replica_pool) if p is not None}
+
+
 @contextmanager
-def get_db():
+def get_db(readonly: bool = False):
     """
     Context manager that yields (conn, cur).
     Auto-commits on success, rolls back on exception,
     and always returns the connection to the pool.
 
+    Nested calls (and calls inside db_scope()) reuse the bound connection;
+    nested blocks run inside a savepoint instead of a new transaction.
+
+    readonly=True routes the block to the read replica when one is
+    configured (analytics / aggregation reads).
+
     Usage:
         with get_db() as (conn, cur):
             cur.execute("SELECT 1")
             rows = cur.fetchall()
     """
-    conn = _pool.getconn()
+    var = _replica_binding if _use_replica(readonly) else _binding
+    binding = var.get()
+    token = None
+    if binding is None:
+        binding = _Binding(scoped=False, readonly=var is _replica_binding)
+        token = var.set(binding)
+
+    try:
+        conn = binding.acquire(_call_site() if binding.conn is None else None)
+        if binding.depth == 0:
+            yield from _transaction(binding, conn)
+        elif binding.atomic and not binding.readonly:
+            yield from _joined(conn)
+        else:
+            yield from _savepoint(binding, conn)
+    finally:
+        if token is not None:
+            var.reset(token)
+            binding.release()
+        elif binding.depth == 0 and not binding.hold:
+            binding.release()
+
+
+def _use_replica(readonly: bool) -> bool:
+    """Replica only for readonly blocks that aren't inside a primary transaction."""
+    if not readonly or _replica_pool is None:
+        return False
+    primary = _binding.get()
+    return primary is None or primary.depth == 0
+
+
+def _call_site() -> str:
+    """'module.function' of the code that opened the get_db() block."""
+    frame = sys._getframe(3)  # _call_site ← get_db ← contextlib.__enter__ ← caller
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def _transaction(binding: _Binding, conn):
+    """Outermost block: one transaction, committed on success."""
     cur = conn.cursor()
+    binding.depth = 1
     try:
         yield conn, cur
         conn.commit()
-    except Exception:
+    except BaseException:
         conn.rollback()
         raise
+    finally:
+        binding.depth = 0
+        cur.close()
+
+
+def _savepoint(binding: _Binding, conn):
+    """Nested block: runs inside a savepoint of the enclosing transaction."""
+    binding.savepoints += 1
+    name = f"sp_{binding.savepoints}"
+    cur = conn.cursor()
+    cur.execute(f"SAVEPOINT {name}")
+    binding.depth += 1
+    try:
+        yield conn, cur
+        cur.execute(f"RELEASE SAVEPOINT {name}")
+    except BaseException:
+        if not conn.closed:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+        raise
+    finally:
+        binding.depth -= 1
+        cur.close()
+
+
+def _joined(conn):
+    """Block inside atomic(): shares the enclosing transaction as-is."""
+    cur = conn.cursor()
+    try:
+        yield conn, cur
     finally:
         cur.close()
-        _pool.putconn(conn)
+
+
+@contextmanager
+def atomic():
+    """
+    Run several model calls as one transaction.
+    get_db() blocks inside join it without savepoints; an exception
+    anywhere rolls back everything. Nested atomic() blocks are no-ops.
+
+    Usage:
+        with atomic():
+            txn_model.upsert_plaid_transaction_many(user_id, rows)
+            item_model.update_cursor(item_id, cursor)
+    """
+    with get_db():
+        binding = _binding.get()
+        previous, binding.atomic = binding.atomic, True
+        try:
+            yield
+        finally:
+            binding.atomic = previous
+
+
+# ──────────────────────────────────────────────
+# Unit-of-work scope
+# ──────────────────────────────────────────────
+
+@contextmanager
+def db_scope(label: str = None, hold: bool = True):
+    """
+    Bind one pooled connection to a unit of work (e.g. one user in a job).
+    The connection is checked out lazily by the first get_db() inside the
+    scope and returned to the pool when the scope exits. Re-entrant.
+    `label` names the holder in pool metrics (defaults to the first caller).
+
+    hold=False returns the connection after every outermost get_db() /
+    atomic() block instead, for units that spend most of their time off
+    the database (HTTP calls, waiting on other threads).
+    """
+    token = begin_scope(label, hold)
+    try:
+        yield
+    finally:
+        end_scope(token)
+
+
+def begin_scope(label: str = None, hold: bool = True):
+    """Start a connection scope. Returns a token for end_scope(), or None if already scoped."""
+    current = _binding.get()
+    if current is not None and current.scoped:
+        return None
+    return (
+        _binding.set(_Binding(scoped=True, site=label, hold=hold)),
+        _replica_binding.set(_Binding(scoped=True, site=label, readonly=True, hold=hold)),
+    )
+
+
+def end_scope(token):
+    """End a scope started by begin_scope() and release its connections."""
+    if token is None:
+        return
+    for var, var_token in zip((_binding, _replica_binding), token):
+        binding = var.get()
+        var.reset(var_token)
+        if binding is not None:
+            binding.release()
+
+
+def register_request_scope(app):
+    """
+    Give every Flask request its own connection scope. The connection is
+    only held for the duration of each outermost get_db() / atomic()
+    block, not across the Plaid calls and thread fan-out in between.
+    """
+
+    @app.before_request
+    def _open_db_scope():
+        from flask import g, request
+        g._db_scope_token = begin_scope(f"request:{request.endpoint}", hold=False)
+
+    @app.teardown_request
+    def _close_db_scope(exc):
+        from flask import g
+        end_scope(g.pop("_db_scope_token", None))
+
+
+# ──────────────────────────────────────────────
+# Prepared statement registry
+# ──────────────────────────────────────────────
+
+_PLACEHOLDER = re.compile(r"%(%|s)")
+
+_statements = {}                               # name → PreparedStatement
+_prepared_on = weakref.WeakKeyDictionary()     # connection → {prepared names}
+_prepared_lock = threading.Lock()
+
+
+class PreparedStatement:
+    """A named query declared once at import time."""
+
+    __slots__ = ("name", "sql", "server_sql", "param_count")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        counter = iter(range(1, sql.count("%s") + 1))
+        self.server_sql = _PLACEHOLDER.sub(
+            lambda m: "%" if m.group(1) == "%" else f"${next(counter)}", sql
+        )
+        self.param_count = sql.count("%s")
+
+
+def prepare_statement(name: str, sql: str) -> PreparedStatement:
+    """
+    Register a named query (psycopg2 %s placeholders).
+    Re-registering the same name with different SQL is a programming error.
+    """
+    existing = _statements.get(name)
+    if existing is not None:
+        if existing.sql != sql:
+            raise ValueError(f"Prepared statement '{name}' already registered with different SQL")
+        return existing
+    stmt = PreparedStatement(name, sql)
+    _statements[name] = stmt
+    return stmt
+
+
+def prepare_filtered(name: str, sql_template: str, clause: str) -> dict:
+    """
+    Register the unfiltered and filtered shapes of a query whose template
+    has a `{filter}` slot. Returns {False: unfiltered, True: filtered}.
+    """
+    return {
+        False: prepare_statement(name, sql_template.format(filter="")),
+        True: prepare_statement(f"{name}_filtered", sql_template.format(filter=clause)),
+    }
+
+
+def execute_prepared(cur, stmt: PreparedStatement, params=()):
+    """Run a registered statement on cur, preparing it on this connection first if needed."""
+    if not Config.DB_PREPARED_STATEMENTS:
+        cur.execute(stmt.sql, params)
+        return
+
+    conn = cur.connection
+    with _prepared_lock:
+        prepared = _prepared_on.setdefault(conn, set())
+
+    if stmt.name not in prepared:
+        cur.execute(f"PREPARE {stmt.name} AS {stmt.server_sql}")
+        prepared.add(stmt.name)
+
+    args = ", ".join(["%s"] * stmt.param_count)
+    try:
+        cur.execute(f"EXECUTE {stmt.name} ({args})" if args else f"EXECUTE {stmt.name}", params)
+    except errors.InvalidSqlStatementName:
+        # Server forgot it (session reset) — re-prepare on the next transaction
+        prepared.clear()
+        raise
+
+
+# ──────────────────────────────────────────────
+# Bulk writes
+# ──────────────────────────────────────────────
+
+def bulk_upsert(cur, table: str, columns: list, rows: list, conflict: str,
+                update: dict = None, where: str = None, defaults: dict = None,
+                returning: str = None, page_size: int = 500):
+    """
+    Multi-row INSERT ... ON CONFLICT for `rows` (tuples ordered like `columns`).
+
+    Args:
+        conflict:  conflict target, e.g. "(plaid_transaction_id)" or
+                   "ON CONSTRAINT uq_health_score_user_date_window"
+        update:    {column: SQL expression} for DO UPDATE SET; None = DO NOTHING
+        where:     optional DO UPDATE ... WHERE condition (e.g. IS DISTINCT FROM)
+        defaults:  {column: SQL expression} added to every row, e.g. {"created_at": "NOW()"}
+        returning: column to return; the result is then a list of values
+
+    Rows must be unique on the conflict target within one call.
+    Returns the number of rows written, or the RETURNING values.
+    """
+    if not rows:
+        return [] if returning else 0
+
+    defaults = defaults or {}
+    insert_cols = ", ".join(list(columns) + list(defaults))
+    on_conflict = _on_conflict_clause(conflict, update, where)
+    tail = f" RETURNING {returning}" if returning else ""
+
+    if len(rows) >= Config.DB_COPY_THRESHOLD:
+        return _copy_merge(cur, table, columns, rows, insert_cols, defaults,
+                           on_conflict + tail, returning)
+
+    template = "(" + ", ".join(["%s"] * len(columns) + list(defaults.values())) + ")"
+    sql = f"INSERT INTO {table} ({insert_cols}) VALUES %s {on_conflict}{tail}"
+
+    written = 0
+    returned = []
+    for i in range(0, len(rows), page_size):
+        page = rows[i:i + page_size]
+        result = execute_values(cur, sql, page, template=template,
+                                page_size=len(page), fetch=bool(returning))
+        if returning:
+            returned.extend(r[0] for r in result)
+        else:
+            written += cur.rowcount
+    return returned if returning else written
+
+
+def copy_rows(cur, table: str, columns: list, rows):
+    """COPY rows (tuples ordered like `columns`) into table in one round trip."""
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        _csv_buffer(rows),
+    )
+
+
+def _on_conflict_clause(conflict: str, update: dict, where: str) -> str:
+    if not update:
+        return f"ON CONFLICT {conflict} DO NOTHING"
+    assignments = ", ".join(f"{col} = {expr}" for col, expr in update.items())
+    clause = f"ON CONFLICT {conflict} DO UPDATE SET {assignments}"
+    return f"{clause} WHERE {where}" if where else clause
+
+
+def _copy_merge(cur, table, columns, rows, insert_cols, defaults,
+                conflict_tail, returning):
+    """COPY rows into a temp staging table, then merge with one INSERT ... SELECT."""
+    staging = f"_bulk_{table}"
+    col_list = ", ".join(columns)
+
+    cur.execute(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {col_list} FROM {table} WITH NO DATA"
+    )
+    copy_rows(cur, staging, columns, rows)
+    select_cols = ", ".join(list(columns) + list(defaults.values()))
+    cur.execute(
+        f"INSERT INTO {table} ({insert_cols}) "
+        f"SELECT {select_cols} FROM {staging} {conflict_tail}"
+    )
+    result = [r[0] for r in cur.fetchall()] if returning else cur.rowcount
+    cur.execute(f"DROP TABLE {staging}")
+    return result
+
+
+def _csv_buffer(rows) -> io.StringIO:
+    """Encode rows as COPY CSV. None → unquoted \\N (NULL); everything else quoted."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(",".join(
+            "\\N" if v is None else '"' + str(v).replace('"', '""') + '"'
+            for v in row
+        ))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
@@ -0,0 +1,171 @@
+"""
+Instrumented connection pool.
+
+Drop-in ThreadedConnectionPool that records:
+  • checkout latency (time spent waiting for a connection)
+  • hold duration per call site (checkout → return)
+  • in-use / idle counts, exhaustion events, acquire timeouts
+  • the slowest holds and the connections currently checked out
+
+Optionally blocks for up to `acquire_timeout` seconds when the pool is
+exhausted instead of raising PoolError immediately.
+"""
+import heapq
+import threading
+import time
+from collections import deque
+from psycopg2 import pool
+from utils.logger import get_logger
+
+log = get_logger("db_pool")
+
+_LATENCY_SAMPLES = 1000   # Rolling window for checkout percentiles
+_SLOWEST_KEPT = 10        # Slowest holds retained for the snapshot
+
+
+class InstrumentedConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool with saturation metrics and timed blocking acquire."""
+
+    def __init__(self, minconn, maxconn, *args, name="primary",
+                 acquire_timeout=0.0, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.name = name
+        self.acquire_timeout = max(float(acquire_timeout or 0), 0.0)
+        self._available = threading.Condition(self._lock)
+
+        self._checkouts = 0
+        self._exhausted = 0
+        self._timeouts = 0
+        self._waits = deque(maxlen=_LATENCY_SAMPLES)
+        self._holders = {}    # id(conn) → (site, checked_out_at)
+        self._sites = {}      # site → {"count", "total_ms", "max_ms"}
+        self._slowest = []    # min-heap of (held_ms, seq, site, returned_at)
+        self._seq = 0
+
+    # ── Acquire / release ──
+
+    def getconn(self, key=None, site="unknown"):
+        """Check out a connection, waiting up to acquire_timeout if exhausted."""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        exhausted = False
+
+        with self._available:
+            while True:
+                if self.closed:
+                    raise pool.PoolError("connection pool is closed")
+                try:
+                    conn = self._getconn(key)
+                    break
+                except pool.PoolError:
+                    if not exhausted:
+                        exhausted = True
+                        self._exhausted += 1
+                        log.warning(
+                            "DB connection pool exhausted",
+                            extra={"context": {"pool": self.name, "site": site,
+                                               "in_use": len(self._used), "max": self.maxconn}},
+                        )
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise pool.PoolError(
+                            f"connection pool '{self.name}' exhausted "
+                            f"({len(self._used)}/{self.maxconn} in use)"
+                        ) from None
+                    self._available.wait(remaining)
+
+            now = time.monotonic()
+            self._checkouts += 1
+            self._waits.append((now - start) * 1000)
+            self._holders[id(conn)] = (site, now)
+
+        return conn
+
+    def putconn(self, conn=None, key=None, close=False):
+        """Return a connection and record how long it was held."""
+        with self._available:
+            holder = self._holders.pop(id(conn), None)
+            try:
+                self._putconn(conn, key, close)
+            finally:
+                if holder:
+                    self._record_hold(holder[0], (time.monotonic() - holder[1]) * 1000)
+                self._available.notify()
+
+    def closeall(self):
+        """Close all connections and wake any waiters so they fail fast."""
+        with self._available:
+            self._closeall()
+            self._available.notify_all()
+
+    # ── Metrics ──
+
+    def _record_hold(self, site: str, held_ms: float):
+        stats = self._sites.setdefault(site, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += held_ms
+        stats["max_ms"] = max(stats["max_ms"], held_ms)
+
+        self._seq += 1
+        entry = (held_ms, self._seq, site, time.time())
+        if len(self._slowest) < _SLOWEST_KEPT:
+            heapq.heappush(self._slowest, entry)
+        elif held_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def snapshot(self) -> dict:
+        """Point-in-time metrics for dashboards and the /internal/pool endpoint."""
+        with self._available:
+            now = time.monotonic()
+            waits = sorted(self._waits)
+            sites = {
+                site: {
+                    "count": s["count"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 2),
+                    "max_ms": round(s["max_ms"], 2),
+                    "total_ms": round(s["total_ms"], 2),
+                }
+                for site, s in self._sites.items()
+            }
+            current = sorted(
+                ({"site": site, "held_ms": round((now - since) * 1000, 2)}
+                 for site, since in self._holders.values()),
+                key=lambda h: h["held_ms"],
+                reverse=True,
+            )
+            slowest = [
+                {"site": site, "held_ms": round(held_ms, 2), "returned_at": returned_at}
+                for held_ms, _, site, returned_at in sorted(self._slowest, reverse=True)
+            ]
+
+            return {
+                "name": self.name,
+                "min": self.minconn,
+                "max": self.maxconn,
+                "in_use": len(self._used),
+                "idle": len(self._pool),
+                "acquire_timeout_s": self.acquire_timeout,
+                "checkouts": self._checkouts,
+                "exhausted_events": self._exhausted,
+                "acquire_timeouts": self._timeouts,
+                "checkout_wait_ms": {
+                    "p50": _percentile(waits, 0.50),
+                    "p95": _percentile(waits, 0.95),
+                    "p99": _percentile(waits, 0.99),
+                    "max": round(waits[-1], 2) if waits else 0.0,
+                },
+                "hold_by_site": dict(sorted(
+                    sites.items(), key=lambda kv: kv[1]["total_ms"], reverse=True
+                )),
+                "slowest_holds": slowest,
+                "current_holders": current,
+            }
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return round(sorted_values[idx], 2)
@@ -1,24 +1,96 @@
 """
 Fernet symmetric encryption for sensitive tokens (Plaid access tokens).
 Tokens are encrypted before DB storage and decrypted only when needed for API calls.
+
+Key rotation:
+  PLAID_ENCRYPTION_KEY may hold several comma-separated Fernet keys, newest
+  first. New tokens are encrypted with the first key; any listed key can
+  decrypt. After adding a key, run jobs/rotate_encryption_key.py to re-encrypt
+  stored tokens, then drop the old key.
+
+Decrypted token cache:
+  decrypt_token(ciphertext, item_id=...) keeps the plaintext in a bounded
+  in-memory TTL cache keyed by (item_id, sha256(ciphertext)), so repeated
+  syncs of the same item skip Fernet's HMAC + AES work. A new ciphertext for
+  the item (re-link, rotation) never hits a stale entry. Plaintext tokens are
+  never logged.
 """
-from cryptography.fernet import Fernet
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from config import Config
 from utils.logger import get_logger
 
 log = get_logger("encryption")
 
 _fernet = None
+_primary = None
+
+
+class _TokenCache:
+    """LRU + TTL map of (item_id, ciphertext hash) → plaintext token."""
+
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self.max_items = max_items
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()   # key → (expires_at, plaintext)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, plaintext: str):
+        if self.max_items <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, plaintext)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def evict(self, item_id: str) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == item_id]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __repr__(self):
+        return f"<_TokenCache entries={len(self._entries)}>"   # never show plaintext
+
+
+_cache = _TokenCache(Config.TOKEN_CACHE_MAX_ITEMS, Config.TOKEN_CACHE_TTL_SECONDS)
 
 
 def init_fernet():
     """Initialize the Fernet cipher. Called once at app startup."""
-    global _fernet
-    key = Config.PLAID_ENCRYPTION_KEY
-    if not key:
+    global _fernet, _primary
+    keys = [k.strip() for k in (Config.PLAID_ENCRYPTION_KEY or "").split(",") if k.strip()]
+    if not keys:
         log.error("PLAID_ENCRYPTION_KEY not set — token encryption disabled")
         return
-    _fernet = Fernet(key.encode())
+    fernets = [Fernet(k.encode()) for k in keys]
+    _primary = fernets[0]
+    _fernet = MultiFernet(fernets)
+    _cache.clear()
+    if len(fernets) > 1:
+        log.info("Token encryption initialized with key rotation",
+                 extra={"context": {"keys": len(fernets)}})
 
 
 def encrypt_token(token: str) -> str:
@@ -28,8 +100,43 @@ def encrypt_token(token: str) -> str:
     return _fernet.encrypt(token.encode()).decode()
 
 
-def decrypt_token(encrypted_token: str) -> str:
-    """Decrypt a stored token for use in API calls."""
+def decrypt_token(encrypted_token: str, item_id: str = None) -> str:
+    """
+    Decrypt a stored token for use in API calls.
+    Pass item_id to serve repeat decryptions from the token cache.
+    """
     if not _fernet:
         raise RuntimeError("Fernet not initialized — cannot decrypt")
-    return _fernet.decrypt(encrypted_token.encode()).decode()
+
+    if item_id is None:
+        return _fernet.decrypt(encrypted_token.encode()).decode()
+
+    key = (item_id, hashlib.sha256(encrypted_token.encode()).hexdigest())
+    token = _cache.get(key)
+    if token is None:
+        token = _fernet.decrypt(encrypted_token.encode()).decode()
+        _cache.put(key, token)
+    return token
+
+
+def evict_token(item_id: str):
+    """Drop any cached plaintext for an item (disconnect, re-link)."""
+    _cache.evict(item_id)
+
+
+def needs_rotation(encrypted_token: str) -> bool:
+    """True if the token was not encrypted with the current (first) key."""
+    if not _primary:
+        raise RuntimeError("Fernet not initialized")
+    try:
+        _primary.decrypt(encrypted_token.encode())
+        return False
+    except InvalidToken:
+        return True
+
+
+def rotate_token(encrypted_token: str) -> str:
+    """Re-encrypt a stored token under the current key."""
+    if not _fernet:
+        raise RuntimeError("Fernet not initialized — cannot rotate")
+    return _fernet.rotate(encrypted_token.encode()).decode()
@@ -85,6 +85,10 @@ def register_error_handlers(app):
     def handle_405(error):
         return jsonify({"error": "Method not allowed"}), 405
 
+    @app.errorhandler(413)
+    def handle_413(error):
+        return jsonify({"error": "Upload too large"}), 413
+
     @app.errorhandler(500)
     def handle_500(error):
         log.error("Unhandled server error", exc_info=True)
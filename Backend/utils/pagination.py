@@ -0,0 +1,39 @@
+"""
+Opaque keyset-pagination cursors.
+
+A cursor names one row of a list ordered by (date DESC, id DESC) and a
+direction: "after" pages continue past it (older rows), "before" pages
+come back towards it (newer rows). Clients pass cursors back unchanged;
+the base64 wrapping only keeps them from being parsed or built by hand.
+"""
+import base64
+import binascii
+from datetime import date
+
+from utils.errors import ValidationError
+
+AFTER = "a"
+BEFORE = "b"
+
+
+def encode_cursor(direction: str, row_date, row_id: int) -> str:
+    """Cursor for the page after (AFTER) or before (BEFORE) the given row."""
+    raw = f"{direction}:{row_date}:{int(row_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Parse a cursor from encode_cursor().
+    Returns (direction, date, id); raises ValidationError if malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, row_date, row_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        )
+        if direction not in (AFTER, BEFORE):
+            raise ValueError(direction)
+        return direction, date.fromisoformat(row_date), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ValidationError("Invalid pagination cursor")
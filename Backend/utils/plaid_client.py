@@ -0,0 +1,397 @@
+"""
+Resilient Plaid client — wraps the generated PlaidApi.
+
+Every endpoint call goes through:
+  • a client-side token bucket per endpoint family (transactions, accounts,
+    item, link, ...) so bulk syncs run at the Plaid quota, not above it
+  • jittered exponential retry for transient errors (RATE_LIMIT_EXCEEDED,
+    INTERNAL_SERVER_ERROR, institution outages, HTTP 429/5xx, timeouts);
+    non-idempotent endpoints (token exchange, item removal) are only
+    retried when Plaid cannot have acted on the request
+  • a per-call timeout (optionally capped with max_timeout, e.g. by a
+    batch job's per-user time limit)
+  • a circuit breaker per institution: after repeated transient failures
+    calls for that institution fail fast until a cool-down has passed
+  • call / error / retry counters and latency histograms (snapshot())
+
+Callers use it exactly like PlaidApi. Pass `institution=` to put a call
+under that institution's breaker:
+
+    client.transactions_sync(req, institution="Chase")
+
+Errors still surface as plaid.ApiException; an open breaker raises one
+with status 503 and error_code CIRCUIT_OPEN.
+"""
+import json
+import random
+import threading
+import time
+from bisect import bisect_left
+
+import plaid
+import urllib3
+
+from config import Config
+from utils.logger import get_logger
+
+log = get_logger("plaid_client")
+
+# Client-wide requests per minute by endpoint family (Plaid production defaults)
+_DEFAULT_RATES = {
+    "transactions": 2500,
+    "accounts": 1200,
+    "item": 1200,
+    "link": 1000,
+    "webhook": 300,
+    "other": 600,
+}
+
+# Families that legitimately take longer (large transaction pages)
+_FAMILY_TIMEOUTS = {"transactions": 60.0}
+
+_RETRYABLE_CODES = {
+    "RATE_LIMIT_EXCEEDED",
+    "INTERNAL_SERVER_ERROR",
+    "PLANNED_MAINTENANCE",
+    "INSTITUTION_DOWN",
+    "INSTITUTION_NOT_RESPONDING",
+    "INSTITUTION_NOT_AVAILABLE",
+    "PRODUCT_NOT_READY",
+}
+_RETRYABLE_TYPES = {"RATE_LIMIT_EXCEEDED", "API_ERROR"}
+
+# Calls that must not run twice: a timeout or dropped connection may
+# come after Plaid already exchanged the token / removed the item
+_NON_IDEMPOTENT = {"item_public_token_exchange", "item_remove"}
+
+_LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+_BUCKET_LABELS = [
+    f"{lo}-{hi}ms" for lo, hi in zip((0,) + _LATENCY_BUCKETS_MS, _LATENCY_BUCKETS_MS)
+] + [f">{_LATENCY_BUCKETS_MS[-1]}ms"]
+
+
+class ResilientPlaidClient:
+    """PlaidApi proxy adding rate limiting, retries, timeouts and breakers."""
+
+    def __init__(self, api, rates: dict = None, max_retries: int = None,
+                 timeout: float = None, breaker_threshold: int = None,
+                 breaker_cooldown: float = None, max_timeout: float = None):
+        self._api = api
+        if rates is None:
+            rates = _parse_rates(Config.PLAID_RATE_LIMITS)
+        self._rates = {**_DEFAULT_RATES, **rates}
+        self._max_retries = Config.PLAID_MAX_RETRIES if max_retries is None else max_retries
+        self._timeout = Config.PLAID_TIMEOUT_SECONDS if timeout is None else timeout
+        self._max_timeout = max_timeout
+        self._breaker_threshold = breaker_threshold or Config.PLAID_BREAKER_THRESHOLD
+        self._breaker_cooldown = breaker_cooldown or Config.PLAID_BREAKER_COOLDOWN_SECONDS
+
+        self._lock = threading.Lock()
+        self._buckets = {}    # family → _TokenBucket
+        self._breakers = {}   # institution → _CircuitBreaker
+        self._stats = {}      # endpoint → counters + histogram
+
+    def __getattr__(self, name):
+        target = getattr(self._api, name)
+        if name.startswith("_") or not callable(target):
+            return target
+
+        def call(*args, institution: str = None, **kwargs):
+            return self._call(name, target, args, kwargs, institution)
+
+        call.__name__ = name
+        return call
+
+    # ── Call pipeline ──
+
+    def _call(self, endpoint, fn, args, kwargs, institution):
+        family = _family(endpoint)
+        breaker = self._breaker(institution)
+        timeout = max(self._timeout, _FAMILY_TIMEOUTS.get(family, 0.0))
+        if self._max_timeout:
+            timeout = min(timeout, self._max_timeout)
+        kwargs.setdefault("_request_timeout", timeout)
+
+        attempt = 0
+        while True:
+            if breaker and not breaker.allow():
+                self._count(endpoint, "circuit_open")
+                raise _circuit_open_error(institution)
+
+            waited = self._bucket(family).acquire(timeout)
+            if waited > 0:
+                self._count(endpoint, "throttled")
+
+            start = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                elapsed_ms = (time.monotonic() - start) * 1000
+                code = _error_code(e)
+                retryable = _is_retryable(e, endpoint)
+                self._record(endpoint, elapsed_ms, error=code)
+
+                if breaker:
+                    if _is_outage(e):
+                        breaker.failure()
+                    elif isinstance(e, plaid.ApiException):
+                        breaker.success()   # the institution answered, just not with data
+                    else:
+                        breaker.release()
+                if not retryable or attempt >= self._max_retries:
+                    raise
+
+                delay = _backoff(attempt)
+                attempt += 1
+                self._count(endpoint, "retries")
+                log.warning(
+                    "Retrying Plaid call",
+                    extra={"context": {"endpoint": endpoint, "code": code,
+                                       "attempt": attempt, "delay_s": round(delay, 2),
+                                       "institution": institution}},
+                )
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Interrupted (e.g. a batch job's per-user timeout): settle the trial
+                if breaker:
+                    breaker.release()
+                raise
+
+            self._record(endpoint, (time.monotonic() - start) * 1000)
+            if breaker:
+                breaker.success()
+            return result
+
+    # ── State ──
+
+    def _bucket(self, family: str):
+        with self._lock:
+            bucket = self._buckets.get(family)
+            if bucket is None:
+                bucket = _TokenBucket(self._rates.get(family, self._rates["other"]) / 60.0)
+                self._buckets[family] = bucket
+            return bucket
+
+    def _breaker(self, institution: str):
+        if not institution:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(institution)
+            if breaker is None:
+                breaker = _CircuitBreaker(institution, self._breaker_threshold,
+                                          self._breaker_cooldown)
+                self._breakers[institution] = breaker
+            return breaker
+
+    def _stat(self, endpoint: str) -> dict:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = {
+                "calls": 0, "errors": {}, "retries": 0, "throttled": 0,
+                "circuit_open": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "histogram": [0] * (len(_LATENCY_BUCKETS_MS) + 1),
+            }
+        return stats
+
+    def _record(self, endpoint: str, elapsed_ms: float, error: str = None):
+        with self._lock:
+            stats = self._stat(endpoint)
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["histogram"][bisect_left(_LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if error:
+                stats["errors"][error] = stats["errors"].get(error, 0) + 1
+
+    def _count(self, endpoint: str, counter: str):
+        with self._lock:
+            self._stat(endpoint)[counter] += 1
+
+    # ── Metrics ──
+
+    def snapshot(self) -> dict:
+        """Per-endpoint counters and latency histograms, plus breaker states."""
+        with self._lock:
+            endpoints = {}
+            for endpoint, s in self._stats.items():
+                endpoints[endpoint] = {
+                    "family": _family(endpoint),
+                    "calls": s["calls"],
+                    "errors": dict(s["errors"]),
+                    "retries": s["retries"],
+                    "throttled": s["throttled"],
+                    "circuit_open": s["circuit_open"],
+                    "avg_ms": round(s["total_ms"] / s["calls"], 2) if s["calls"] else 0.0,
+                    "max_ms": round(s["max_ms"], 2),
+                    "latency_histogram": dict(zip(_BUCKET_LABELS, s["histogram"])),
+                }
+            breakers = {name: b.state() for name, b in self._breakers.items()}
+            rates = {family: self._rates.get(family, self._rates["other"])
+                     for family in self._buckets}
+
+        return {"endpoints": endpoints, "breakers": breakers, "rates_per_minute": rates}
+
+
+class _TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_second: float, burst: float = None):
+        self.rate = max(rate_per_second, 0.001)
+        self.capacity = burst or max(1.0, self.rate)   # ~1s of burst
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> float:
+        """Take one token, waiting up to max_wait seconds. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            if waited + delay > max_wait:
+                # Proceed anyway; Plaid's own limiter (and our retry) is the backstop
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class _CircuitBreaker:
+    """closed → open after `threshold` consecutive failures → half-open after cooldown."""
+
+    def __init__(self, name: str, threshold: int, cooldown: float):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial:
+                return False
+            self.trial = True   # half-open: let exactly one call through
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def release(self):
+        """End a half-open trial that proved nothing either way; the next call probes again."""
+        with self.lock:
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial:
+                    log.warning("Plaid circuit opened",
+                                extra={"context": {"institution": self.name,
+                                                   "failures": self.failures}})
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+    def state(self) -> dict:
+        with self.lock:
+            if self.opened_at is None:
+                status = "closed"
+            elif self.trial or time.monotonic() - self.opened_at >= self.cooldown:
+                status = "half_open"
+            else:
+                status = "open"
+            return {"state": status, "consecutive_failures": self.failures}
+
+
+# ──────────────────────────────────────────────
+# Private Helpers
+# ──────────────────────────────────────────────
+
+def _family(endpoint: str) -> str:
+    """transactions_sync → transactions, link_token_create → link, ..."""
+    prefix = endpoint.split("_", 1)[0]
+    return prefix if prefix in _DEFAULT_RATES else "other"
+
+
+def _error_body(exc) -> dict:
+    try:
+        return json.loads(exc.body)
+    except Exception:
+        return {}
+
+
+def _error_code(exc) -> str:
+    if isinstance(exc, plaid.ApiException):
+        return _error_body(exc).get("error_code") or f"HTTP_{exc.status}"
+    return type(exc).__name__
+
+
+def _is_retryable(exc, endpoint: str) -> bool:
+    if endpoint in _NON_IDEMPOTENT:
+        return _rate_limited(exc) or _not_sent(exc)
+    return _is_outage(exc)
+
+
+def _is_outage(exc) -> bool:
+    """Transient failure of Plaid / the institution (counts against its breaker)."""
+    if isinstance(exc, plaid.ApiException):
+        body = _error_body(exc)
+        if body.get("error_code") in _RETRYABLE_CODES or body.get("error_type") in _RETRYABLE_TYPES:
+            return True
+        return exc.status == 429 or (exc.status or 0) >= 500
+    return isinstance(exc, (urllib3.exceptions.TimeoutError,
+                            urllib3.exceptions.ProtocolError,
+                            urllib3.exceptions.MaxRetryError,
+                            urllib3.exceptions.NewConnectionError))
+
+
+def _rate_limited(exc) -> bool:
+    """Plaid turned the request away before processing it."""
+    return isinstance(exc, plaid.ApiException) and (
+        exc.status == 429 or _error_body(exc).get("error_code") == "RATE_LIMIT_EXCEEDED")
+
+
+def _not_sent(exc) -> bool:
+    """The connection was never established, so the request never reached Plaid."""
+    if isinstance(exc, urllib3.exceptions.MaxRetryError):
+        exc = exc.reason
+    return isinstance(exc, urllib3.exceptions.ConnectTimeoutError)   # incl. NewConnectionError
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))."""
+    base = Config.PLAID_RETRY_BASE_SECONDS
+    return random.uniform(0, min(Config.PLAID_RETRY_MAX_SECONDS, base * (2 ** attempt)))
+
+
+def _circuit_open_error(institution: str) -> plaid.ApiException:
+    exc = plaid.ApiException(status=503, reason="Circuit open")
+    exc.body = json.dumps({
+        "error_type": "INSTITUTION_ERROR",
+        "error_code": "CIRCUIT_OPEN",
+        "error_message": f"{institution} is temporarily unavailable. Please try again later.",
+    })
+    return exc
+
+
+def _parse_rates(spec: str) -> dict:
+    """'transactions=2500,accounts=1200' → {"transactions": 2500, "accounts": 1200}"""
+    rates = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            family, value = part.split("=", 1)
+            rates[family.strip()] = float(value)
+    return rates
@@ -0,0 +1,82 @@
+"""
+Streaming parsers for uploaded bank statements (CSV, OFX).
+
+Each parser reads a text stream incrementally and yields
+(line, {"date", "amount", "description", "category"}) with the raw
+string values, one per transaction; validation is left to the caller.
+`line` is what a user can find the row by: the spreadsheet row number
+for CSV (header = 1), the transaction's position in the file for OFX.
+"""
+import csv
+import html
+import re
+
+from utils.errors import ValidationError
+
+# Accepted CSV header names per field (case-insensitive)
+_CSV_FIELDS = {
+    "date": ("date", "posted date", "transaction date"),
+    "amount": ("amount",),
+    "description": ("description", "name", "payee", "memo"),
+    "category": ("category",),
+}
+
+# OFX 1.x (SGML) leaves leaf elements unclosed, OFX 2.x (XML) closes them
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def parse_csv(text):
+    """
+    Rows of a CSV with a header row naming at least date and amount
+    columns. Unknown columns (e.g. from GET /transactions/export) are ignored.
+    """
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if not header:
+        raise ValidationError("CSV file is empty")
+
+    names = [h.strip().lower() for h in header]
+    index = {}
+    for field, aliases in _CSV_FIELDS.items():
+        for alias in aliases:
+            if alias in names:
+                index[field] = names.index(alias)
+                break
+    missing = [f for f in ("date", "amount") if f not in index]
+    if missing:
+        raise ValidationError(f"CSV header is missing: {', '.join(missing)}")
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {
+            field: row[i].strip() if i < len(row) else ""
+            for field, i in index.items()
+        }
+
+
+def parse_ofx(text):
+    """<STMTTRN> records of an OFX 1.x or 2.x statement."""
+    record = None
+    count = 0
+    for raw in text:
+        for closing, tag, value in _OFX_TAG.findall(raw):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and record is not None:
+                    count += 1
+                    yield count, _ofx_record(record)
+                    record = None
+                elif not closing:
+                    record = {}
+            elif record is not None and not closing:
+                record[tag] = html.unescape(value.strip())
+
+
+def _ofx_record(record: dict) -> dict:
+    return {
+        "date": record.get("DTPOSTED", "")[:8],   # YYYYMMDD[HHMMSS[.XXX][TZ]]
+        "amount": record.get("TRNAMT", ""),
+        "description": record.get("NAME") or record.get("MEMO", ""),
+        "category": "",
+    }
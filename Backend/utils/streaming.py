@@ -0,0 +1,21 @@
+"""
+Helpers for streamed (chunked) HTTP responses.
+"""
+import zlib
+
+
+def gzip_chunks(chunks, level: int = 6):
+    """
+    Gzip a stream of text chunks on the fly, for Content-Encoding: gzip.
+    Compressed output is yielded as soon as zlib emits it, so memory stays
+    bounded by the compressor's window rather than the response size.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode())
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        chunks.close()
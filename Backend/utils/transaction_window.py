@@ -0,0 +1,110 @@
+"""
+In-memory window of one user's recent transactions.
+
+The nightly pipeline fetches a user's last N days once and hands the window
+to every analytics stage. Each method reproduces one of the per-metric SQL
+aggregates in the models (same filters: amount sign, transfer exclusion,
+account filter, `date >= today - days`), so services give identical results
+whether they query or read from a window.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+
+class TransactionWindow:
+    """Rows are (id, description, amount, date, category, plaid_account_id)."""
+
+    def __init__(self, rows: list, as_of, days: int):
+        self.rows = rows
+        self.as_of = as_of
+        self.days = days
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ── Row selection ──
+
+    def _select(self, account_id: str, days: int, sign: int = 0,
+                exclude_transfers: bool = False):
+        if days > self.days:
+            raise ValueError(f"Window holds {self.days} days, {days} requested")
+        since = self.as_of - timedelta(days=int(days))
+        by_account = account_id and account_id != "all"
+
+        for row in self.rows:
+            _, _, amount, day, category, plaid_account_id = row
+            if day < since:
+                continue
+            if sign < 0 and not amount < 0:
+                continue
+            if sign > 0 and not amount > 0:
+                continue
+            if exclude_transfers and "transfer" in (category or "").lower():
+                continue
+            if by_account and plaid_account_id != account_id:
+                continue
+            yield row
+
+    def _daily_spending(self, account_id: str, days: int) -> list:
+        totals = defaultdict(float)
+        for row in self._select(account_id, days, sign=-1, exclude_transfers=True):
+            totals[row[3]] += abs(row[2])
+        return list(totals.values())
+
+    # ── Aggregates (mirror the model fetch_* helpers) ──
+
+    def expense_transactions(self, account_id: str, days: int) -> list:
+        """recurring_merchant.fetch_expense_transactions"""
+        return [
+            {
+                "id": r[0],
+                "description": r[1],
+                "amount": abs(r[2]),
+                "date": str(r[3]),
+                "category": r[4],
+            }
+            for r in self._select(account_id, days, sign=-1, exclude_transfers=True)
+        ]
+
+    def total_spending(self, account_id: str, days: int) -> float:
+        """health_score.fetch_total_spending"""
+        return sum((abs(r[2]) for r in
+                    self._select(account_id, days, sign=-1, exclude_transfers=True)), 0.0)
+
+    def total_income(self, account_id: str, days: int) -> float:
+        """health_score.fetch_total_income"""
+        return sum((r[2] for r in self._select(account_id, days, sign=1)), 0.0)
+
+    def daily_spending_avg(self, account_id: str, days: int) -> float:
+        """fetch_daily_spending_avg (cashflow_forecast / health_score)"""
+        return round(self.total_spending(account_id, days) / max(days, 1), 2)
+
+    def daily_income_avg(self, account_id: str, days: int) -> float:
+        """cashflow_forecast.fetch_daily_income_avg"""
+        return round(self.total_income(account_id, days) / max(days, 1), 2)
+
+    def spending_cv(self, account_id: str, days: int):
+        """Coefficient of variation of daily spending totals, or None (< 2 days / zero mean)."""
+        daily = self._daily_spending(account_id, days)
+        if len(daily) < 2:
+            return None
+        mean = sum(daily) / len(daily)
+        if mean == 0:
+            return None
+        variance = sum((x - mean) ** 2 for x in daily) / len(daily)
+        return math.sqrt(variance) / mean
+
+    def spend_volatility(self, account_id: str, days: int) -> float:
+        """cashflow_forecast.fetch_spend_volatility (0-100 scale)"""
+        cv = self.spending_cv(account_id, days)
+        return 0.0 if cv is None else round(min(cv * 100, 100.0), 2)
+
+    def daily_spending_stddev(self, account_id: str, days: int) -> float:
+        """health_score.fetch_daily_spending_stddev (CV as a 0-2 ratio)"""
+        cv = self.spending_cv(account_id, days)
+        return 0.0 if cv is None else round(min(cv, 2.0), 4)
+
+    def transaction_count(self, account_id: str, days: int) -> int:
+        """health_score.fetch_transaction_count"""
+        return sum(1 for _ in self._select(account_id, days))
@@ -0,0 +1,155 @@
+"""
+Plaid webhook signature verification.
+
+Verifiers are pluggable: init_webhook_verifier() picks one from
+PLAID_WEBHOOK_VERIFICATION at startup, and set_verifier() swaps in any
+object with a verify(body, headers) method (e.g. a local stand-in that
+drives the endpoint in tests).
+
+  plaid  — Plaid's ES256 JWT in the Plaid-Verification header, checked
+           against the key from /webhook_verification_key/get (default)
+  hmac   — hex HMAC-SHA256 of the body in X-Webhook-Signature, keyed by
+           PLAID_WEBHOOK_SECRET (local stand-in for development and tests)
+  none   — accept everything (never use in production)
+"""
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+from config import Config
+from utils.errors import AuthenticationError
+from utils.logger import get_logger
+
+log = get_logger("webhook_verification")
+
+_MAX_AGE_SECONDS = 5 * 60   # Plaid recommends rejecting webhooks older than 5 minutes
+
+_verifier = None
+
+
+class PlaidJwtVerifier:
+    """Verifies Plaid's signed JWT (ES256) and the body hash it carries."""
+
+    def __init__(self, fetch_key):
+        self._fetch_key = fetch_key   # key_id → JWK dict
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def verify(self, body: bytes, headers):
+        token = headers.get("Plaid-Verification")
+        if not token:
+            raise AuthenticationError("Missing webhook signature")
+
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            header = json.loads(_b64decode(header_b64))
+            payload = json.loads(_b64decode(payload_b64))
+            signature = _b64decode(signature_b64)
+        except ValueError:
+            raise AuthenticationError("Malformed webhook signature") from None
+
+        if header.get("alg") != "ES256":
+            raise AuthenticationError("Unexpected webhook signature algorithm")
+
+        key = self._public_key(header.get("kid"))
+        try:
+            key.verify(
+                encode_dss_signature(int.from_bytes(signature[:32], "big"),
+                                     int.from_bytes(signature[32:], "big")),
+                f"{header_b64}.{payload_b64}".encode(),
+                ec.ECDSA(hashes.SHA256()),
+            )
+        except InvalidSignature:
+            raise AuthenticationError("Invalid webhook signature") from None
+
+        if time.time() - payload.get("iat", 0) > _MAX_AGE_SECONDS:
+            raise AuthenticationError("Webhook signature expired")
+
+        body_hash = hashlib.sha256(body).hexdigest()
+        if not hmac.compare_digest(body_hash, payload.get("request_body_sha256", "")):
+            raise AuthenticationError("Webhook body does not match signature")
+
+    def _public_key(self, key_id: str):
+        if not key_id:
+            raise AuthenticationError("Webhook signature has no key id")
+        with self._lock:
+            key = self._keys.get(key_id)
+        if key is not None:
+            return key
+
+        jwk = self._fetch_key(key_id)
+        if not jwk or jwk.get("expired_at"):
+            raise AuthenticationError("Unknown or expired webhook key")
+
+        key = ec.EllipticCurvePublicNumbers(
+            int.from_bytes(_b64decode(jwk["x"]), "big"),
+            int.from_bytes(_b64decode(jwk["y"]), "big"),
+            ec.SECP256R1(),
+        ).public_key()
+        with self._lock:
+            self._keys[key_id] = key
+        return key
+
+
+class HmacVerifier:
+    """Shared-secret HMAC-SHA256 over the raw body (X-Webhook-Signature, hex)."""
+
+    def __init__(self, secret: str):
+        if not secret:
+            raise RuntimeError("PLAID_WEBHOOK_SECRET is required for hmac verification")
+        self._secret = secret.encode()
+
+    def sign(self, body: bytes) -> str:
+        return hmac.new(self._secret, body, hashlib.sha256).hexdigest()
+
+    def verify(self, body: bytes, headers):
+        signature = headers.get("X-Webhook-Signature", "")
+        if not hmac.compare_digest(self.sign(body), signature):
+            raise AuthenticationError("Invalid webhook signature")
+
+
+class NoopVerifier:
+    """Accepts every webhook."""
+
+    def verify(self, body: bytes, headers):
+        return None
+
+
+def init_webhook_verifier(fetch_key):
+    """
+    Configure the verifier from PLAID_WEBHOOK_VERIFICATION. Called once at startup.
+    `fetch_key(key_id)` returns Plaid's JWK for the plaid verifier.
+    """
+    mode = Config.PLAID_WEBHOOK_VERIFICATION
+    if mode == "none":
+        log.warning("Plaid webhook verification disabled")
+        set_verifier(NoopVerifier())
+    elif mode == "hmac":
+        set_verifier(HmacVerifier(Config.PLAID_WEBHOOK_SECRET))
+    else:
+        set_verifier(PlaidJwtVerifier(fetch_key))
+
+
+def set_verifier(verifier):
+    """Install a verifier (any object with verify(body, headers))."""
+    global _verifier
+    _verifier = verifier
+
+
+def verify_webhook(body: bytes, headers):
+    """Raise AuthenticationError unless the webhook is authentic."""
+    if _verifier is None:
+        raise RuntimeError("Webhook verifier not initialized")
+    _verifier.verify(body, headers)
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
@@ -0,0 +1,248 @@
+# ============================================================
+# AI-Powered Financial Management Platform
+# Transaction Search Benchmark (GET /transactions/search)
+# ============================================================
+# HOW TO RUN (from the repo root, against a scratch database with
+# every migration applied; DB_* settings come from Backend/.env):
+#   python Databases/benchmark_search.py              # seed 1M rows once, then benchmark
+#   python Databases/benchmark_search.py --compare    # also time without migration 016's indexes
+#   python Databases/benchmark_search.py --cleanup    # remove the synthetic users and rows
+#
+# Seeds BENCH_USERS synthetic users (bench_search_*): one heavy user
+# with HEAVY_USER_ROWS transactions, the rest sharing the remainder of
+# TOTAL_ROWS. Each scenario runs through transaction_service.search_
+# transactions() — validation, planner guard and query — for SAMPLES
+# typical users and for the heavy user, and reports p50 / p95 latency,
+# the planner's cost estimate and how many runs the guard rejected.
+#
+# --compare drops the migration 016 indexes inside a transaction that
+# is rolled back afterwards (it holds an exclusive lock on transactions
+# meanwhile, hence the scratch database).
+# ============================================================
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Backend"))
+
+from utils.db import db_scope, get_db, init_pool  # noqa: E402
+from utils.errors import ValidationError  # noqa: E402
+from models import transaction as txn_model  # noqa: E402
+from services import transaction_service  # noqa: E402
+
+TOTAL_ROWS      = 1_000_000
+BENCH_USERS     = 100
+HEAVY_USER_ROWS = 200_000
+SAMPLES         = 30
+
+MIGRATION_016_INDEXES = [
+    "idx_transactions_description_fts",
+    "idx_transactions_user_category_date_id",
+    "idx_transactions_user_amount",
+]
+
+# (merchant, category) pairs; descriptions are Plaid-style descriptors of these
+MERCHANTS = [
+    ("Starbucks", "Food & Dining"), ("McDonald's", "Food & Dining"), ("Chipotle", "Food & Dining"),
+    ("Dunkin", "Food & Dining"), ("Amazon", "Shopping"), ("Walmart", "Shopping"),
+    ("Target", "Shopping"), ("Best Buy", "Shopping"), ("Uber", "Transport"),
+    ("Lyft", "Transport"), ("Shell Gas", "Transport"), ("Chevron", "Transport"),
+    ("Netflix", "Subscriptions"), ("Spotify", "Subscriptions"), ("Disney Plus", "Subscriptions"),
+    ("CVS Pharmacy", "Health"), ("Walgreens", "Health"), ("Planet Fitness", "Health"),
+    ("Verizon", "Utilities"), ("Comcast", "Utilities"), ("Duke Energy", "Utilities"),
+    ("Delta Airlines", "Travel"), ("Marriott Hotels", "Travel"), ("Airbnb", "Travel"),
+    ("Udemy", "Education"), ("Coursera", "Education"), ("Property Management", "Rent"),
+]
+
+# name → search_transactions() kwargs
+SCENARIOS = [
+    ("latest page, no filters", {}),
+    ("text: starbucks", {"q": "starbucks"}),
+    ("text prefix: amaz", {"q": "amaz"}),
+    ("text, rare: airbnb", {"q": "airbnb"}),
+    ("category: Travel", {"category": "Travel"}),
+    ("amount -500..-150", {"min_amount": "-500", "max_amount": "-150"}),
+    ("last 30 days", {"start": "{d30}"}),
+    ("source: manual", {"source": "manual"}),
+    ("text + category + year", {"q": "uber", "category": "Transport", "start": "{d365}"}),
+    ("account + amount", {"account_id": "{account}", "min_amount": "100"}),
+    ("text matching nothing", {"q": "zzzzqx"}),
+]
+
+
+# ============================================================
+# DATA
+# ============================================================
+def bench_user_ids(cur):
+    cur.execute("SELECT id FROM users WHERE username LIKE 'bench\\_search\\_%%' ORDER BY id")
+    return [r[0] for r in cur.fetchall()]
+
+
+def seed():
+    with get_db() as (conn, cur):
+        users = bench_user_ids(cur)
+        if users:
+            cur.execute("SELECT COUNT(*) FROM transactions WHERE user_id = ANY(%s)", (users,))
+            print(f"Using existing synthetic data: {len(users)} users, {cur.fetchone()[0]:,} rows")
+            return users
+
+    print(f"Seeding {TOTAL_ROWS:,} transactions for {BENCH_USERS} users...")
+    start = time.monotonic()
+    names = [m for m, _ in MERCHANTS]
+    categories = [c for _, c in MERCHANTS]
+    with get_db() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO users (username, email, password_hash)
+            SELECT 'bench_search_' || g, 'bench_search_' || g || '@example.invalid', 'x'
+            FROM generate_series(1, %s) g
+            """,
+            (BENCH_USERS,),
+        )
+        users = bench_user_ids(cur)
+        heavy, typical = users[0], users[1:]
+
+        # row g → user; the heavy user takes the first HEAVY_USER_ROWS rows
+        cur.execute(
+            """
+            INSERT INTO transactions
+                (user_id, amount, category, description, date, source,
+                 plaid_account_id, institution_name, account_name, created_at)
+            SELECT u, amt, cat, descr, d, src,
+                   CASE WHEN src = 'plaid' THEN 'bench-' || u || '-' || (g %% 3) END,
+                   CASE WHEN src = 'plaid' THEN 'Bench Bank' END,
+                   CASE WHEN src = 'plaid' THEN 'Account ' || (g %% 3) END,
+                   NOW()
+            FROM (
+                SELECT g,
+                       CASE WHEN g <= %(heavy_rows)s THEN %(heavy)s
+                            ELSE (%(typical)s::int[])[1 + g %% %(n_typical)s] END AS u,
+                       1 + floor(random() * %(n_merchants)s)::int AS m,
+                       CURRENT_DATE - (random() * 1095)::int AS d,
+                       CASE WHEN g %% 20 = 0 THEN 'manual' ELSE 'plaid' END AS src,
+                       g %% 33 = 0 AS income
+                FROM generate_series(1, %(total)s) g
+            ) r,
+            LATERAL (
+                SELECT CASE WHEN r.income THEN 'Income' ELSE (%(categories)s::text[])[r.m] END AS cat,
+                       CASE WHEN r.income THEN 'PAYROLL DEPOSIT ACME CORP'
+                            WHEN r.g %% 4 = 0 THEN 'SQ *' || upper((%(names)s::text[])[r.m])
+                                                   || ' #' || (r.g %% 9973)
+                            ELSE (%(names)s::text[])[r.m] END AS descr,
+                       CASE WHEN r.income THEN round((1500 + random() * 3000)::numeric, 2)
+                            ELSE -round((1 + random() * random() * 600)::numeric, 2) END AS amt
+            ) x
+            """,
+            {"heavy": heavy, "heavy_rows": HEAVY_USER_ROWS, "typical": typical,
+             "n_typical": len(typical), "total": TOTAL_ROWS,
+             "names": names, "categories": categories, "n_merchants": len(names)},
+        )
+        cur.execute("ANALYZE transactions")
+    print(f"Seeded in {time.monotonic() - start:.1f}s\n")
+    return users
+
+
+def cleanup():
+    with get_db() as (conn, cur):
+        users = bench_user_ids(cur)
+        if not users:
+            print("No synthetic data found")
+            return
+        for table in ("transactions", "transaction_counters", "user_activity"):
+            cur.execute(f"DELETE FROM {table} WHERE user_id = ANY(%s)", (users,))
+        cur.execute("DELETE FROM users WHERE id = ANY(%s)", (users,))
+        cur.execute("ANALYZE transactions")
+    print(f"Removed {len(users)} synthetic users and their transactions")
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def run_scenarios(users, label):
+    heavy, typical = users[0], users[1:]
+    sample = typical[:: max(1, len(typical) // SAMPLES)][:SAMPLES]
+    values = {"d30": str(date.today() - timedelta(days=30)),
+              "d365": str(date.today() - timedelta(days=365))}
+
+    print(f"── {label} ──")
+    print(f"{'scenario':<28}{'users':<9}{'p50 ms':>8}{'p95 ms':>8}{'cost p50':>11}{'rejected':>10}")
+    for name, kwargs in SCENARIOS:
+        for kind, ids in (("typical", sample), ("heavy", [heavy] * 5)):
+            timings, costs, rejected = [], [], 0
+            for user_id in ids:
+                params = {k: v.format(account=f"bench-{user_id}-1", **values) for k, v in kwargs.items()}
+                t = time.perf_counter()
+                try:
+                    transaction_service.search_transactions(user_id, per_page=50, **params)
+                except ValidationError:
+                    rejected += 1
+                timings.append((time.perf_counter() - t) * 1000)
+                costs.append(_plan_costs[-1])
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{name:<28}{kind:<9}{statistics.median(timings):>8.2f}{p95:>8.2f}"
+                  f"{statistics.median(costs):>11.0f}{rejected:>7}/{len(ids)}")
+    print()
+
+    # Deep paging: 20 pages of a filtered search by next_cursor
+    for kind, user_id in (("typical", sample[0]), ("heavy", heavy)):
+        cursor, t = None, time.perf_counter()
+        for _ in range(20):
+            page = transaction_service.search_transactions(
+                user_id, category="Food & Dining", per_page=50, cursor=cursor)
+            cursor = page["pagination"]["next_cursor"]
+            if not cursor:
+                break
+        print(f"20 cursor pages, category filter ({kind}): {(time.perf_counter() - t) * 1000:.1f} ms")
+    print()
+
+
+def _recording(search):
+    """Wrap models.transaction.search to keep each plan cost the guard saw."""
+    def wrapper(*args, **kwargs):
+        result = search(*args, **kwargs)
+        _plan_costs.append(result["plan_cost"])
+        return result
+    return wrapper
+
+
+_plan_costs = []
+txn_model.search = _recording(txn_model.search)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GET /transactions/search")
+    parser.add_argument("--compare", action="store_true",
+                        help="also run without migration 016's indexes (rolled back)")
+    parser.add_argument("--cleanup", action="store_true", help="remove the synthetic data")
+    args = parser.parse_args()
+
+    init_pool()
+    if args.cleanup:
+        cleanup()
+        return
+
+    users = seed()
+    with db_scope("benchmark_search"):
+        run_scenarios(users, "with search indexes")
+        if args.compare:
+            try:
+                with get_db() as (conn, cur):
+                    for index in MIGRATION_016_INDEXES:
+                        cur.execute(f"DROP INDEX IF EXISTS {index}")
+                    run_scenarios(users, "without migration 016 indexes")
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# ============================================================
+# AI-Powered Financial Management Platform
+# Health Score Parity Check (bulk job vs. per-user service)
+# ============================================================
+# HOW TO RUN (from the repo root, against a scratch database with
+# every migration applied; DB_* settings come from Backend/.env):
+#   python Databases/parity_health_scores.py            # seed, compare, clean up
+#   python Databases/parity_health_scores.py --random 500
+#   python Databases/parity_health_scores.py --keep     # leave the synthetic users
+#
+# Seeds synthetic users (parity_hs_*) covering the edge cases of the
+# score below plus --random randomized users, then scores every window
+# twice:
+#   1. health_score_service.get_health_score() per user and window —
+#      the on-demand path the API uses
+#   2. health_score_service.generate_scores_many() — the set-based
+#      NumPy path of jobs/health_score_jobs.py
+# and compares the cached health_scores rows the two write, column by
+# column. A user/window without transactions must come back no_data
+# from (1) and be skipped by (2). Exit status is non-zero on any
+# mismatch.
+# ============================================================
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Backend"))
+
+from utils.db import db_scope, get_db, init_pool  # noqa: E402
+from services import health_score_service  # noqa: E402
+
+SEED = 19
+WINDOWS = health_score_service.VALID_WINDOWS
+
+COLUMNS = [
+    "health_score", "savings_ratio", "volatility_score", "recurring_burden",
+    "cash_buffer_days", "component_scores", "explanation_json",
+]
+
+# name → {"txns": [(days_ago, amount, category)],
+#         "accounts": [(type, current_balance)],
+#         "recurring": [(cadence, avg_amount, confidence_score)]}
+EDGE_CASES = {
+    "no transactions": {"accounts": [("depository", 1200)]},
+    "zero income": {
+        "txns": [(d, -42.5, "Food & Dining") for d in range(0, 85, 3)],
+        "accounts": [("depository", 800)],
+        "recurring": [("monthly", 15.99, 90)],
+    },
+    "income only": {
+        "txns": [(1, 3200, "Income"), (15, 3200, "Income"), (44, 3200, "Income")],
+        "accounts": [("depository", 5000)],
+    },
+    "negative balance": {
+        "txns": [(d, -120, "Shopping") for d in range(0, 60, 2)] + [(10, 900, "Income")],
+        "accounts": [("depository", -350.75), ("depository", 20)],
+    },
+    "only credit balance": {
+        "txns": [(d, -60, "Transport") for d in range(0, 30, 5)] + [(3, 1500, "Income")],
+        "accounts": [("credit", -2400), ("depository", None)],
+    },
+    "no accounts": {
+        "txns": [(d, -25, "Food & Dining") for d in range(0, 20)] + [(2, 2000, "Income")],
+    },
+    "zero spending, zero income": {
+        "txns": [(4, 0, "Transfer"), (40, 0, "Transfer")],
+    },
+    "single transaction today": {
+        "txns": [(0, -9.99, "Subscriptions")],
+        "accounts": [("depository", 0)],
+    },
+    "only older than 30 days": {
+        "txns": [(d, -75, "Utilities") for d in range(35, 88, 4)] + [(50, 2500, "Income")],
+        "accounts": [("depository", 3000)],
+    },
+    "spending on one day": {
+        "txns": [(7, -100, "Travel")] * 5 + [(7, 4000, "Income")],
+        "accounts": [("depository", 10000)],
+    },
+    "recurring exceeds income": {
+        "txns": [(d, -30, "Food & Dining") for d in range(0, 90, 6)] + [(20, 150, "Income")],
+        "accounts": [("depository", 40)],
+        "recurring": [("weekly", 25, 80), ("biweekly", 60, 55), ("quarterly", 300, 95),
+                      ("unknown", 12, 70), ("monthly", 500, 20)],
+    },
+    "large savings": {
+        "txns": [(d, -5, "Food & Dining") for d in range(0, 90, 9)] + [(d, 9000, "Income") for d in (5, 35, 65)],
+        "accounts": [("depository", 250000)],
+    },
+    "refunds exceed spending": {
+        "txns": [(3, -200, "Shopping"), (4, 260, "Shopping"), (30, -50, "Food & Dining")],
+        "accounts": [("depository", 600)],
+    },
+}
+
+
+# ============================================================
+# DATA
+# ============================================================
+def parity_user_ids(cur):
+    cur.execute("SELECT id, username FROM users WHERE username LIKE 'parity\\_hs\\_%%' ORDER BY id")
+    return cur.fetchall()
+
+
+def random_case(rng):
+    horizon = rng.choice([10, 45, 75, 120])
+    income_share = rng.choice([0, 0.1, 0.25, 0.5])
+    txns = []
+    for _ in range(rng.randint(0, 150)):
+        sign = 1 if rng.random() < income_share else -1
+        amount = rng.choice([5, 10, 12.5, 100, 3.33, round(rng.uniform(1, 3000), 2)])
+        txns.append((rng.randint(0, horizon), sign * amount,
+                     rng.choice(["Food & Dining", "Rent", "Shopping", "Travel", "Income", None])))
+    accounts = [(rng.choice(["depository", "depository", "credit"]),
+                 rng.choice([None, 0, round(rng.uniform(-500, 20000), 2)]))
+                for _ in range(rng.randint(0, 3))]
+    recurring = [(rng.choice(["weekly", "biweekly", "monthly", "quarterly", "unknown"]),
+                  round(rng.uniform(1, 400), 2), rng.choice([20, 40, 90]))
+                 for _ in range(rng.randint(0, 4))]
+    return {"txns": txns, "accounts": accounts, "recurring": recurring}
+
+
+def seed(random_users):
+    rng = random.Random(SEED)
+    cases = dict(EDGE_CASES)
+    for i in range(random_users):
+        cases[f"random {i + 1}"] = random_case(rng)
+
+    today = date.today()
+    users = {}
+    with get_db() as (conn, cur):
+        for n, (name, case) in enumerate(cases.items(), 1):
+            cur.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, 'x') RETURNING id",
+                (f"parity_hs_{n}", f"parity_hs_{n}@example.invalid"),
+            )
+            user_id = cur.fetchone()[0]
+            users[user_id] = name
+
+            for days_ago, amount, category in case.get("txns", []):
+                cur.execute(
+                    """
+                    INSERT INTO transactions (user_id, amount, category, description, date, source)
+                    VALUES (%s, %s, %s, 'parity', %s, 'manual')
+                    """,
+                    (user_id, amount, category, today - timedelta(days=days_ago)),
+                )
+            if case.get("accounts"):
+                cur.execute(
+                    """
+                    INSERT INTO plaid_items (user_id, item_id, access_token, institution_name)
+                    VALUES (%s, %s, 'x', 'Parity Bank')
+                    """,
+                    (user_id, f"parity-hs-{user_id}"),
+                )
+            for k, (acct_type, balance) in enumerate(case.get("accounts", [])):
+                cur.execute(
+                    """
+                    INSERT INTO accounts (user_id, item_id, account_id, name, type, current_balance)
+                    VALUES (%s, %s, %s, 'Parity', %s, %s)
+                    """,
+                    (user_id, f"parity-hs-{user_id}", f"parity-hs-{user_id}-{k}", acct_type, balance),
+                )
+            for k, (cadence, avg_amount, confidence) in enumerate(case.get("recurring", [])):
+                cur.execute(
+                    """
+                    INSERT INTO recurring_merchants
+                        (user_id, merchant_key, merchant_display_name, cadence, avg_amount, confidence_score)
+                    VALUES (%s, %s, 'Parity', %s, %s, %s)
+                    """,
+                    (user_id, f"parity-{k}", cadence, avg_amount, confidence),
+                )
+    return users
+
+
+def cleanup():
+    with get_db() as (conn, cur):
+        users = [row[0] for row in parity_user_ids(cur)]
+        if not users:
+            return 0
+        cur.execute("DELETE FROM transactions WHERE user_id = ANY(%s)", (users,))
+        cur.execute("DELETE FROM plaid_items WHERE user_id = ANY(%s)", (users,))
+        cur.execute("DELETE FROM users WHERE id = ANY(%s)", (users,))   # the rest cascades
+    return len(users)
+
+
+# ============================================================
+# COMPARISON
+# ============================================================
+def stored_scores(users):
+    """{(user_id, window): {column: value}} of today's all-accounts rows."""
+    with get_db() as (conn, cur):
+        cur.execute(
+            f"""
+            SELECT user_id, analysis_window_days, {", ".join(COLUMNS)}
+            FROM health_scores
+            WHERE user_id = ANY(%s) AND account_id = 'all' AND as_of_date = CURRENT_DATE
+            """,
+            (list(users),),
+        )
+        return {(row[0], row[1]): dict(zip(COLUMNS, row[2:])) for row in cur.fetchall()}
+
+
+def clear_scores(users):
+    with get_db() as (conn, cur):
+        cur.execute("DELETE FROM health_scores WHERE user_id = ANY(%s)", (list(users),))
+
+
+def compare(users):
+    clear_scores(users)
+    no_data = set()
+    for user_id in users:
+        for window_days in WINDOWS:
+            if health_score_service.get_health_score(user_id, "all", window_days).get("no_data"):
+                no_data.add((user_id, window_days))
+    per_user = stored_scores(users)
+
+    clear_scores(users)
+    health_score_service.generate_scores_many(list(users), WINDOWS)
+    bulk = stored_scores(users)
+
+    mismatches = 0
+    print(f"{'case':<30}" + "".join(f"{f'{w}d':>16}" for w in WINDOWS))
+    for user_id, name in users.items():
+        cells = []
+        for window_days in WINDOWS:
+            key = (user_id, window_days)
+            expected, actual = per_user.get(key), bulk.get(key)
+            if key in no_data and actual is None:
+                cells.append("no_data")
+            elif expected is not None and expected == actual:
+                cells.append(f"ok ({expected['health_score']})")
+            else:
+                mismatches += 1
+                cells.append("MISMATCH")
+                diff = [c for c in COLUMNS if (expected or {}).get(c) != (actual or {}).get(c)]
+                print(f"  {name} / {window_days}d differs in {diff}:\n"
+                      f"    per-user: {expected}\n    bulk:     {actual}")
+        if not name.startswith("random") or "MISMATCH" in cells:
+            print(f"{name:<30}" + "".join(f"{c:>16}" for c in cells))
+
+    randoms = sum(1 for name in users.values() if name.startswith("random"))
+    print(f"\n{len(users)} users ({randoms} random) x {len(WINDOWS)} windows, "
+          f"{len(no_data)} no_data, {mismatches} mismatches")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bulk and per-user health scores")
+    parser.add_argument("--random", type=int, default=200, help="randomized users besides the edge cases")
+    parser.add_argument("--keep", action="store_true", help="leave the synthetic users in place")
+    args = parser.parse_args()
+
+    init_pool()
+    cleanup()
+    users = seed(args.random)
+    try:
+        with db_scope("parity_health_scores"):
+            mismatches = compare(users)
+    finally:
+        if not args.keep:
+            cleanup()
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,24 @@
 -- WARNING: This schema is for context only and is not meant to be run.
 -- Table order and constraints may not be valid for execution.
 
+CREATE TABLE public.accounts (
+  id integer NOT NULL DEFAULT nextval('accounts_id_seq'::regclass),
+  user_id integer NOT NULL,
+  item_id text NOT NULL,
+  account_id text NOT NULL UNIQUE,
+  name text NOT NULL,
+  official_name text,
+  type text,
+  subtype text,
+  mask text,
+  current_balance numeric,
+  available_balance numeric,
+  currency text DEFAULT 'USD'::text,
+  fetched_at timestamp without time zone NOT NULL DEFAULT now(),
+  CONSTRAINT accounts_pkey PRIMARY KEY (id),
+  CONSTRAINT accounts_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id),
+  CONSTRAINT accounts_item_id_fkey FOREIGN KEY (item_id) REFERENCES public.plaid_items(item_id)
+);
 CREATE TABLE public.budgets (
   id integer NOT NULL DEFAULT nextval('budgets_id_seq'::regclass),
   user_id integer NOT NULL,
@@ -57,6 +75,33 @@ CREATE TABLE public.health_scores (
   CONSTRAINT health_scores_pkey PRIMARY KEY (id),
   CONSTRAINT health_scores_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
 );
+CREATE TABLE public.job_queue (
+  id bigint NOT NULL DEFAULT nextval('job_queue_id_seq'::regclass),
+  job_type text NOT NULL,
+  user_id integer NOT NULL,
+  payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+  status text NOT NULL DEFAULT 'queued'::text,
+  attempts integer NOT NULL DEFAULT 0,
+  max_attempts integer NOT NULL DEFAULT 5,
+  run_after timestamp without time zone NOT NULL DEFAULT now(),
+  leased_until timestamp without time zone,
+  worker_id text,
+  result jsonb,
+  last_error text,
+  created_at timestamp without time zone NOT NULL DEFAULT now(),
+  started_at timestamp without time zone,
+  finished_at timestamp without time zone,
+  CONSTRAINT job_queue_pkey PRIMARY KEY (id),
+  CONSTRAINT job_queue_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
+);
+CREATE TABLE public.job_watermarks (
+  job_type text NOT NULL,
+  user_id integer NOT NULL,
+  data_version bigint NOT NULL,
+  succeeded_at timestamp without time zone NOT NULL DEFAULT now(),
+  CONSTRAINT job_watermarks_pkey PRIMARY KEY (job_type, user_id),
+  CONSTRAINT job_watermarks_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
+);
 CREATE TABLE public.plaid_items (
   id integer NOT NULL DEFAULT nextval('plaid_items_id_seq'::regclass),
   user_id integer NOT NULL,
@@ -67,6 +112,9 @@ CREATE TABLE public.plaid_items (
   cursor text,
   created_at timestamp without time zone DEFAULT now(),
   updated_at timestamp without time zone DEFAULT now(),
+  status text NOT NULL DEFAULT 'ok'::text,
+  error_code text,
+  status_updated_at timestamp without time zone,
   CONSTRAINT plaid_items_pkey PRIMARY KEY (id),
   CONSTRAINT plaid_items_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
 );
@@ -123,6 +171,24 @@ CREATE TABLE public.savings (
   CONSTRAINT savings_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id),
   CONSTRAINT savings_source_transaction_id_fkey FOREIGN KEY (source_transaction_id) REFERENCES public.transactions(id)
 );
+CREATE TABLE public.sync_jobs (
+  id text NOT NULL,
+  user_id integer NOT NULL,
+  trigger text NOT NULL DEFAULT 'manual'::text,
+  status text NOT NULL DEFAULT 'queued'::text,
+  pages integer NOT NULL DEFAULT 0,
+  added integer NOT NULL DEFAULT 0,
+  modified integer NOT NULL DEFAULT 0,
+  removed integer NOT NULL DEFAULT 0,
+  items jsonb NOT NULL DEFAULT '[]'::jsonb,
+  error text,
+  created_at timestamp without time zone NOT NULL DEFAULT now(),
+  started_at timestamp without time zone,
+  heartbeat_at timestamp without time zone NOT NULL DEFAULT now(),
+  finished_at timestamp without time zone,
+  CONSTRAINT sync_jobs_pkey PRIMARY KEY (id),
+  CONSTRAINT sync_jobs_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
+);
 CREATE TABLE public.time_range_reports (
   id integer NOT NULL DEFAULT nextval('time_range_reports_id_seq'::regclass),
   user_id integer NOT NULL,
@@ -142,6 +208,18 @@ CREATE TABLE public.time_range_reports (
   CONSTRAINT time_range_reports_pkey PRIMARY KEY (id),
   CONSTRAINT time_range_reports_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
 );
+CREATE TABLE public.transaction_counters (
+  user_id integer NOT NULL,
+  account_id text NOT NULL DEFAULT ''::text,
+  txn_count bigint NOT NULL DEFAULT 0,
+  sum_income numeric NOT NULL DEFAULT 0,
+  sum_spend numeric NOT NULL DEFAULT 0,
+  min_date date,
+  max_date date,
+  updated_at timestamp without time zone NOT NULL DEFAULT now(),
+  CONSTRAINT transaction_counters_pkey PRIMARY KEY (user_id, account_id),
+  CONSTRAINT transaction_counters_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
+);
 CREATE TABLE public.transactions (
   id integer NOT NULL DEFAULT nextval('transactions_id_seq'::regclass),
   user_id integer NOT NULL,
@@ -158,6 +236,13 @@ CREATE TABLE public.transactions (
   CONSTRAINT transactions_pkey PRIMARY KEY (id),
   CONSTRAINT transactions_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
 );
+CREATE TABLE public.user_activity (
+  user_id integer NOT NULL,
+  data_version bigint NOT NULL DEFAULT 1,
+  last_changed_at timestamp without time zone NOT NULL DEFAULT now(),
+  CONSTRAINT user_activity_pkey PRIMARY KEY (user_id),
+  CONSTRAINT user_activity_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id)
+);
 CREATE TABLE public.users (
   id integer NOT NULL DEFAULT nextval('users_id_seq'::regclass),
   username character varying NOT NULL UNIQUE,
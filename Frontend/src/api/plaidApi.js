@@ -5,6 +5,9 @@
  */
 import apiClient from './apiClient';
 
+const SYNC_POLL_INTERVAL_MS = 1500;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export const plaidApi = {
   /**
    * Generate a Plaid Link token.
@@ -29,11 +32,39 @@ export const plaidApi = {
   },
 
   /**
-   * Trigger incremental transaction sync.
+   * Trigger incremental transaction sync and wait for the background job.
+   * Attaches to an already-running sync (e.g. the backfill started on link).
+   * @param {(job: object) => void} [onProgress] - called with each polled job
    * @returns {{ message: string, added: number, modified: number, removed: number }}
    */
-  async syncTransactions() {
+  async syncTransactions(onProgress) {
     const res = await apiClient.post('/plaid/sync_transactions');
+    let job = res.data;
+
+    while (job.status === 'queued' || job.status === 'running') {
+      if (onProgress) onProgress(job);
+      await sleep(SYNC_POLL_INTERVAL_MS);
+      job = await this.getSyncJob(job.job_id);
+    }
+
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Sync failed');
+    }
+    return {
+      message: 'Transactions synced successfully',
+      added: job.added,
+      modified: job.modified,
+      removed: job.removed,
+    };
+  },
+
+  /**
+   * Fetch status and progress of a background sync job.
+   * @param {string} jobId
+   * @returns {{ job_id: string, status: string, pages: number, added: number, modified: number, removed: number }}
+   */
+  async getSyncJob(jobId) {
+    const res = await apiClient.get(`/plaid/sync_jobs/${jobId}`);
     return res.data;
   },
 
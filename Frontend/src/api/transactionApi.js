@@ -1,6 +1,7 @@
 /**
  * Transaction domain API.
- * Encapsulates GET /transactions (paginated + filterable), POST, DELETE.
+ * Encapsulates GET /transactions (paginated + filterable), GET /transactions/summary,
+ * GET /transactions/search, POST, DELETE.
  * Returns clean objects — callers never parse axios responses.
  */
 import apiClient from './apiClient';
@@ -9,7 +10,8 @@ export const transactionApi = {
   /**
    * Fetch paginated transactions with optional account filter.
    * @param {{ page?: number, per_page?: number, account_id?: string }} params
-   * @returns {{ transactions: Array, pagination: { page, per_page, total, total_pages } }}
+   * @returns {{ transactions: Array, pagination: { page, per_page, total, total_pages },
+   *            summary: { count, total_income, total_spending, first_date, last_date } }}
    */
   async getTransactions({ page = 1, per_page = 50, account_id } = {}) {
     const params = { page, per_page };
@@ -20,6 +22,38 @@ export const transactionApi = {
     return res.data;
   },
 
+  /**
+   * Count, income, spending and date range of all transactions (or one account's).
+   * @returns {{ count, total_income, total_spending, first_date, last_date }}
+   */
+  async getSummary({ account_id } = {}) {
+    const params = {};
+    if (account_id && account_id !== 'all') {
+      params.account_id = account_id;
+    }
+    const res = await apiClient.get('/transactions/summary', { params });
+    return res.data;
+  },
+
+  /**
+   * Search transactions by description / merchant words and filters, newest first.
+   * Pass back pagination.next_cursor / prev_cursor as `cursor` to page.
+   * @param {{ q?: string, category?: string, min_amount?: number, max_amount?: number,
+   *           start?: string, end?: string, source?: 'manual'|'plaid', account_id?: string,
+   *           per_page?: number, cursor?: string }} params
+   * @returns {{ transactions: Array, pagination: { per_page, next_cursor, prev_cursor } }}
+   */
+  async search({ account_id, ...filters } = {}) {
+    const params = Object.fromEntries(
+      Object.entries(filters).filter(([, v]) => v !== undefined && v !== null && v !== '')
+    );
+    if (account_id && account_id !== 'all') {
+      params.account_id = account_id;
+    }
+    const res = await apiClient.get('/transactions/search', { params });
+    return res.data;
+  },
+
   /**
    * Create a manual transaction.
    * @returns {{ message: string, id: number }}
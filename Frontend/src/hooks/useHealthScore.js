@@ -3,6 +3,8 @@
  *
  * Reads selectedAccountId from AccountContext automatically.
  * Accepts a starting balance to factor into the cash buffer calculation.
+ * Income and spending come from the server for the selected window, so
+ * scores are served from the daily cache.
  * Race-condition safe via request ID counter.
  *
  * Returns:
@@ -17,7 +19,7 @@ import { healthScoreApi } from '../api/healthScoreApi';
 
 const VALID_WINDOWS = [30, 60, 90];
 
-export function useHealthScore(currentBalance = null, totalIncome = null, totalSpending = null) {
+export function useHealthScore(currentBalance = null) {
   const { selectedAccountId } = useAccount();
 
   const [healthScore, setHealthScore] = useState(null);
@@ -46,8 +48,6 @@ export function useHealthScore(currentBalance = null, totalIncome = null, totalS
         account_id: selectedAccountId,
         window_days: windowDays,
         current_balance: currentBalance,
-        total_income: totalIncome,
-        total_spending: totalSpending,
       });
       if (currentRequestId === requestIdRef.current) {
         setHealthScore(result);
@@ -61,7 +61,7 @@ export function useHealthScore(currentBalance = null, totalIncome = null, totalS
         setLoading(false);
       }
     }
-  }, [selectedAccountId, windowDays, currentBalance, totalIncome, totalSpending]);
+  }, [selectedAccountId, windowDays, currentBalance]);
 
   // ── Auto-fetch when params change ──
   useEffect(() => {
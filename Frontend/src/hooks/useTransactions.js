@@ -2,7 +2,9 @@
  * useTransactions — paginated transaction fetching.
  *
  * Reads the selected account from AccountContext.
- * Exposes page controls (next, prev, goToPage) and pagination metadata.
+ * Exposes page controls (next, prev, goToPage), pagination metadata and the
+ * server-side summary (count, total_income, total_spending) of all matching
+ * transactions — not just the loaded page.
  * Components render data + controls — zero fetch logic in JSX.
  */
 import { useState, useCallback } from 'react';
@@ -18,6 +20,7 @@ export function useTransactions() {
     total: 0,
     total_pages: 1,
   });
+  const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -32,6 +35,7 @@ export function useTransactions() {
           account_id,
         });
         setTransactions(data.transactions || []);
+        setSummary(data.summary || null);
         setPagination(
           data.pagination || {
             page,
@@ -90,6 +94,7 @@ export function useTransactions() {
   return {
     transactions,
     pagination,
+    summary,
     loading,
     error,
     fetchTransactions,
@@ -277,7 +277,7 @@ export default function Dashboard() {
   const { t } = useLanguage();
 
   const { validAccounts, loading: accountsLoading, error: accountsError, fetchAccounts } = useAccounts();
-  const { transactions, pagination, loading: txnsLoading, error: txnsError, fetchTransactions, nextPage, prevPage } = useTransactions();
+  const { transactions, pagination, summary: txnSummary, loading: txnsLoading, error: txnsError, fetchTransactions, nextPage, prevPage } = useTransactions();
   const {
     data: insightsData, loading: insightsLoading, error: insightsError,
     refresh: refreshInsights, mode: insightsMode, setMode: setInsightsMode,
@@ -293,9 +293,7 @@ export default function Dashboard() {
     refresh: refreshCashflow, horizonDays, setHorizonDays,
   } = useCashflowForecast(null);
 
-  // Derived values — computed before useHealthScore so they can be passed as context.
-  // This ensures the health score's savings calculation uses the same income/spending
-  // figures that the summary cards display.
+  // Derived values — the balance is passed to useHealthScore for the cash buffer.
   const totalBalance =
     selectedAccountId === 'all'
       ? validAccounts.reduce((s, a) => s + (a.current_balance || 0), 0)
@@ -303,13 +301,15 @@ export default function Dashboard() {
           .filter((a) => a.account_id === selectedAccountId)
           .reduce((s, a) => s + (a.current_balance || 0), 0);
 
-  const totalSpending = transactions.filter((t) => t.amount < 0).reduce((s, t) => s + Math.abs(t.amount), 0);
-  const totalIncome = transactions.filter((t) => t.amount > 0).reduce((s, t) => s + t.amount, 0);
+  // Summary cards only: all-time totals from the server-side counters. The health
+  // score computes income / spending over its own 30/60/90-day window.
+  const totalSpending = txnSummary?.total_spending ?? 0;
+  const totalIncome = txnSummary?.total_income ?? 0;
 
   const {
     healthScore: healthScoreData, loading: healthLoading, error: healthError,
     refresh: refreshHealthScore, windowDays: healthWindowDays, setWindowDays: setHealthWindowDays,
-  } = useHealthScore(totalBalance, totalIncome, totalSpending);
+  } = useHealthScore(totalBalance);
 
   const [showProfile, setShowProfile] = useState(false);
   const [showSettings, setShowSettings] = useState(false);
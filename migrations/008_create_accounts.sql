@@ -0,0 +1,35 @@
+-- ============================================================
+-- Migration 008: Local accounts / balances cache
+--
+-- Stores each Plaid item's accounts and balances so GET /plaid/accounts
+-- and the cashflow / health services don't call accounts_get on
+-- every request.
+--
+-- Design decisions:
+--   * account_id (Plaid) is UNIQUE for upsert from sync / link
+--   * fetched_at drives stale-while-revalidate in plaid_service
+--   * ON DELETE CASCADE from plaid_items so a removed item leaves
+--     no orphaned balances
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id                SERIAL PRIMARY KEY,
+    user_id           INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    item_id           TEXT NOT NULL REFERENCES plaid_items(item_id) ON DELETE CASCADE,
+    account_id        TEXT NOT NULL UNIQUE,
+    name              TEXT NOT NULL,
+    official_name     TEXT,
+    type              TEXT,
+    subtype           TEXT,
+    mask              TEXT,
+    current_balance   NUMERIC(14, 2),
+    available_balance NUMERIC(14, 2),
+    currency          TEXT DEFAULT 'USD',
+    fetched_at        TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_accounts_user
+    ON accounts (user_id);
+
+CREATE INDEX IF NOT EXISTS idx_accounts_item
+    ON accounts (item_id);
@@ -0,0 +1,13 @@
+-- ============================================================
+-- Migration 009: Item health on plaid_items
+--
+-- Populated by the Plaid webhook receiver from ITEM webhooks
+-- (ERROR, PENDING_EXPIRATION, USER_PERMISSION_REVOKED, ...).
+-- LOGIN_REPAIRED resets status to 'ok'.
+--
+-- Safe to run repeatedly: IF NOT EXISTS guards.
+-- ============================================================
+
+ALTER TABLE plaid_items ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'ok';
+ALTER TABLE plaid_items ADD COLUMN IF NOT EXISTS error_code TEXT;
+ALTER TABLE plaid_items ADD COLUMN IF NOT EXISTS status_updated_at TIMESTAMP;
@@ -0,0 +1,38 @@
+-- ============================================================
+-- Migration 010: Background Plaid sync jobs
+--
+-- POST /plaid/sync_transactions and the post-link backfill create a
+-- job here and return its id; clients poll for progress.
+--
+-- Design decisions:
+--   * id is an opaque hex UUID (not guessable, not sequential)
+--   * partial UNIQUE index on user_id for queued/running jobs:
+--     a second request attaches to the active job instead of
+--     starting a duplicate sync
+--   * progress counters are incremented in the same transaction
+--     as each committed sync page; heartbeat_at lets a new request
+--     replace a job whose worker died
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS sync_jobs (
+    id            TEXT PRIMARY KEY,
+    user_id       INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    trigger       TEXT NOT NULL DEFAULT 'manual',
+    status        TEXT NOT NULL DEFAULT 'queued',
+    pages         INTEGER NOT NULL DEFAULT 0,
+    added         INTEGER NOT NULL DEFAULT 0,
+    modified      INTEGER NOT NULL DEFAULT 0,
+    removed       INTEGER NOT NULL DEFAULT 0,
+    items         JSONB NOT NULL DEFAULT '[]'::jsonb,
+    error         TEXT,
+    created_at    TIMESTAMP NOT NULL DEFAULT NOW(),
+    started_at    TIMESTAMP,
+    heartbeat_at  TIMESTAMP NOT NULL DEFAULT NOW(),
+    finished_at   TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_sync_jobs_active_user
+    ON sync_jobs (user_id) WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_user_created
+    ON sync_jobs (user_id, created_at DESC);
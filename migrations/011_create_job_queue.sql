@@ -0,0 +1,50 @@
+-- ============================================================
+-- Migration 011: Durable background job queue
+--
+-- Nightly jobs (transaction sync, subscription detection, weekly
+-- reports, cashflow forecasts) enqueue one row per (job_type, user)
+-- here; any number of `python -m jobs.worker` processes lease rows
+-- with SELECT ... FOR UPDATE SKIP LOCKED and run them.
+--
+-- Design decisions:
+--   * partial UNIQUE index on (job_type, user_id) for queued/running
+--     rows: re-enqueueing while a run is in flight is a no-op
+--   * leased_until is the crash detector — a running row whose lease
+--     has passed is leased again by another worker
+--   * attempts counts leases; a row that fails (or loses its lease)
+--     max_attempts times moves to status 'dead' for inspection
+--   * finished rows are kept for history and purged after a retention
+--     window by the enqueue step
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS job_queue (
+    id             BIGSERIAL PRIMARY KEY,
+    job_type       TEXT NOT NULL,
+    user_id        INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    payload        JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status         TEXT NOT NULL DEFAULT 'queued',
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    max_attempts   INTEGER NOT NULL DEFAULT 5,
+    run_after      TIMESTAMP NOT NULL DEFAULT NOW(),
+    leased_until   TIMESTAMP,
+    worker_id      TEXT,
+    result         JSONB,
+    last_error     TEXT,
+    created_at     TIMESTAMP NOT NULL DEFAULT NOW(),
+    started_at     TIMESTAMP,
+    finished_at    TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_queue_active
+    ON job_queue (job_type, user_id) WHERE status IN ('queued', 'running');
+
+-- Lease scan: ready rows in run_after order
+CREATE INDEX IF NOT EXISTS idx_job_queue_ready
+    ON job_queue (run_after) WHERE status = 'queued';
+
+-- Expired-lease scan
+CREATE INDEX IF NOT EXISTS idx_job_queue_leased
+    ON job_queue (leased_until) WHERE status = 'running';
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_type_status
+    ON job_queue (job_type, status);
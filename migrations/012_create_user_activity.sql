@@ -0,0 +1,39 @@
+-- ============================================================
+-- Migration 012: Per-user data versions and job watermarks
+--
+-- Nightly jobs used to recompute every user found by
+-- SELECT DISTINCT user_id FROM transactions. user_activity holds one
+-- row per user whose transactions changed, with a version that every
+-- write bumps; job_watermarks records the version each job last
+-- succeeded at, so a run only has to visit users whose version moved.
+--
+-- Design decisions:
+--   * data_version is bumped in the same transaction as the write
+--     (manual inserts, deletes, Plaid sync pages), so a committed
+--     change is never missed by a job that starts afterwards
+--   * a watermark stores the version read *before* the job ran:
+--     a write that lands mid-run leaves the user dirty for next time
+--   * watermarks are keyed by job name (e.g. 'subscriptions',
+--     'nightly:cashflow'), so each job and pipeline stage tracks
+--     its own progress
+--   * existing users are backfilled at version 1 with no watermark,
+--     so the first incremental run processes everyone once
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS user_activity (
+    user_id          INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    data_version     BIGINT NOT NULL DEFAULT 1,
+    last_changed_at  TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS job_watermarks (
+    job_type      TEXT NOT NULL,
+    user_id       INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    data_version  BIGINT NOT NULL,
+    succeeded_at  TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (job_type, user_id)
+);
+
+INSERT INTO user_activity (user_id, data_version, last_changed_at)
+SELECT user_id, 1, NOW() FROM transactions GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
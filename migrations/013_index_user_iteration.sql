@@ -0,0 +1,23 @@
+-- ============================================================
+-- Migration 013: Indexes for paging through job users
+--
+-- Batch jobs used to start with SELECT DISTINCT user_id over all of
+-- transactions (or plaid_items). They now page through user ids with
+-- keyset queries (WHERE user_id > last ORDER BY user_id LIMIT n) on
+-- user_activity, which has one row per user and is maintained on
+-- every transactions write (migration 012).
+--
+-- Design decisions:
+--   * user_activity's primary key serves the plain pages; no new
+--     column is needed to know who has transactions
+--   * last_changed_at is indexed for "active in the last N days"
+--     filters, which select a small recent slice of users
+--   * plaid_items gets a user_id index so the linked-users pages
+--     (Plaid sync, nightly pipeline) are index range scans too
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_user_activity_last_changed
+    ON user_activity (last_changed_at);
+
+CREATE INDEX IF NOT EXISTS idx_plaid_items_user
+    ON plaid_items (user_id);
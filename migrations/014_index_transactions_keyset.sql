@@ -0,0 +1,24 @@
+-- ============================================================
+-- Migration 014: Indexes for keyset pagination of transactions
+--
+-- GET /transactions walked pages with ORDER BY date DESC, id DESC
+-- LIMIT/OFFSET, which reads and discards every row before the page.
+-- Cursor pages instead seek straight to a (date, id) position:
+--   WHERE user_id = $1 [AND plaid_account_id = $2]
+--     AND (date, id) < ($3, $4)
+--   ORDER BY date DESC, id DESC LIMIT n
+--
+-- Design decisions:
+--   * both indexes match the page order exactly (date DESC, id DESC),
+--     so a page is one index range scan with no sort, at any depth
+--   * the account-filtered variant puts plaid_account_id right after
+--     user_id, since the account filter is an equality
+--   * idx_transactions_user_date (migration 002) is left in place so
+--     the analytics range queries keep their current plans
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date_id
+    ON transactions (user_id, date DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_account_date_id
+    ON transactions (user_id, plaid_account_id, date DESC, id DESC);
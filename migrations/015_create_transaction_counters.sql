@@ -0,0 +1,142 @@
+-- ============================================================
+-- Migration 015: Maintained per-user / per-account transaction counters
+--
+-- GET /transactions ran SELECT COUNT(*) over the user's (or account's)
+-- transactions on every page, and the dashboard summary cards were
+-- summed client-side from whatever page was loaded. transaction_counters
+-- keeps count, income, spending and date range per (user, account),
+-- updated in the same transaction as every transactions write.
+--
+-- Design decisions:
+--   * maintained by statement-level triggers over transition tables,
+--     so every write path is covered (manual inserts, deletes, Plaid
+--     upserts incl. execute_values pages and COPY merges, updates
+--     that move a row to another account or date) at one counter
+--     upsert per statement, not per row
+--   * account_id '' holds rows without a plaid_account_id (manual)
+--   * sum_spend is the absolute total of negative amounts, transfers
+--     included, matching the summary cards
+--   * min_date / max_date only widen on insert; deletes and updates
+--     recompute them for the accounts they touched, two index probes
+--     on idx_transactions_user_account_date_id (migration 014)
+--   * TRUNCATE and writes with triggers disabled are not tracked;
+--     jobs/counter_jobs.py reconciles counters against transactions
+--   * created, backfilled and armed in one transaction with writes
+--     to transactions blocked, so no write falls between backfill
+--     and trigger
+-- ============================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS transaction_counters (
+    user_id     INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    account_id  TEXT NOT NULL DEFAULT '',
+    txn_count   BIGINT NOT NULL DEFAULT 0,
+    sum_income  NUMERIC NOT NULL DEFAULT 0,
+    sum_spend   NUMERIC NOT NULL DEFAULT 0,
+    min_date    DATE,
+    max_date    DATE,
+    updated_at  TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, account_id)
+);
+
+LOCK TABLE transactions IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE OR REPLACE FUNCTION transaction_counters_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO transaction_counters AS c
+            (user_id, account_id, txn_count, sum_income, sum_spend,
+             min_date, max_date, updated_at)
+        SELECT user_id, COALESCE(plaid_account_id, ''), COUNT(*),
+               COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0),
+               COALESCE(SUM(-amount) FILTER (WHERE amount < 0), 0),
+               MIN(date), MAX(date), NOW()
+        FROM new_rows
+        GROUP BY 1, 2
+        ON CONFLICT (user_id, account_id) DO UPDATE SET
+            txn_count  = c.txn_count + EXCLUDED.txn_count,
+            sum_income = c.sum_income + EXCLUDED.sum_income,
+            sum_spend  = c.sum_spend + EXCLUDED.sum_spend,
+            min_date   = LEAST(c.min_date, EXCLUDED.min_date),
+            max_date   = GREATEST(c.max_date, EXCLUDED.max_date),
+            updated_at = NOW();
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE transaction_counters c SET
+            txn_count  = c.txn_count - o.n,
+            sum_income = c.sum_income - o.income,
+            sum_spend  = c.sum_spend - o.spend,
+            updated_at = NOW()
+        FROM (
+            SELECT user_id, COALESCE(plaid_account_id, '') AS account_id,
+                   COUNT(*) AS n,
+                   COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0) AS income,
+                   COALESCE(SUM(-amount) FILTER (WHERE amount < 0), 0) AS spend
+            FROM old_rows
+            GROUP BY 1, 2
+        ) o
+        WHERE c.user_id = o.user_id AND c.account_id = o.account_id;
+
+        -- Removed rows may have been the oldest / newest of their account
+        UPDATE transaction_counters c SET
+            min_date = CASE WHEN c.account_id = '' THEN
+                           (SELECT MIN(t.date) FROM transactions t
+                            WHERE t.user_id = c.user_id AND t.plaid_account_id IS NULL)
+                       ELSE
+                           (SELECT MIN(t.date) FROM transactions t
+                            WHERE t.user_id = c.user_id AND t.plaid_account_id = c.account_id)
+                       END,
+            max_date = CASE WHEN c.account_id = '' THEN
+                           (SELECT MAX(t.date) FROM transactions t
+                            WHERE t.user_id = c.user_id AND t.plaid_account_id IS NULL)
+                       ELSE
+                           (SELECT MAX(t.date) FROM transactions t
+                            WHERE t.user_id = c.user_id AND t.plaid_account_id = c.account_id)
+                       END
+        FROM (SELECT DISTINCT user_id, COALESCE(plaid_account_id, '') AS account_id
+              FROM old_rows) o
+        WHERE c.user_id = o.user_id AND c.account_id = o.account_id;
+
+        DELETE FROM transaction_counters c
+        USING (SELECT DISTINCT user_id, COALESCE(plaid_account_id, '') AS account_id
+               FROM old_rows) o
+        WHERE c.user_id = o.user_id AND c.account_id = o.account_id
+          AND c.txn_count <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_transaction_counters_insert ON transactions;
+CREATE TRIGGER trg_transaction_counters_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION transaction_counters_apply();
+
+DROP TRIGGER IF EXISTS trg_transaction_counters_update ON transactions;
+CREATE TRIGGER trg_transaction_counters_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION transaction_counters_apply();
+
+DROP TRIGGER IF EXISTS trg_transaction_counters_delete ON transactions;
+CREATE TRIGGER trg_transaction_counters_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION transaction_counters_apply();
+
+DELETE FROM transaction_counters;
+INSERT INTO transaction_counters
+    (user_id, account_id, txn_count, sum_income, sum_spend, min_date, max_date)
+SELECT user_id, COALESCE(plaid_account_id, ''), COUNT(*),
+       COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0),
+       COALESCE(SUM(-amount) FILTER (WHERE amount < 0), 0),
+       MIN(date), MAX(date)
+FROM transactions
+GROUP BY 1, 2;
+
+COMMIT;
@@ -0,0 +1,37 @@
+-- ============================================================
+-- Migration 016: Indexes for transaction search (GET /transactions/search)
+--
+-- Search filters a user's transactions by description text, category,
+-- amount range, date range, source and account, newest first with the
+-- keyset cursors of GET /transactions:
+--   WHERE user_id = $1
+--     [AND to_tsvector('simple', COALESCE(description, '')) @@ $q]
+--     [AND category = $c] [AND amount BETWEEN ...] [AND date BETWEEN ...]
+--     [AND (date, id) < ($d, $id)]
+--   ORDER BY date DESC, id DESC LIMIT n
+--
+-- Design decisions:
+--   * full text on the description with the 'simple' configuration (no
+--     stemming or stop words), so merchant names and descriptor tokens
+--     ("SQ *STARBUCKS #1234" → sq, starbucks, 1234) match as typed, and
+--     prefix queries (starb:*) serve type-ahead. Built-in: no pg_trgm
+--     extension needed; infix matching ("bucks") is not supported
+--   * the search predicate repeats this index expression exactly, or
+--     the planner can't use it
+--   * category is an equality filter, so its index continues with the
+--     page order (date DESC, id DESC) like migration 014's indexes
+--   * amount ranges get (user_id, amount); date ranges, source and
+--     account use idx_transactions_user_date_id /
+--     idx_transactions_user_account_date_id (migration 014)
+--   * the service rejects plans the planner costs above
+--     SEARCH_MAX_PLAN_COST instead of running them
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_transactions_description_fts
+    ON transactions USING gin (to_tsvector('simple', COALESCE(description, '')));
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date_id
+    ON transactions (user_id, category, date DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_amount
+    ON transactions (user_id, amount);